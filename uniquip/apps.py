@@ -0,0 +1,11 @@
+from django.apps import AppConfig
+
+
+class UniquipConfig(AppConfig):
+    name = 'uniquip'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .utils import sql_trace, tracing
+        tracing.configure()
+        sql_trace.install()
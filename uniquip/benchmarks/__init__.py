@@ -0,0 +1,42 @@
+import statistics
+import time
+
+SCENARIOS = {}
+
+
+def scenario(name):
+    def register(func):
+        SCENARIOS[name] = func
+        return func
+    return register
+
+
+def timed(func, repeat):
+    samples = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return summarize(samples), result
+
+
+def summarize(samples_ms):
+    ordered = sorted(samples_ms)
+    return {
+        'runs': len(ordered),
+        'min_ms': round(ordered[0], 3),
+        'p50_ms': round(percentile(ordered, 50), 3),
+        'p95_ms': round(percentile(ordered, 95), 3),
+        'p99_ms': round(percentile(ordered, 99), 3),
+        'mean_ms': round(statistics.fmean(ordered), 3),
+    }
+
+
+def percentile(ordered, pct):
+    if not ordered:
+        return 0.0
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
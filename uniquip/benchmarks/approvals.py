@@ -0,0 +1,64 @@
+import time
+from datetime import datetime, timedelta
+
+from django.db import connection
+from rest_framework.test import APIRequestFactory
+
+from uniquip.benchmarks import scenario
+from uniquip.utils import approvals
+from uniquip.utils.id_allocator import reservation_ids
+from uniquip.utils.occupancy import PENDING_STATUS
+from uniquip.views import ApproveReservationView
+
+
+def _insert_pending(equipment_id, net_id, count, first_start):
+    ids = reservation_ids.allocate(count)
+    rows = [[reservation_id, equipment_id, net_id, first_start + timedelta(hours=i),
+             first_start + timedelta(hours=i + 1), PENDING_STATUS] for i, reservation_id in enumerate(ids)]
+    with connection.cursor() as cursor:
+        cursor.executemany("""
+            INSERT INTO uniquip.Reservations (ReservationId, EquipmentId, NetId, StartTime, EndTime, Status)
+            VALUES (%s, %s, %s, %s, %s, %s)
+        """, rows)
+    return ids
+
+
+def _delete(ids):
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM uniquip.Reservations WHERE ReservationId IN ({', '.join(['%s'] * len(ids))})",
+                       ids)
+
+
+@scenario('bulk_approve')
+def bulk_approve(repeat, equipment_id, net_id, count=1000):
+    """
+    Approve ``count`` synthetic pending reservations (placed in 2099 and
+    deleted afterwards) one PATCH at a time and with one bulk call.
+    """
+    count = int(count)
+    view = ApproveReservationView.as_view()
+    factory = APIRequestFactory()
+
+    ids = _insert_pending(int(equipment_id), net_id, count, datetime(2099, 1, 1))
+    try:
+        started = time.perf_counter()
+        for reservation_id in ids:
+            view(factory.patch(f'/api/reservations/approve/{reservation_id}/'), reservation_id=reservation_id)
+        per_item = time.perf_counter() - started
+    finally:
+        _delete(ids)
+
+    ids = _insert_pending(int(equipment_id), net_id, count, datetime(2099, 1, 1))
+    try:
+        started = time.perf_counter()
+        outcomes = approvals.decide(approvals.APPROVE, reservation_ids=ids)
+        bulk = time.perf_counter() - started
+    finally:
+        _delete(ids)
+
+    return {
+        'reservations': count,
+        'per_item_endpoint': {'seconds': round(per_item, 3), 'per_second': round(count / per_item, 1)},
+        'bulk': {'seconds': round(bulk, 3), 'per_second': round(count / bulk, 1),
+                 'approved': sum(1 for outcome in outcomes.values() if outcome == 'approved')},
+    }
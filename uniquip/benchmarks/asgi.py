@@ -0,0 +1,104 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from wsgiref.util import setup_testing_defaults
+
+from django.core.asgi import get_asgi_application
+from django.core.wsgi import get_wsgi_application
+
+from uniquip.benchmarks import scenario, summarize
+
+
+def _wsgi(path, requests, concurrency, host):
+    """The WSGI application with one thread per connection, like a threaded WSGI server."""
+    application = get_wsgi_application()
+    path, _, query = path.partition('?')
+
+    def call(_):
+        environ = {'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': query, 'HTTP_HOST': host,
+                   'wsgi.input': BytesIO()}
+        setup_testing_defaults(environ)
+        statuses = []
+        started = time.perf_counter()
+        body = application(environ, lambda status, headers, exc_info=None: statuses.append(status))
+        try:
+            for _ in body:
+                pass
+        finally:
+            if hasattr(body, 'close'):
+                body.close()
+        return (time.perf_counter() - started) * 1000, int(statuses[0].split()[0])
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return list(pool.map(call, range(requests)))
+
+
+def _asgi(path, requests, concurrency, host):
+    """The ASGI application with ``concurrency`` requests in flight on one event loop."""
+    application = get_asgi_application()
+    path, _, query = path.partition('?')
+
+    async def call(gate):
+        scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET', 'scheme': 'http',
+            'path': path, 'raw_path': path.encode(), 'query_string': query.encode(), 'root_path': '',
+            'headers': [(b'host', host.encode())], 'client': ('127.0.0.1', 0), 'server': (host, 80),
+        }
+        status_code = None
+
+        async def receive():
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+        async def send(message):
+            nonlocal status_code
+            if message['type'] == 'http.response.start':
+                status_code = message['status']
+
+        async with gate:
+            started = time.perf_counter()
+            await application(scope, receive, send)
+            return (time.perf_counter() - started) * 1000, status_code
+
+    async def run():
+        gate = asyncio.Semaphore(concurrency)
+        return await asyncio.gather(*(call(gate) for _ in range(requests)))
+
+    return asyncio.run(run())
+
+
+@scenario('asgi_concurrency')
+def asgi_concurrency(repeat, path='/api/equipments-list/?page_size=10&count=none', requests=200, concurrency=32,
+                     host='localhost'):
+    """
+    Throughput and latency of one read endpoint under concurrent load: the
+    sync route under WSGI, the same sync route under ASGI, and its
+    /api/async/ variant under ASGI. ``repeat`` rounds are run per mode.
+    """
+    requests = int(requests)
+    concurrency = int(concurrency)
+    async_path = path.replace('/api/', '/api/async/', 1)
+    modes = {
+        'wsgi_sync': lambda: _wsgi(path, requests, concurrency, host),
+        'asgi_sync': lambda: _asgi(path, requests, concurrency, host),
+        'asgi_async': lambda: _asgi(async_path, requests, concurrency, host),
+    }
+    results = {}
+    for mode, run in modes.items():
+        run()  # warm caches and connections
+        samples = []
+        statuses = {}
+        elapsed = 0.0
+        for _ in range(repeat):
+            started = time.perf_counter()
+            outcomes = run()
+            elapsed += time.perf_counter() - started
+            for latency_ms, status_code in outcomes:
+                samples.append(latency_ms)
+                statuses[status_code] = statuses.get(status_code, 0) + 1
+        results[mode] = {
+            **summarize(samples),
+            'requests_per_second': round(len(samples) / elapsed, 1),
+            'statuses': statuses,
+        }
+    return results
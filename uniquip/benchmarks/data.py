@@ -0,0 +1,197 @@
+import random
+from datetime import date, datetime, time, timedelta
+
+from django.db import connection, transaction
+
+from uniquip.models import Reservation, Student
+from uniquip.utils.occupancy import CANCELLED_STATUS, PENDING_STATUS, REJECTED_STATUS, RESERVED_STATUS
+
+SCALES = {
+    'small': {'students': 1000, 'faculty': 50, 'courses': 100, 'labs': 10, 'equipment_per_lab': 10,
+              'courses_per_student': 4, 'reservations': 20000, 'days': 120},
+    'medium': {'students': 10000, 'faculty': 300, 'courses': 1000, 'labs': 40, 'equipment_per_lab': 25,
+               'courses_per_student': 4, 'reservations': 500000, 'days': 240},
+    'university': {'students': 50000, 'faculty': 1500, 'courses': 5000, 'labs': 150, 'equipment_per_lab': 40,
+                   'courses_per_student': 5, 'reservations': 5000000, 'days': 365},
+}
+
+# Children before parents, so the tables can be emptied with foreign keys enforced.
+TABLES = ('PendingApprovals', 'RecurringReservations', 'EquipmentUsageHourly', 'EquipmentUsageDaily', 'CourseLoadDaily',
+          'Reservations', 'Enrollments', 'CourseLab', 'Equipments', 'Courses', 'Labs', 'Students', 'Faculty')
+
+CATEGORIES = ('Microscope', 'Oscilloscope', '3D Printer', 'Centrifuge', 'Spectrometer', 'Laser Cutter',
+              'Soldering Station', 'Workstation', 'Camera', 'Signal Generator')
+SUBJECTS = ('CS', 'ECE', 'ME', 'CHEM', 'BIOE', 'PHYS', 'MSE', 'AE', 'CEE', 'IE')
+FIRST_CRN = 10000
+
+
+class SyntheticData:
+    """
+    Deterministic university-sized data set: the same ``seed`` and counts
+    always produce the same rows and ids.
+
+    Rows come from generators and are written with multi-row INSERTs of
+    ``batch_size`` rows, one transaction per batch, so memory stays bounded
+    by the largest lookup (students by lab) rather than by the number of
+    reservations. Reservations never overlap on one piece of equipment:
+    each equipment's bookings are sampled without replacement from its
+    lab's hourly slots.
+    """
+
+    def __init__(self, seed=0, first_day=date(2024, 1, 1), batch_size=5000, **counts):
+        self.seed = seed
+        self.first_day = first_day
+        self.batch_size = batch_size
+        self.counts = counts
+
+    def load(self, log=lambda message: None):
+        rng = random.Random(self.seed)
+        counts = self.counts
+        loaded = {}
+
+        loaded['faculty'] = self._bulk('Faculty', ('FacultyId', 'Name', 'Email'), (
+            (i, f"Faculty {i}", f"faculty{i}@example.edu") for i in range(1, counts['faculty'] + 1)))
+        log(f"faculty: {loaded['faculty']}")
+
+        loaded['students'] = self._bulk('Students', ('NetId', 'Name', 'Email', 'PhoneNumber'), (
+            (self.net_id(i), f"Student {i}", f"{self.net_id(i)}@example.edu", f"217{i:07d}")
+            for i in range(counts['students'])))
+        log(f"students: {loaded['students']}")
+
+        courses = [(FIRST_CRN + i, rng.randint(1, counts['faculty'])) for i in range(counts['courses'])]
+        loaded['courses'] = self._bulk('Courses', ('CRN', 'CourseCode', 'CourseName', 'Credits', 'FacultyId'), (
+            (crn, f"{SUBJECTS[i % len(SUBJECTS)]} {100 + i // len(SUBJECTS) % 500}", f"Course {crn}",
+             rng.randint(1, 4), faculty_id)
+            for i, (crn, faculty_id) in enumerate(courses)))
+        log(f"courses: {loaded['courses']}")
+
+        hours = {}
+        for lab_id in range(1, counts['labs'] + 1):
+            open_hour = rng.choice((7, 8, 9))
+            hours[lab_id] = (open_hour, rng.randint(max(open_hour + 8, 17), 22))
+        loaded['labs'] = self._bulk('Labs', ('LabId', 'LabName', 'LabLocation', 'OpenHours', 'CloseHours'), (
+            (lab_id, f"Lab {lab_id}", f"Building {lab_id % 25 + 1}, Room {lab_id}", f"{open_hour:02d}:00:00",
+             f"{close_hour:02d}:00:00")
+            for lab_id, (open_hour, close_hour) in hours.items()))
+        log(f"labs: {loaded['labs']}")
+
+        labs_of_course = {crn: rng.sample(range(1, counts['labs'] + 1), min(rng.randint(1, 2), counts['labs']))
+                          for crn, _ in courses}
+        loaded['course_labs'] = self._bulk('CourseLab', ('CRN', 'LabId'), (
+            (crn, lab_id) for crn, lab_ids in labs_of_course.items() for lab_id in lab_ids))
+        log(f"course labs: {loaded['course_labs']}")
+
+        # Students enrolled in a course that uses a lab, so most bookings have approvers.
+        students_of_lab = {lab_id: [] for lab_id in hours}
+        enrolled_at = datetime.combine(self.first_day - timedelta(days=14), time(9))
+
+        def enrollments():
+            per_student = min(counts['courses_per_student'], len(courses))
+            for i in range(counts['students']):
+                for crn, _ in rng.sample(courses, per_student):
+                    for lab_id in labs_of_course[crn]:
+                        students_of_lab[lab_id].append(i)
+                    yield self.net_id(i), crn, 'SP24', enrolled_at + timedelta(minutes=rng.randrange(20160))
+
+        loaded['enrollments'] = self._bulk('Enrollments', ('NetId', 'CRN', 'Semester', 'EnrolledAt'), enrollments())
+        log(f"enrollments: {loaded['enrollments']}")
+
+        equipment = []
+        for lab_id in hours:
+            for _ in range(counts['equipment_per_lab']):
+                equipment.append((len(equipment) + 1, lab_id, rng.random() < 0.2, rng.random() < 0.95))
+        loaded['equipment'] = self._bulk(
+            'Equipments', ('EquipmentId', 'LabId', 'EquipmentName', 'Category', 'IsReservable', 'ApprovalRequired'), (
+                (equipment_id, lab_id, f"{CATEGORIES[equipment_id % len(CATEGORIES)]} {equipment_id}",
+                 CATEGORIES[equipment_id % len(CATEGORIES)], reservable, approval_required)
+                for equipment_id, lab_id, approval_required, reservable in equipment))
+        log(f"equipment: {loaded['equipment']}")
+
+        loaded['reservations'] = self._bulk(
+            'Reservations', ('ReservationId', 'EquipmentId', 'NetId', 'StartTime', 'EndTime', 'Status'),
+            self._reservations(rng, equipment, hours, students_of_lab))
+        log(f"reservations: {loaded['reservations']}")
+
+        with connection.cursor() as cursor:
+            cursor.execute("DELETE FROM uniquip.IdSequences WHERE Name = %s", ['reservations'])
+            cursor.execute("INSERT INTO uniquip.IdSequences (Name, NextValue) VALUES (%s, %s)",
+                           ['reservations', loaded['reservations'] + 1])
+        return loaded
+
+    def _reservations(self, rng, equipment, hours, students_of_lab):
+        total = self.counts['reservations']
+        days = self.counts['days']
+        # Skewed popularity: a few pieces of equipment take a large share of the bookings.
+        weights = [rng.paretovariate(1.5) for _ in equipment]
+        scale = total / sum(weights)
+        quotas = [int(weight * scale) for weight in weights]
+        for i in range(total - sum(quotas)):
+            quotas[i % len(quotas)] += 1
+
+        reservation_id = 1
+        carry = 0
+        for (equipment_id, lab_id, approval_required, _), quota in zip(equipment, quotas):
+            open_hour, close_hour = hours[lab_id]
+            per_day = close_hour - open_hour
+            # Quota that does not fit this equipment's slots moves on to the next one.
+            quota += carry
+            taken = min(quota, days * per_day)
+            carry = quota - taken
+            lab_students = students_of_lab[lab_id]
+            for slot in sorted(rng.sample(range(days * per_day), taken)):
+                start = datetime.combine(self.first_day + timedelta(days=slot // per_day),
+                                         time(open_hour + slot % per_day))
+                if lab_students and rng.random() < 0.8:
+                    student = rng.choice(lab_students)
+                else:
+                    student = rng.randrange(self.counts['students'])
+                draw = rng.random()
+                if approval_required:
+                    reservation_status = (PENDING_STATUS if draw < 0.3 else REJECTED_STATUS if draw < 0.4
+                                          else RESERVED_STATUS)
+                else:
+                    reservation_status = CANCELLED_STATUS if draw < 0.1 else RESERVED_STATUS
+                yield (reservation_id, equipment_id, self.net_id(student), start, start + timedelta(hours=1),
+                       reservation_status)
+                reservation_id += 1
+
+    @property
+    def last_day(self):
+        return self.first_day + timedelta(days=self.counts['days'] - 1)
+
+    @staticmethod
+    def net_id(i):
+        return f"s{i:06d}"
+
+    def _bulk(self, table, columns, rows):
+        sql = (f"INSERT INTO uniquip.{table} ({', '.join(columns)}) "
+               f"VALUES ({', '.join(['%s'] * len(columns))})")
+        written = 0
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                written += self._write(sql, batch)
+                batch = []
+        if batch:
+            written += self._write(sql, batch)
+        return written
+
+    @staticmethod
+    def _write(sql, batch):
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.executemany(sql, batch)
+        return len(batch)
+
+
+def is_empty():
+    return not Reservation.objects.exists() and not Student.objects.exists()
+
+
+def flush():
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            for table in TABLES:
+                cursor.execute(f"DELETE FROM uniquip.{table}")
+            cursor.execute("DELETE FROM uniquip.IdSequences WHERE Name = %s", ['reservations'])
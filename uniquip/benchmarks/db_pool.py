@@ -0,0 +1,38 @@
+from django.db import connection
+
+from uniquip.benchmarks import scenario, timed
+from uniquip.db.backends.mysql_pooled.pool import pool_stats
+
+
+@scenario('db_connections')
+def db_connections(repeat, query='SELECT 1'):
+    """
+    Per-request connection overhead: a fresh mysqlclient connection per
+    request (what the stock backend does with CONN_MAX_AGE=0) against
+    closing and reopening the pooled backend's connection, each running one
+    query.
+    """
+    def fresh():
+        raw = connection.Database.connect(**connection.get_connection_params())
+        try:
+            cursor = raw.cursor()
+            cursor.execute(query)
+            cursor.fetchall()
+        finally:
+            raw.close()
+
+    def pooled():
+        # close() at the end of a request hands the connection back; the next cursor() borrows it again.
+        connection.close()
+        with connection.cursor() as cursor:
+            cursor.execute(query)
+            cursor.fetchall()
+
+    fresh_stats, _ = timed(fresh, repeat)
+    pooled_stats, _ = timed(pooled, repeat)
+    return {
+        'engine': connection.settings_dict['ENGINE'],
+        'fresh_connection': fresh_stats,
+        'pooled_connection': pooled_stats,
+        'pool': pool_stats().get(connection.alias),
+    }
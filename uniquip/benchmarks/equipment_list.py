@@ -0,0 +1,36 @@
+from rest_framework.test import APIRequestFactory
+
+from uniquip.benchmarks import scenario, timed
+from uniquip.views import EquipmentListView
+
+
+def _get(params):
+    request = APIRequestFactory().get('/api/equipments-list/', params)
+    return EquipmentListView.as_view()(request).data
+
+
+@scenario('equipment_list_pages')
+def equipment_list_pages(repeat, net_id='', page_size=10, depths='1,10,100,1000'):
+    """Latency of one page at increasing depth, by page number (OFFSET) and by cursor."""
+    page_size = int(page_size)
+    depths = [int(depth) for depth in depths.split(',')]
+    results = {}
+    cursor = None
+    page = 0
+    for depth in depths:
+        while page < depth - 1:
+            params = {'net_id': net_id, 'page_size': page_size, 'count': 'none'}
+            if cursor:
+                params['cursor'] = cursor
+            cursor = _get(params)['next_cursor']
+            page += 1
+            if cursor is None:
+                return results
+        offset_stats, _ = timed(lambda: _get({'net_id': net_id, 'page_size': page_size, 'page': depth,
+                                              'count': 'none'}), repeat)
+        cursor_params = {'net_id': net_id, 'page_size': page_size, 'count': 'none'}
+        if cursor:
+            cursor_params['cursor'] = cursor
+        cursor_stats, _ = timed(lambda: _get(cursor_params), repeat)
+        results[f'page_{depth}'] = {'offset': offset_stats, 'cursor': cursor_stats}
+    return results
@@ -0,0 +1,37 @@
+import random
+
+from uniquip.benchmarks import scenario, timed
+from uniquip.utils.search import EquipmentSearchIndex
+
+WORDS = ['microscope', 'oscilloscope', 'centrifuge', 'spectrometer', 'soldering', 'station', 'laser', 'cutter',
+         'printer', '3d', 'multimeter', 'pipette', 'incubator', 'thermal', 'camera', 'robot', 'arm', 'drone',
+         'analyzer', 'fume', 'hood', 'bench', 'power', 'supply', 'signal', 'generator', 'fpga', 'board']
+CATEGORIES = ['Optics', 'Electronics', 'Biology', 'Chemistry', 'Fabrication', 'Robotics', 'Imaging']
+
+
+def synthetic_catalog(size, seed=7):
+    rng = random.Random(seed)
+    return [
+        (equipment_id, " ".join(rng.sample(WORDS, 3)) + f" {rng.randint(1, 999)}", rng.choice(CATEGORIES))
+        for equipment_id in range(1, size + 1)
+    ]
+
+
+@scenario('equipment_search')
+def equipment_search(repeat, size=100000):
+    """Search latency over a synthetic catalog: trigram index against a LIKE-style linear scan."""
+    catalog = synthetic_catalog(int(size))
+    index = EquipmentSearchIndex(ttl=float('inf'))
+    build_stats, _ = timed(lambda: index.build(catalog), 1)
+    lowered = [(equipment_id, name.lower()) for equipment_id, name, _ in catalog]
+
+    results = {'catalog_size': len(catalog), 'build': build_stats, 'index': index.stats()}
+    for label, term in [('prefix', 'oscil'), ('substring', 'scope sol'), ('short', 'ar'), ('rare', 'fpga board 42')]:
+        scan_stats, expected = timed(lambda: {i for i, name in lowered if term in name}, repeat)
+        index_stats, found = timed(lambda: index.substring_ids(term), repeat)
+        results[label] = {'term': term, 'matches': len(found), 'same_as_scan': found == expected,
+                          'linear_scan': scan_stats, 'trigram_index': index_stats}
+    fuzzy_stats, ranked = timed(lambda: index.search('microscpoe', limit=20), repeat)
+    results['fuzzy'] = {'term': 'microscpoe', 'top_score': ranked[0][1] if ranked else None,
+                        'trigram_index': fuzzy_stats}
+    return results
@@ -0,0 +1,271 @@
+import contextvars
+import json
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from io import BytesIO
+from urllib.parse import urlencode
+from wsgiref.util import setup_testing_defaults
+
+from django.core.wsgi import get_wsgi_application
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.urls import URLPattern, URLResolver, get_resolver, resolve
+
+from uniquip.benchmarks import summarize
+from uniquip.models import Equipment, PendingApproval, Reservation
+from uniquip.utils.occupancy import PENDING_STATUS
+
+
+class Fixture:
+    """Ids and dates from the loaded data set that the request templates fill in."""
+
+    def __init__(self):
+        with connection.cursor() as cursor:
+            # A student enrolled in a course with a lab, so the student-scoped routes have rows to return.
+            cursor.execute("""
+                SELECT En.NetId, CL.CRN, CL.LabId, Co.FacultyId
+                FROM uniquip.Enrollments En
+                JOIN uniquip.CourseLab CL ON CL.CRN = En.CRN
+                JOIN uniquip.Courses Co ON Co.CRN = CL.CRN
+                ORDER BY En.NetId, CL.CRN, CL.LabId
+                LIMIT 1
+            """)
+            enrolled = cursor.fetchone()
+        first = Reservation.objects.order_by('StartTime').values_list('StartTime', flat=True).first()
+        last = Reservation.objects.order_by('-StartTime').values_list('StartTime', flat=True).first()
+        if enrolled is None or first is None:
+            raise ValueError("No data to drive; load some with the generate_data command first")
+        self.net_id, self.crn, self.lab_id, faculty_id = enrolled
+        queued = PendingApproval.objects.order_by('Faculty', 'Reservation').values_list('Faculty', flat=True).first()
+        self.faculty_id = queued or faculty_id
+        self.equipment_ids = list(Equipment.objects.filter(Lab_id=self.lab_id, IsReservable=True)
+                                  .order_by('EquipmentId').values_list('EquipmentId', flat=True))
+        self.equipment_id = self.equipment_ids[0] if self.equipment_ids else (
+            Equipment.objects.order_by('EquipmentId').values_list('EquipmentId', flat=True).first())
+        self.reservation_id = Reservation.objects.order_by('ReservationId').values_list(
+            'ReservationId', flat=True).first()
+        self.category = Equipment.objects.get(EquipmentId=self.equipment_id).Category
+        self.first_day = first.date()
+        self.last_day = last.date()
+        self.writes = None
+
+    def for_writes(self, count):
+        """Reserve distinct targets for ``count`` requests per write route; they are used up by the run."""
+        pending = list(Reservation.objects.filter(Status=PENDING_STATUS).order_by('ReservationId')
+                       .values_list('ReservationId', flat=True)[:count * 2])
+        deletable = list(Reservation.objects.exclude(Status=PENDING_STATUS).order_by('-ReservationId')
+                         .values_list('ReservationId', flat=True)[:count])
+        toggled = list(Equipment.objects.exclude(Lab_id=self.lab_id).order_by('-EquipmentId')
+                       .values_list('EquipmentId', flat=True)[:count])
+        self.writes = {'approve': pending[:count], 'bulk_reject': pending[count:], 'delete': deletable,
+                       'toggle': toggled}
+
+    def write_target(self, kind, i):
+        targets = self.writes[kind]
+        return targets[i] if i < len(targets) else 0
+
+    def future_day(self, i, spacing=1):
+        """A day after the data set, so created bookings neither conflict with it nor with each other."""
+        return (self.last_day + timedelta(days=1 + i * spacing)).isoformat()
+
+
+def _day(fixture, offset=0):
+    return (fixture.first_day + timedelta(days=offset)).isoformat()
+
+
+# (method, path, query, body) builders per request number ``i``; writes are only run on request.
+READS = [
+    lambda f, i: ('GET', '/api/', {}, None),
+    lambda f, i: ('GET', '/api/equipment-availability/',
+                  {'equipment_id': f.equipment_id, 'start_time': _day(f), 'end_time': _day(f, 7)}, None),
+    lambda f, i: ('GET', '/api/equipment-availability/batch/',
+                  {'LabId': f.lab_id, 'start_date': _day(f), 'end_date': _day(f, 7)}, None),
+    lambda f, i: ('GET', f'/api/labs/{f.lab_id}/heatmap/', {'start_date': _day(f), 'end_date': _day(f, 6)}, None),
+    lambda f, i: ('GET', '/api/equipments-list/', {'net_id': f.net_id, 'page_size': 10}, None),
+    lambda f, i: ('GET', '/api/equipments/search/', {'q': f.category[:5]}, None),
+    lambda f, i: ('GET', '/api/equipments/filter-value', {'net_id': f.net_id}, None),
+    lambda f, i: ('GET', f'/api/reservations/faculty/{f.faculty_id}/', {'limit': 50}, None),
+    lambda f, i: ('GET', '/api/reservations/export/', {'equipment_id': f.equipment_id}, None),
+    lambda f, i: ('GET', f'/api/equipments/faculty/{f.faculty_id}/', {}, None),
+    lambda f, i: ('GET', '/api/equipment-usage-report/', {'start_date': _day(f), 'end_date': _day(f, 30)}, None),
+    lambda f, i: ('GET', '/api/courseload/', {'start_threshold': _day(f), 'end_threshold': f.last_day.isoformat()},
+                  None),
+    lambda f, i: ('GET', '/api/cache/stats/', {}, None),
+    lambda f, i: ('GET', '/api/db/pool-stats/', {}, None),
+    lambda f, i: ('GET', '/api/async/equipment-availability/',
+                  {'equipment_id': f.equipment_id, 'start_time': _day(f), 'end_time': _day(f, 7)}, None),
+    lambda f, i: ('GET', '/api/async/equipments-list/', {'net_id': f.net_id, 'page_size': 10}, None),
+    lambda f, i: ('GET', f'/api/async/equipments/faculty/{f.faculty_id}/', {}, None),
+    lambda f, i: ('GET', f'/api/async/reservations/faculty/{f.faculty_id}/', {'limit': 50}, None),
+    lambda f, i: ('GET', '/api/equipments/', {'page_size': 20}, None),
+    lambda f, i: ('GET', f'/api/equipments/{f.equipment_id}/', {}, None),
+    lambda f, i: ('GET', f'/api/equipments/{f.equipment_id}/details/', {}, None),
+    lambda f, i: ('GET', '/api/reservations/', {'page_size': 100}, None),
+    lambda f, i: ('GET', f'/api/reservations/{f.reservation_id}/', {}, None),
+]
+
+WRITES = [
+    lambda f, i: ('POST', '/api/reservations/create/', {},
+                  {'NetId': f.net_id, 'EquipmentId': f.equipment_id, 'Day': f.future_day(i), 'TimeSlots': ['10:00:00']}),
+    lambda f, i: ('POST', '/api/reservations/bulk-create/', {},
+                  {'NetId': f.net_id, 'Reservations': [
+                      {'EquipmentId': f.equipment_id, 'Day': f.future_day(i), 'TimeSlots': ['12:00:00', '13:00:00']}]}),
+    lambda f, i: ('POST', '/api/reservations/recurring/', {},
+                  {'NetId': f.net_id, 'CRN': f.crn, 'EquipmentId': f.equipment_id, 'Frequency': 'weekly',
+                   'StartDate': f.future_day(i, spacing=7), 'UntilDate': f.future_day(i + 1, spacing=7),
+                   'TimeSlots': ['15:00:00']}),
+    lambda f, i: ('DELETE', f"/api/reservations/delete/{f.write_target('delete', i)}/", {}, None),
+    lambda f, i: ('PATCH', '/api/reservations/approve/bulk/', {},
+                  {'Action': 'reject', 'ReservationIds': [f.write_target('bulk_reject', i)]}),
+    lambda f, i: ('PATCH', f"/api/reservations/approve/{f.write_target('approve', i)}/", {}, None),
+    lambda f, i: ('PATCH', f'/api/equipment/update/{f.equipment_id}/', {}, {'ApprovalRequired': i % 2 == 0}),
+    lambda f, i: ('PATCH', f"/api/equipment/toggle-reservability/{f.write_target('toggle', i)}/", {}, None),
+]
+
+
+def url_routes(patterns=None, prefix=''):
+    """Every route string in the URLconf, as Django reports it in ResolverMatch.route (admin excluded)."""
+    routes = []
+    for pattern in get_resolver().url_patterns if patterns is None else patterns:
+        route = URLResolver._join_route(prefix, str(pattern.pattern))
+        if route.startswith('admin/') or 'format>' in route:
+            continue
+        if isinstance(pattern, URLResolver):
+            routes.extend(url_routes(pattern.url_patterns, route))
+        elif isinstance(pattern, URLPattern):
+            routes.append(route)
+    return routes
+
+
+# Queries of the request being driven, counted on whatever thread runs them: async views hand their
+# database work to uniquip.utils.db_executor, which carries the request's context along.
+_queries = contextvars.ContextVar('loadtest_queries', default=None)
+
+
+def _count_queries(execute, sql, params, many, context):
+    counter = _queries.get()
+    if counter is not None:
+        counter[0] += 1
+    return execute(sql, params, many, context)
+
+
+def _install_counter(sender=None, connection=connection, **kwargs):
+    if _count_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_count_queries)
+
+
+class InProcessClient:
+    """The WSGI application called from worker threads, with per-request query counts."""
+
+    def __init__(self, host):
+        self.application = get_wsgi_application()
+        self.host = host
+        connection_created.connect(_install_counter)
+        _install_counter()
+
+    def __call__(self, method, path, query, body):
+        payload = json.dumps(body).encode() if body is not None else b''
+        environ = {'REQUEST_METHOD': method, 'PATH_INFO': path, 'QUERY_STRING': urlencode(query),
+                   'HTTP_HOST': self.host, 'CONTENT_TYPE': 'application/json', 'CONTENT_LENGTH': str(len(payload)),
+                   'wsgi.input': BytesIO(payload)}
+        setup_testing_defaults(environ)
+        statuses = []
+        counter = [0]
+        token = _queries.set(counter)
+        started = time.perf_counter()
+        try:
+            response = self.application(environ, lambda status, headers, exc_info=None: statuses.append(status))
+            try:
+                for _ in response:
+                    pass
+            finally:
+                if hasattr(response, 'close'):
+                    response.close()
+        finally:
+            _queries.reset(token)
+        return (time.perf_counter() - started) * 1000, int(statuses[0].split()[0]), counter[0]
+
+
+class HttpClient:
+    """A running server at ``base_url``; query counts are not observable from here."""
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+
+    def __call__(self, method, path, query, body):
+        url = self.base_url + path + ('?' + urlencode(query) if query else '')
+        payload = json.dumps(body).encode() if body is not None else None
+        request = urllib.request.Request(url, data=payload, method=method,
+                                         headers={'Content-Type': 'application/json'})
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request) as response:
+                response.read()
+                status_code = response.status
+        except urllib.error.HTTPError as e:
+            e.read()
+            status_code = e.code
+        return (time.perf_counter() - started) * 1000, status_code, None
+
+
+def run(client, fixture, requests=200, concurrency=16, warmup=5, writes=False):
+    """
+    Drive every request template ``requests`` times at ``concurrency``
+    and report, per route: latency percentiles, throughput, status codes
+    and queries per request. Routes in the URLconf that no template
+    reaches are listed under ``uncovered``.
+    """
+    templates = READS + (WRITES if writes else [])
+    if writes:
+        fixture.for_writes(requests + warmup)
+    results = {}
+    covered = set()
+    for template in templates:
+        method, path, _, _ = template(fixture, 0)
+        route = resolve(path).route
+        covered.add(route)
+        key = f"{method} {route}"
+
+        def call(i, template=template):
+            return client(*template(fixture, i))
+
+        for i in range(warmup):
+            call(i)
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            started = time.perf_counter()
+            outcomes = list(pool.map(call, range(warmup, warmup + requests)))
+            elapsed = time.perf_counter() - started
+
+        queries = [count for _, _, count in outcomes if count is not None]
+        statuses = Counter(str(status_code) for _, status_code, _ in outcomes)
+        results[key] = {
+            **summarize([latency_ms for latency_ms, _, _ in outcomes]),
+            'requests_per_second': round(len(outcomes) / elapsed, 1),
+            'statuses': dict(sorted(statuses.items())),
+            'errors': sum(count for status_code, count in statuses.items() if int(status_code) >= 500),
+            'queries_per_request': round(sum(queries) / len(queries), 2) if queries else None,
+            'max_queries': max(queries) if queries else None,
+        }
+    return {'routes': results, 'uncovered': sorted(set(url_routes()) - covered)}
+
+
+def compare(current, baseline, tolerance=0.2):
+    """Per-route p95 and query-count changes against a previous run's results file."""
+    changes = {}
+    for key, now in current['routes'].items():
+        before = baseline.get('routes', {}).get(key)
+        if before is None:
+            continue
+        p95_ratio = round(now['p95_ms'] / before['p95_ms'], 2) if before['p95_ms'] else None
+        query_delta = (now['queries_per_request'] - before['queries_per_request']
+                       if None not in (now['queries_per_request'], before['queries_per_request']) else None)
+        changes[key] = {
+            'p95_ratio': p95_ratio,
+            'queries_per_request_delta': round(query_delta, 2) if query_delta is not None else None,
+            'regressed': bool((p95_ratio and p95_ratio > 1 + tolerance) or (query_delta and query_delta > 0)),
+        }
+    return changes
@@ -0,0 +1,60 @@
+import os
+import random
+import shutil
+import tempfile
+import time
+
+from uniquip.benchmarks import scenario, summarize, timed
+from uniquip.utils import metrics
+from uniquip.utils.sql_trace import QueryStats
+
+ROUTES = ('api/equipments-list/', 'api/equipment-availability/', 'api/courseload/', 'api/labs/<int:lab_id>/heatmap/',
+          'api/reservations/create/', 'api/reservations/faculty/<int:faculty_id>/', 'api/^reservations/$')
+
+
+@scenario('metrics_overhead')
+def metrics_overhead(repeat, requests=20000, processes=8):
+    """
+    What the metrics cost: microseconds per ``observe_request`` (latency and
+    DB-time histograms plus query counters, as the middleware records them
+    for every request) and the time to collect and render a scrape over
+    ``processes`` worker files holding the same series.
+    """
+    requests = int(requests)
+    processes = int(processes)
+    rng = random.Random(0)
+    queries = QueryStats()
+    queries.count = 4
+    queries.db_ms = 3.2
+    samples = [(rng.choice(ROUTES), rng.choice(('GET', 'GET', 'GET', 'POST')), rng.choice((200, 200, 200, 400, 404)),
+                rng.expovariate(1 / 0.04)) for _ in range(1000)]
+
+    directory = tempfile.mkdtemp(prefix='uniquip-metrics-')
+    values = metrics.MetricsFile(os.path.join(directory, f"metrics-{os.getpid()}.db"))
+    previous, metrics._process_values = metrics._process_values, values
+    try:
+        batches = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            for i in range(requests):
+                route, method, status_code, seconds = samples[i % len(samples)]
+                metrics.observe_request(route, method, status_code, seconds, queries)
+            batches.append((time.perf_counter() - started) * 1000)
+
+        # Exited workers' files: the same series, read like any other process's.
+        for pid in range(1, processes):
+            shutil.copy(values.path, os.path.join(directory, f"metrics-{10 ** 7 + pid}.db"))
+        scrape, text = timed(lambda: metrics.render(metrics.collect(directory)), repeat)
+    finally:
+        metrics._process_values = previous
+        values.close()
+        shutil.rmtree(directory)
+
+    observe = summarize(batches)
+    return {
+        'observe_requests': observe,
+        'us_per_request': round(observe['p50_ms'] * 1000 / requests, 2),
+        'scrape': scrape,
+        'scrape_bytes': len(text),
+        'series': sum(line.startswith('uniquip_') for line in text.splitlines()),
+    }
@@ -0,0 +1,45 @@
+import shutil
+import tempfile
+
+from django.test import RequestFactory
+from django.urls import resolve
+
+from uniquip.benchmarks import scenario, timed
+from uniquip.utils.profiling import Profiler
+
+
+@scenario('profiling_overhead')
+def profiling_overhead(repeat, path='/api/equipments-list/'):
+    """
+    One GET of ``path`` called directly, through a Profiler that does not
+    select it (what every unprofiled request pays), and profiled with its
+    dump and sidecar written.
+    """
+    match = resolve(path.split('?', 1)[0])
+    factory = RequestFactory()
+
+    def get_response(request):
+        request.resolver_match = match
+        response = match.func(request, *match.args, **match.kwargs)
+        if hasattr(response, 'render'):
+            response.render()
+        return response
+
+    directory = tempfile.mkdtemp(prefix='uniquip-profiles-')
+    skipping = Profiler(directory=directory, sample_rate=0.0, route_pattern='', token='')
+    profiling = Profiler(directory=directory, route_pattern='.', max_files=repeat + 1)
+    configurations = {
+        'direct': lambda: get_response(factory.get(path)),
+        'not_selected': lambda: skipping(factory.get(path), get_response),
+        'profiled': lambda: profiling(factory.get(path), get_response),
+    }
+    results = {}
+    try:
+        for name, func in configurations.items():
+            func()
+            results[name], _ = timed(func, repeat)
+    finally:
+        shutil.rmtree(directory)
+    for name in ('not_selected', 'profiled'):
+        results[name]['added_ms'] = round(results[name]['p50_ms'] - results['direct']['p50_ms'], 3)
+    return results
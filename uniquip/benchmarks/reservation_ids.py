@@ -0,0 +1,48 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connection
+
+from uniquip.benchmarks import scenario
+from uniquip.utils.id_allocator import HiLoAllocator
+
+
+def _run_threads(threads, per_thread, allocate_one):
+    def worker():
+        try:
+            return [allocate_one() for _ in range(per_thread)]
+        finally:
+            connection.close()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        batches = list(pool.map(lambda _: worker(), range(threads)))
+    elapsed = time.perf_counter() - started
+    ids = [i for batch in batches for i in batch]
+    return {
+        'allocations': len(ids),
+        'duplicates': len(ids) - len(set(ids)),
+        'seconds': round(elapsed, 3),
+        'ids_per_second': round(len(ids) / elapsed, 1),
+    }
+
+
+def _max_plus_one():
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT MAX(ReservationId) FROM uniquip.Reservations")
+        return (cursor.fetchone()[0] or 0) + 1
+
+
+@scenario('reservation_ids')
+def reservation_ids(repeat, threads=32, per_thread=200, block_size=100):
+    """Many booking threads allocating ids at once: hi/lo blocks against SELECT MAX()+1."""
+    threads, per_thread = int(threads), int(per_thread)
+    allocator = HiLoAllocator('benchmark-reservations', 'Reservations', 'ReservationId', int(block_size))
+    try:
+        hilo = _run_threads(threads, per_thread, lambda: allocator.allocate()[0])
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute("DELETE FROM uniquip.IdSequences WHERE Name = %s", [allocator.name])
+    # Without an insert between reads every thread sees the same MAX, which is exactly the collision.
+    max_plus_one = _run_threads(threads, per_thread, _max_plus_one)
+    return {'threads': threads, 'hilo': hilo, 'select_max_plus_one': max_plus_one}
@@ -0,0 +1,56 @@
+import json
+import time
+import uuid
+from datetime import datetime
+
+from botocore.exceptions import ClientError
+
+from uniquip.benchmarks import scenario, summarize
+from uniquip.utils.s3_logger import S3Logger, LogLevel
+
+
+def legacy_log(logger, message, level):
+    """What S3Logger did per message before batching: download the day's object, append, upload."""
+    key = f"logs/{logger.service_name}/{level.name.lower()}/{datetime.utcnow().strftime('%Y-%m-%d')}.jsonl"
+    try:
+        existing = logger.s3_client.get_object(Bucket=logger.bucket_name, Key=key)["Body"].read().decode("utf-8")
+    except ClientError as e:
+        if e.response["Error"]["Code"] != "NoSuchKey":
+            raise
+        existing = ""
+    entry = {"timestamp": datetime.utcnow().isoformat(), "level": level.name, "message": message,
+             "log_id": str(uuid.uuid4())}
+    logger.s3_client.put_object(Bucket=logger.bucket_name, Key=key,
+                                Body=(existing + json.dumps(entry) + "\n").encode("utf-8"))
+
+
+@scenario('s3_logger')
+def s3_logger(repeat, messages=200):
+    """
+    Caller-side latency of one log() call. Point S3_ENDPOINT_URL and
+    S3_BUCKET_NAME at a local S3 stand-in (moto_server, MinIO) before running.
+    """
+    logger = S3Logger()
+    messages = int(messages)
+
+    legacy = []
+    for i in range(messages):
+        started = time.perf_counter()
+        legacy_log(logger, f"benchmark message {i}", LogLevel.INFO)
+        legacy.append((time.perf_counter() - started) * 1000)
+
+    queued = []
+    for i in range(messages * repeat):
+        started = time.perf_counter()
+        logger.log(f"benchmark message {i}", LogLevel.INFO)
+        queued.append((time.perf_counter() - started) * 1000)
+    started = time.perf_counter()
+    logger.flush(timeout=60)
+    drain_ms = (time.perf_counter() - started) * 1000
+
+    return {
+        'legacy_get_put_per_call': summarize(legacy),
+        'queued_log_per_call': summarize(queued),
+        'drain_after_queueing_ms': round(drain_ms, 3),
+        'logger': logger.stats(),
+    }
@@ -0,0 +1,57 @@
+from django.db import connection
+from opentelemetry import trace
+
+from uniquip.benchmarks import scenario, timed
+from uniquip.utils import sql_trace
+
+
+@scenario('sql_trace_overhead')
+def sql_trace_overhead(repeat, query='SELECT 1', queries=200):
+    """
+    Cost of the query tracer: ``queries`` executions of ``query`` bare,
+    with the wrapper counting only, and with a child span per query under a
+    recording request span. Reports per-batch latency and the added
+    microseconds per query.
+    """
+    queries = int(queries)
+    tracer = trace.get_tracer(__name__)
+
+    def run():
+        with connection.cursor() as cursor:
+            for _ in range(queries):
+                cursor.execute(query)
+                cursor.fetchall()
+
+    def without_tracer():
+        wrappers = connection.execute_wrappers
+        connection.execute_wrappers = [w for w in wrappers if w is not sql_trace.query_tracer]
+        try:
+            run()
+        finally:
+            connection.execute_wrappers = wrappers
+
+    def counting():
+        stats, token = sql_trace.begin_request()
+        try:
+            with connection.execute_wrapper(sql_trace.QueryTracer(spans=False)):
+                without_tracer()
+        finally:
+            sql_trace.end_request(token)
+
+    def with_spans():
+        stats, token = sql_trace.begin_request()
+        try:
+            with tracer.start_as_current_span('benchmark'):
+                with connection.execute_wrapper(sql_trace.QueryTracer(spans=True)):
+                    without_tracer()
+        finally:
+            sql_trace.end_request(token)
+
+    results = {}
+    for name, func in (('bare', without_tracer), ('counting', counting), ('spans', with_spans)):
+        func()
+        results[name], _ = timed(func, repeat)
+    for name in ('counting', 'spans'):
+        added_ms = results[name]['p50_ms'] - results['bare']['p50_ms']
+        results[name]['added_us_per_query'] = round(added_ms * 1000 / queries, 2)
+    return results
@@ -0,0 +1,69 @@
+import multiprocessing
+import resource
+import time
+
+from django.db import connection
+from django.urls import resolve
+from rest_framework.test import APIRequestFactory
+
+from uniquip.benchmarks import scenario, summarize
+
+
+def _serve(path, params):
+    """Run the view for ``path`` and drain its body the way a WSGI server would; returns bytes sent."""
+    request = APIRequestFactory().get(path, params)
+    match = resolve(path)
+    response = match.func(request, *match.args, **match.kwargs)
+    if getattr(response, 'streaming', False):
+        sent = 0
+        for chunk in response.streaming_content:
+            sent += len(chunk)
+        response.close()
+        return response.status_code, sent
+    if hasattr(response, 'render'):
+        response.render()
+    return response.status_code, len(response.content)
+
+
+def _measure(path, params, pipe):
+    # ru_maxrss is a high-water mark for the whole process, so each run gets a fresh fork.
+    connection.close()
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+    status_code, sent = _serve(path, params)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    pipe.send({'status': status_code, 'bytes': sent, 'ms': elapsed_ms, 'peak_rss_growth_kb': peak - baseline})
+    pipe.close()
+
+
+@scenario('streaming_memory')
+def streaming_memory(repeat, path='/api/courseload/', query=''):
+    """
+    Peak RSS growth and latency of one request, buffered and with
+    ?stream=1, each measured in a freshly forked process. ``query`` is a
+    URL-encoded query string, e.g. 'start_date=2024-01-01&end_date=2024-12-31'.
+    Compare runs over growing result sets: the streamed column should stay flat.
+    """
+    base = dict(item.split('=', 1) for item in query.split('&') if item)
+    context = multiprocessing.get_context('fork')
+    # Warm up imports and URL resolution in the parent so children only measure the request itself.
+    _serve(path, base)
+    connection.close()
+    results = {}
+    for mode, params in (('buffered', base), ('streamed', {**base, 'stream': '1'})):
+        runs = []
+        for _ in range(repeat):
+            receiver, sender = context.Pipe(duplex=False)
+            process = context.Process(target=_measure, args=(path, params, sender))
+            process.start()
+            runs.append(receiver.recv())
+            process.join()
+        results[mode] = {
+            'status': runs[-1]['status'],
+            'bytes': runs[-1]['bytes'],
+            'latency': summarize([run['ms'] for run in runs]),
+            'peak_rss_growth_kb_max': max(run['peak_rss_growth_kb'] for run in runs),
+            'peak_rss_growth_kb_median': sorted(run['peak_rss_growth_kb'] for run in runs)[len(runs) // 2],
+        }
+    return results
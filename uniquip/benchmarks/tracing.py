@@ -0,0 +1,79 @@
+import os
+import tempfile
+import time
+
+from opentelemetry import trace
+from opentelemetry.sdk.trace.export import ConsoleSpanExporter
+from opentelemetry.trace import SpanKind
+
+from uniquip.benchmarks import scenario, summarize
+from uniquip.utils.tracing import NdjsonFileSpanExporter, build_provider
+
+
+def _request(tracer, queries):
+    """The spans one request produces: the server span and a CLIENT span per query."""
+    with tracer.start_as_current_span('GET api/reservations/', kind=SpanKind.SERVER) as span:
+        span.set_attribute('http.method', 'GET')
+        span.set_attribute('http.url', 'http://localhost/api/reservations/?page_size=100')
+        span.set_attribute('http.route', 'api/reservations/')
+        for _ in range(queries):
+            with tracer.start_as_current_span('SELECT', kind=SpanKind.CLIENT) as query_span:
+                query_span.set_attribute('db.system', 'mysql')
+                query_span.set_attribute('db.statement', 'SELECT ReservationId, EquipmentId FROM uniquip.Reservations '
+                                                         'WHERE EquipmentId IN (...) AND StartTime < ?')
+                query_span.set_attribute('db.rows', 100)
+        span.set_attribute('http.status_code', 200)
+        span.set_attribute('db.query_count', queries)
+
+
+@scenario('tracing_overhead')
+def tracing_overhead(repeat, requests=2000, queries=5):
+    """
+    Per-request tracing cost of the old setup (every span batched to
+    ConsoleSpanExporter, written here to /dev/null) against the NDJSON file
+    exporter with and without tail sampling and with 10% head sampling.
+    ``latency`` is what the request thread pays; ``cpu_us_per_request`` is the
+    process CPU per request including the export thread, measured to a
+    final flush.
+    """
+    requests = int(requests)
+    queries = int(queries)
+    directory = tempfile.mkdtemp(prefix='uniquip-traces-')
+    devnull = open(os.devnull, 'w')
+    configurations = {
+        'disabled': lambda: None,
+        'console_all': lambda: build_provider(ConsoleSpanExporter(out=devnull), head_ratio=1.0, keep_ratio=1.0),
+        'ndjson_all': lambda: build_provider(NdjsonFileSpanExporter(directory), head_ratio=1.0, keep_ratio=1.0),
+        'ndjson_tail_10pct': lambda: build_provider(NdjsonFileSpanExporter(directory), head_ratio=1.0,
+                                                    keep_ratio=0.1),
+        'head_10pct_tail_10pct': lambda: build_provider(NdjsonFileSpanExporter(directory), head_ratio=0.1,
+                                                        keep_ratio=0.1),
+    }
+    results = {}
+    try:
+        for name, make_provider in configurations.items():
+            latencies = []
+            cpu_us = []
+            for _ in range(repeat):
+                provider = make_provider()
+                tracer = provider.get_tracer(__name__) if provider else trace.NoOpTracer()
+                cpu_started = time.process_time()
+                for _ in range(requests):
+                    started = time.perf_counter()
+                    _request(tracer, queries)
+                    latencies.append((time.perf_counter() - started) * 1000)
+                if provider:
+                    provider.force_flush()
+                cpu_us.append((time.process_time() - cpu_started) * 1e6 / requests)
+                if provider:
+                    provider.shutdown()
+            results[name] = {
+                'latency': summarize(latencies),
+                'cpu_us_per_request': round(sum(cpu_us) / len(cpu_us), 1),
+            }
+    finally:
+        devnull.close()
+        for name in os.listdir(directory):
+            os.remove(os.path.join(directory, name))
+        os.rmdir(directory)
+    return results
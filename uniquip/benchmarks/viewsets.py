@@ -0,0 +1,64 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import viewsets
+from rest_framework.test import APIRequestFactory
+
+from uniquip.benchmarks import scenario, timed
+from uniquip.models import Equipment, Reservation
+from uniquip.views import EquipmentViewSet, ReservationViewSet
+
+# One COUNT(*) for the paginator plus the page itself, whatever the page size.
+QUERY_BUDGET = 2
+
+
+class _StockEquipmentViewSet(viewsets.ModelViewSet):
+    queryset = Equipment.objects.all()
+    serializer_class = EquipmentViewSet.serializer_class
+    pagination_class = EquipmentViewSet.pagination_class
+
+
+class _StockReservationViewSet(viewsets.ModelViewSet):
+    queryset = Reservation.objects.all().select_related('Equipment').order_by('-ReservationId')
+    serializer_class = ReservationViewSet.serializer_class
+    pagination_class = ReservationViewSet.pagination_class
+    filter_backends = ReservationViewSet.filter_backends
+    filterset_class = ReservationViewSet.filterset_class
+
+
+def _page(viewset, path, page_size):
+    view = viewset.as_view({'get': 'list'})
+    request = APIRequestFactory().get(path, {'page_size': page_size})
+
+    def render():
+        response = view(request)
+        response.render()
+        return response.content
+
+    with CaptureQueriesContext(connection) as queries:
+        content = render()
+    return render, len(queries.captured_queries), content
+
+
+@scenario('viewset_pages')
+def viewset_pages(repeat, page_size=100):
+    """
+    One list page of /api/reservations/ and /api/equipments/ rendered the
+    old way (ModelSerializer, Lab fetched per row) and through the compiled
+    read path. Reports queries per page, whether the compiled path stays
+    within QUERY_BUDGET and produces the same body, and render time.
+    """
+    results = {}
+    for name, stock, compiled, path in (
+            ('reservations', _StockReservationViewSet, ReservationViewSet, '/api/reservations/'),
+            ('equipments', _StockEquipmentViewSet, EquipmentViewSet, '/api/equipments/')):
+        stock_render, stock_queries, stock_content = _page(stock, path, page_size)
+        compiled_render, compiled_queries, compiled_content = _page(compiled, path, page_size)
+        stock_stats, _ = timed(stock_render, repeat)
+        compiled_stats, _ = timed(compiled_render, repeat)
+        results[name] = {
+            'stock': {'queries_per_page': stock_queries, **stock_stats},
+            'compiled': {'queries_per_page': compiled_queries, **compiled_stats},
+            'within_query_budget': compiled_queries <= QUERY_BUDGET,
+            'identical_output': stock_content == compiled_content,
+        }
+    return results
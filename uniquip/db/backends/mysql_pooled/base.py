@@ -0,0 +1,66 @@
+from django.db.backends.mysql.base import Database
+from django.utils.asyncio import async_unsafe
+from django.db.backends.mysql.base import DatabaseWrapper as MySQLDatabaseWrapper
+
+from .pool import ConnectionPool, PoolExhausted, _pools, _pools_lock
+
+
+class DatabaseWrapper(MySQLDatabaseWrapper):
+    """
+    The MySQL backend with connections borrowed from a per-process pool.
+
+    Django still opens and closes "its" connection per request (keep
+    CONN_MAX_AGE at 0); closing returns the raw connection to the pool after
+    rolling back anything left open, and connecting borrows one. Django
+    re-applies autocommit and the session settings on every checkout, so no
+    transaction state leaks between requests. Pool limits come from the
+    database's POOL settings: MAX_SIZE, MIN_IDLE, TIMEOUT, MAX_LIFETIME,
+    MAX_IDLE and PING_INTERVAL (seconds).
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._pooled = None
+
+    @property
+    def pool(self):
+        pool = _pools.get(self.alias)
+        if pool is None:
+            with _pools_lock:
+                pool = _pools.get(self.alias)
+                if pool is None:
+                    options = self.settings_dict.get('POOL', {})
+                    pool = _pools[self.alias] = ConnectionPool(
+                        self._connect_raw,
+                        max_size=int(options.get('MAX_SIZE', 10)),
+                        min_idle=int(options.get('MIN_IDLE', 0)),
+                        timeout=float(options.get('TIMEOUT', 5)),
+                        max_lifetime=float(options.get('MAX_LIFETIME', 1800)),
+                        max_idle=float(options.get('MAX_IDLE', 300)),
+                        ping_interval=float(options.get('PING_INTERVAL', 30)),
+                    )
+        return pool
+
+    def _connect_raw(self):
+        return super().get_new_connection(self.get_connection_params())
+
+    @async_unsafe
+    def get_new_connection(self, conn_params):
+        try:
+            self._pooled = self.pool.acquire()
+        except PoolExhausted as e:
+            raise Database.OperationalError(str(e)) from e
+        return self._pooled.raw
+
+    def _close(self):
+        pooled, self._pooled = self._pooled, None
+        if self.connection is None or pooled is None or pooled.raw is not self.connection:
+            return super()._close()
+        # A connection closed inside atomic() stays referenced by this wrapper, so it cannot be shared.
+        reusable = not self.in_atomic_block
+        if reusable:
+            try:
+                self.connection.rollback()
+            except Exception:
+                reusable = False
+        self.pool.release(pooled, reusable=reusable)
@@ -0,0 +1,187 @@
+import os
+import threading
+import time
+from collections import deque
+
+
+# One pool per database alias and process, shared by the per-thread DatabaseWrappers.
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def pool_stats():
+    return {alias: pool.stats() for alias, pool in list(_pools.items())}
+
+
+class PoolExhausted(Exception):
+    pass
+
+
+class PooledConnection:
+    __slots__ = ('raw', 'created_at', 'released_at')
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.created_at = time.monotonic()
+        self.released_at = self.created_at
+
+
+class ConnectionPool:
+    """
+    Process-wide pool of raw DB-API connections for one database alias.
+
+    At most ``max_size`` connections exist at once; a checkout beyond that
+    waits up to ``timeout`` seconds for a release. Connections older than
+    ``max_lifetime`` are closed instead of reused, and one that sat idle
+    longer than ``ping_interval`` is pinged before it is handed out.
+    Idle connections beyond ``min_idle`` are closed after ``max_idle``.
+    """
+
+    def __init__(self, connect, max_size=10, min_idle=0, timeout=5.0, max_lifetime=1800.0,
+                 max_idle=300.0, ping_interval=30.0):
+        self.connect = connect
+        self.max_size = max_size
+        self.min_idle = min_idle
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.max_idle = max_idle
+        self.ping_interval = ping_interval
+        self.idle = deque()
+        self.in_use = 0
+        self.lock = threading.Lock()
+        self.available = threading.Condition(self.lock)
+        self.pid = os.getpid()
+
+        self.checkouts = 0
+        self.created = 0
+        self.discarded = 0
+        self.failed_pings = 0
+        self.timeouts = 0
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def acquire(self):
+        started = time.monotonic()
+        waited = False
+        with self.available:
+            self._check_fork()
+            while True:
+                self._expire_idle()
+                if self.idle:
+                    pooled = self.idle.pop()
+                    self.in_use += 1
+                    break
+                if self.in_use < self.max_size:
+                    pooled = None
+                    self.in_use += 1
+                    break
+                remaining = self.timeout - (time.monotonic() - started)
+                if remaining <= 0:
+                    self.timeouts += 1
+                    raise PoolExhausted(f"No database connection available within {self.timeout}s "
+                                        f"({self.max_size} in use)")
+                waited = True
+                self.available.wait(remaining)
+            self.checkouts += 1
+            if waited:
+                wait = time.monotonic() - started
+                self.waits += 1
+                self.wait_seconds += wait
+                self.max_wait_seconds = max(self.max_wait_seconds, wait)
+
+        # Connecting and pinging happen outside the lock.
+        try:
+            if pooled is not None and not self._healthy(pooled):
+                self._close_raw(pooled)
+                pooled = None
+            if pooled is None:
+                pooled = PooledConnection(self.connect())
+                with self.lock:
+                    self.created += 1
+        except BaseException:
+            with self.available:
+                self.in_use -= 1
+                self.available.notify()
+            raise
+        return pooled
+
+    def release(self, pooled, reusable=True):
+        if reusable and time.monotonic() - pooled.created_at >= self.max_lifetime:
+            reusable = False
+        if not reusable:
+            self._close_raw(pooled)
+        with self.available:
+            if os.getpid() != self.pid:
+                return
+            self.in_use -= 1
+            if reusable:
+                pooled.released_at = time.monotonic()
+                self.idle.append(pooled)
+            self.available.notify()
+
+    def _healthy(self, pooled):
+        now = time.monotonic()
+        if now - pooled.created_at >= self.max_lifetime:
+            return False
+        if now - pooled.released_at >= self.ping_interval:
+            try:
+                pooled.raw.ping()
+            except Exception:
+                with self.lock:
+                    self.failed_pings += 1
+                return False
+        return True
+
+    def _expire_idle(self):
+        now = time.monotonic()
+        keep = deque()
+        while self.idle:
+            pooled = self.idle.popleft()
+            if len(keep) + len(self.idle) >= self.min_idle and (
+                    now - pooled.released_at >= self.max_idle or now - pooled.created_at >= self.max_lifetime):
+                self._close_raw(pooled, locked=True)
+            else:
+                keep.append(pooled)
+        self.idle = keep
+
+    def _check_fork(self):
+        # Connections inherited from a parent process must not be shared with it.
+        if os.getpid() != self.pid:
+            self.pid = os.getpid()
+            self.idle = deque()
+            self.in_use = 0
+
+    def _close_raw(self, pooled, locked=False):
+        try:
+            pooled.raw.close()
+        except Exception:
+            pass
+        if locked:
+            self.discarded += 1
+        else:
+            with self.lock:
+                self.discarded += 1
+
+    def close_all(self):
+        with self.available:
+            while self.idle:
+                self._close_raw(self.idle.popleft(), locked=True)
+
+    def stats(self):
+        with self.lock:
+            return {
+                'max_size': self.max_size,
+                'in_use': self.in_use,
+                'idle': len(self.idle),
+                'utilization': round(self.in_use / self.max_size, 4),
+                'checkouts': self.checkouts,
+                'created': self.created,
+                'discarded': self.discarded,
+                'failed_pings': self.failed_pings,
+                'timeouts': self.timeouts,
+                'waits': self.waits,
+                'wait_ms_total': round(self.wait_seconds * 1000, 3),
+                'wait_ms_max': round(self.max_wait_seconds * 1000, 3),
+                'wait_ms_mean': round(self.wait_seconds * 1000 / self.waits, 3) if self.waits else 0.0,
+            }
@@ -0,0 +1,73 @@
+-- The original tables, for a new database; existing ones are left as they are.
+-- Column names follow the raw SQL in the app, which is what the live schema uses.
+
+CREATE TABLE IF NOT EXISTS uniquip.Students (
+    NetId VARCHAR(50) NOT NULL PRIMARY KEY,
+    Name VARCHAR(100) NOT NULL,
+    Email VARCHAR(100) NOT NULL,
+    PhoneNumber VARCHAR(20) NOT NULL
+) ENGINE=InnoDB;
+
+CREATE TABLE IF NOT EXISTS uniquip.Faculty (
+    FacultyId INT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    Name VARCHAR(100) NOT NULL,
+    Email VARCHAR(100) NOT NULL
+) ENGINE=InnoDB;
+
+CREATE TABLE IF NOT EXISTS uniquip.Courses (
+    CRN INT NOT NULL PRIMARY KEY,
+    CourseCode VARCHAR(30) NOT NULL,
+    CourseName VARCHAR(255) NOT NULL,
+    Credits INT NOT NULL,
+    FacultyId INT NOT NULL,
+    FOREIGN KEY (FacultyId) REFERENCES uniquip.Faculty (FacultyId) ON DELETE CASCADE
+) ENGINE=InnoDB;
+
+CREATE TABLE IF NOT EXISTS uniquip.Enrollments (
+    NetId VARCHAR(50) NOT NULL,
+    CRN INT NOT NULL,
+    Semester VARCHAR(10) NOT NULL,
+    EnrolledAt DATETIME NOT NULL,
+    PRIMARY KEY (NetId, CRN),
+    KEY enrollments_crn (CRN),
+    FOREIGN KEY (NetId) REFERENCES uniquip.Students (NetId) ON DELETE CASCADE,
+    FOREIGN KEY (CRN) REFERENCES uniquip.Courses (CRN) ON DELETE CASCADE
+) ENGINE=InnoDB;
+
+CREATE TABLE IF NOT EXISTS uniquip.Labs (
+    LabId INT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    LabName VARCHAR(100) NOT NULL,
+    LabLocation VARCHAR(255) NOT NULL,
+    OpenHours TIME NOT NULL,
+    CloseHours TIME NOT NULL
+) ENGINE=InnoDB;
+
+CREATE TABLE IF NOT EXISTS uniquip.CourseLab (
+    CRN INT NOT NULL,
+    LabId INT NOT NULL,
+    PRIMARY KEY (CRN, LabId),
+    KEY course_lab_lab (LabId),
+    FOREIGN KEY (CRN) REFERENCES uniquip.Courses (CRN) ON DELETE CASCADE,
+    FOREIGN KEY (LabId) REFERENCES uniquip.Labs (LabId) ON DELETE CASCADE
+) ENGINE=InnoDB;
+
+CREATE TABLE IF NOT EXISTS uniquip.Equipments (
+    EquipmentId INT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    LabId INT NOT NULL,
+    EquipmentName VARCHAR(200) NOT NULL,
+    Category VARCHAR(255) NOT NULL,
+    IsReservable TINYINT(1) NOT NULL,
+    ApprovalRequired TINYINT(1) NOT NULL,
+    FOREIGN KEY (LabId) REFERENCES uniquip.Labs (LabId) ON DELETE CASCADE
+) ENGINE=InnoDB;
+
+CREATE TABLE IF NOT EXISTS uniquip.Reservations (
+    ReservationId INT NOT NULL PRIMARY KEY,
+    EquipmentId INT NOT NULL,
+    NetId VARCHAR(50) NOT NULL,
+    StartTime DATETIME NOT NULL,
+    EndTime DATETIME NOT NULL,
+    Status VARCHAR(20) NOT NULL,
+    FOREIGN KEY (EquipmentId) REFERENCES uniquip.Equipments (EquipmentId) ON DELETE CASCADE,
+    FOREIGN KEY (NetId) REFERENCES uniquip.Students (NetId) ON DELETE CASCADE
+) ENGINE=InnoDB;
@@ -0,0 +1,2 @@
+-- Range lookups of one equipment's reservations (AvailabilityIndex, conflict checks).
+ALTER TABLE uniquip.Reservations ADD INDEX reservations_equipment_time (EquipmentId, StartTime, EndTime);
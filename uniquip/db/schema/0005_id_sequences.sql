@@ -0,0 +1,5 @@
+-- Blocks of primary keys leased by uniquip.utils.id_allocator.
+CREATE TABLE IF NOT EXISTS uniquip.IdSequences (
+    Name VARCHAR(50) NOT NULL PRIMARY KEY,
+    NextValue BIGINT NOT NULL
+) ENGINE=InnoDB;
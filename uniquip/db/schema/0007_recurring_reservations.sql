@@ -0,0 +1,17 @@
+-- Recurrence rules saved by RecurringReservationView; their occurrences are ordinary Reservations rows.
+CREATE TABLE IF NOT EXISTS uniquip.RecurringReservations (
+    RuleId INT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    CRN INT NOT NULL,
+    EquipmentId INT NOT NULL,
+    NetId VARCHAR(50) NOT NULL,
+    Frequency VARCHAR(10) NOT NULL,
+    Weekdays JSON NOT NULL,
+    StartDate DATE NOT NULL,
+    UntilDate DATE NOT NULL,
+    TimeSlots JSON NOT NULL,
+    ExcludedDates JSON NOT NULL,
+    CreatedAt DATETIME(6) NOT NULL,
+    FOREIGN KEY (CRN) REFERENCES uniquip.Courses (CRN) ON DELETE CASCADE,
+    FOREIGN KEY (EquipmentId) REFERENCES uniquip.Equipments (EquipmentId) ON DELETE CASCADE,
+    FOREIGN KEY (NetId) REFERENCES uniquip.Students (NetId) ON DELETE CASCADE
+) ENGINE=InnoDB;
@@ -0,0 +1,11 @@
+-- One row per (approver, pending reservation), maintained by uniquip.utils.approvals.
+-- On a database that already has pending reservations, fill it with `manage.py rebuild_approval_queue`.
+CREATE TABLE IF NOT EXISTS uniquip.PendingApprovals (
+    id BIGINT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    ReservationId INT NOT NULL,
+    FacultyId INT NOT NULL,
+    QueuedAt DATETIME(6) NOT NULL,
+    UNIQUE KEY pending_faculty_reservation (FacultyId, ReservationId),
+    KEY pending_faculty_queued (FacultyId, QueuedAt),
+    KEY pending_reservation (ReservationId)
+) ENGINE=InnoDB;
@@ -0,0 +1,26 @@
+-- Hourly and daily rollups of Reservations behind the usage report (uniquip.utils.usage).
+-- On a database that already has reservations, fill them with `manage.py rollup_usage --start <first day>`.
+CREATE TABLE IF NOT EXISTS uniquip.EquipmentUsageHourly (
+    id BIGINT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    EquipmentId INT NOT NULL,
+    LabId INT NOT NULL,
+    Day DATE NOT NULL,
+    Hour SMALLINT NOT NULL,
+    Status VARCHAR(20) NOT NULL,
+    Reservations INT NOT NULL,
+    BookedMinutes INT NOT NULL,
+    UNIQUE KEY usage_hourly_key (EquipmentId, Day, Hour, Status),
+    KEY usage_hourly_day_lab (Day, LabId)
+) ENGINE=InnoDB;
+
+CREATE TABLE IF NOT EXISTS uniquip.EquipmentUsageDaily (
+    id BIGINT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    EquipmentId INT NOT NULL,
+    LabId INT NOT NULL,
+    Day DATE NOT NULL,
+    Status VARCHAR(20) NOT NULL,
+    Reservations INT NOT NULL,
+    BookedMinutes INT NOT NULL,
+    UNIQUE KEY usage_daily_key (EquipmentId, Day, Status),
+    KEY usage_daily_day_lab (Day, LabId)
+) ENGINE=InnoDB;
@@ -0,0 +1,11 @@
+-- Booked hours per CRN and day behind CourseLoadView (uniquip.utils.course_load).
+-- On a database that already has reservations, fill it with `manage.py rebuild_course_load`.
+CREATE TABLE IF NOT EXISTS uniquip.CourseLoadDaily (
+    id BIGINT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    CRN INT NOT NULL,
+    Day DATE NOT NULL,
+    UntilDay DATE NOT NULL,
+    HoursBooked INT NOT NULL,
+    UNIQUE KEY course_load_key (CRN, Day, UntilDay),
+    KEY course_load_days (Day, UntilDay)
+) ENGINE=InnoDB;
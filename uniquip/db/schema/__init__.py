@@ -0,0 +1,65 @@
+import os
+from datetime import datetime
+
+from django.db import OperationalError, connection as default_connection
+
+DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+
+# Table exists, duplicate column, duplicate key name: the change is already in the database
+# (for instance an index created by `migrate --run-syncdb` on a fresh database).
+ALREADY_APPLIED_ERRORS = (1050, 1060, 1061)
+
+
+def changes():
+    """``(name, statements)`` for every checked-in ``NNNN_*.sql`` file, in order."""
+    found = []
+    for name in sorted(os.listdir(DIRECTORY)):
+        if not name.endswith('.sql'):
+            continue
+        with open(os.path.join(DIRECTORY, name)) as f:
+            statements = [statement.strip() for statement in f.read().split(';\n') if statement.strip()]
+        found.append((name[:-len('.sql')], [statement.rstrip(';') for statement in statements]))
+    return found
+
+
+def applied(connection=None):
+    connection = connection or default_connection
+    with connection.cursor() as cursor:
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS uniquip.SchemaChanges (
+                Name VARCHAR(100) NOT NULL PRIMARY KEY,
+                AppliedAt DATETIME NOT NULL
+            )
+        """)
+        cursor.execute("SELECT Name FROM uniquip.SchemaChanges")
+        return {row[0] for row in cursor.fetchall()}
+
+
+def pending(connection=None):
+    done = applied(connection)
+    return [(name, statements) for name, statements in changes() if name not in done]
+
+
+def apply(connection=None, log=lambda message: None):
+    """
+    Run every change not yet recorded in SchemaChanges, oldest first, and
+    record it. MySQL commits DDL implicitly, so each statement stands on its
+    own; a statement failing because its table, column or index already
+    exists counts as done. Returns the names applied.
+    """
+    connection = connection or default_connection
+    names = []
+    for name, statements in pending(connection):
+        with connection.cursor() as cursor:
+            for statement in statements:
+                try:
+                    cursor.execute(statement)
+                except OperationalError as e:
+                    if e.args[0] not in ALREADY_APPLIED_ERRORS:
+                        raise
+                    log(f"{name}: already present ({e.args[1]})")
+            cursor.execute("INSERT INTO uniquip.SchemaChanges (Name, AppliedAt) VALUES (%s, %s)",
+                           [name, datetime.utcnow()])
+        log(f"Applied {name}")
+        names.append(name)
+    return names
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from uniquip.db import schema
+
+
+class Command(BaseCommand):
+    help = "Create missing tables and indexes from uniquip/db/schema, applying each change once."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--list', action='store_true', help="Only list the changes still to apply")
+
+    def handle(self, *args, **options):
+        if options['list']:
+            for name, _ in schema.pending():
+                self.stdout.write(name)
+            return
+        applied = schema.apply(log=self.stdout.write)
+        self.stdout.write(f"Applied {len(applied)} schema changes" if applied else "Schema is up to date")
@@ -0,0 +1,49 @@
+import importlib
+import json
+import pkgutil
+
+from django.core.management.base import BaseCommand, CommandError
+
+from uniquip import benchmarks
+
+
+class Command(BaseCommand):
+    help = "Run a registered benchmark scenario and print (or save) its results as JSON."
+
+    def add_arguments(self, parser):
+        parser.add_argument('scenario', nargs='?', help="Scenario name; omit to list scenarios")
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--param', action='append', default=[], metavar='KEY=VALUE',
+                            help="Scenario-specific parameter, may be given several times")
+        parser.add_argument('--output', help="Write results to this JSON file")
+
+    def handle(self, *args, **options):
+        for module in pkgutil.iter_modules(benchmarks.__path__):
+            importlib.import_module(f"{benchmarks.__name__}.{module.name}")
+
+        name = options['scenario']
+        if name is None:
+            for scenario_name in sorted(benchmarks.SCENARIOS):
+                self.stdout.write(scenario_name)
+            return
+        if name not in benchmarks.SCENARIOS:
+            raise CommandError(f"Unknown scenario '{name}', choose from {sorted(benchmarks.SCENARIOS)}")
+
+        params = {}
+        for item in options['param']:
+            key, sep, value = item.partition('=')
+            if not sep:
+                raise CommandError(f"--param expects KEY=VALUE, got '{item}'")
+            params[key] = value
+
+        results = {
+            'scenario': name,
+            'repeat': options['repeat'],
+            'params': params,
+            'results': benchmarks.SCENARIOS[name](repeat=options['repeat'], **params),
+        }
+        payload = json.dumps(results, indent=2, default=str)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(payload + "\n")
+        self.stdout.write(payload)
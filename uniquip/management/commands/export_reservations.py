@@ -0,0 +1,43 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from uniquip.utils import export
+
+
+class Command(BaseCommand):
+    help = "Stream reservations joined with equipment and lab names as NDJSON or CSV, optionally gzipped."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--export-format', choices=sorted(export.FORMATS), default=export.NDJSON)
+        parser.add_argument('--gzip', action='store_true')
+        parser.add_argument('--output', help="File to write, defaults to stdout")
+        parser.add_argument('--chunk-size', type=int, help="Rows per keyset query")
+        parser.add_argument('--start-date', help="StartTime on or after (same as ReservationFilter start_date)")
+        parser.add_argument('--end-date', help="EndTime on or before (same as ReservationFilter end_date)")
+        parser.add_argument('--equipment-id')
+        parser.add_argument('--net-id')
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] is not None and options['chunk_size'] < 1:
+            raise CommandError("--chunk-size must be at least 1")
+        filters = {name: options[name] for name in ('start_date', 'end_date', 'equipment_id', 'net_id')
+                   if options[name] is not None}
+        try:
+            chunks = export.export(filters, options['export_format'], options['gzip'], options['chunk_size'])
+        except export.ExportError as e:
+            raise CommandError(str(e))
+
+        output = open(options['output'], 'wb') if options['output'] else sys.stdout.buffer
+        written = 0
+        try:
+            for chunk in chunks:
+                output.write(chunk)
+                written += len(chunk)
+        finally:
+            if options['output']:
+                output.close()
+            else:
+                output.flush()
+        if options['output']:
+            self.stdout.write(f"Wrote {written} bytes to {options['output']}")
@@ -0,0 +1,61 @@
+import json
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from uniquip.benchmarks import data
+from uniquip.utils import approvals, course_load, usage
+
+OVERRIDES = ('students', 'faculty', 'courses', 'labs', 'equipment_per_lab', 'courses_per_student', 'reservations',
+             'days')
+
+
+class Command(BaseCommand):
+    help = ("Bulk-load a deterministic synthetic data set (students, faculty, courses, enrollments, labs, equipment "
+            "and reservations) for benchmarks and load tests.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', choices=sorted(data.SCALES), default='small')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--first-day', default='2024-01-01', help="First day reservations may fall on")
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--flush', action='store_true', help="Empty the generated tables first")
+        parser.add_argument('--skip-derived', action='store_true',
+                            help="Do not rebuild the approval queue, usage rollups and course-load aggregate")
+        for name in OVERRIDES:
+            parser.add_argument(f"--{name.replace('_', '-')}", type=int, help="Override the scale's count")
+
+    def handle(self, *args, **options):
+        counts = dict(data.SCALES[options['scale']])
+        for name in OVERRIDES:
+            if options[name] is not None:
+                counts[name] = options[name]
+        if min(counts.values()) < 1:
+            raise CommandError("Every count must be at least 1")
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size must be at least 1")
+
+        if options['flush']:
+            data.flush()
+        elif not data.is_empty():
+            raise CommandError("Students or Reservations already hold rows; pass --flush to replace them")
+
+        generator = data.SyntheticData(seed=options['seed'], first_day=date.fromisoformat(options['first_day']),
+                                       batch_size=options['batch_size'], **counts)
+        started = time.perf_counter()
+        loaded = generator.load(log=self.stdout.write)
+        timings = {'load_s': round(time.perf_counter() - started, 1)}
+
+        if not options['skip_derived']:
+            started = time.perf_counter()
+            loaded['pending_approvals'] = approvals.rebuild()
+            usage.refresh_range(generator.first_day, generator.last_day)
+            loaded['course_load_rows'] = course_load.rebuild()
+            timings['derived_s'] = round(time.perf_counter() - started, 1)
+
+        self.stdout.write(json.dumps({
+            'scale': options['scale'], 'seed': options['seed'], 'counts': counts,
+            'first_day': generator.first_day.isoformat(), 'last_day': generator.last_day.isoformat(),
+            'loaded': loaded, **timings,
+        }, indent=2))
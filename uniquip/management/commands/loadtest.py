@@ -0,0 +1,56 @@
+import json
+from datetime import datetime, timezone
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from uniquip.benchmarks import load
+from uniquip.models import Course, Enrollment, Equipment, Lab, Reservation, Student
+
+
+class Command(BaseCommand):
+    help = ("Drive every API route at a given concurrency and report p50/p95/p99 latency, throughput and queries "
+            "per request as JSON.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help="Measured requests per route")
+        parser.add_argument('--concurrency', type=int, default=16)
+        parser.add_argument('--warmup', type=int, default=5, help="Unmeasured requests per route first")
+        parser.add_argument('--writes', action='store_true',
+                            help="Also drive the write routes; they create, approve, cancel and delete data")
+        parser.add_argument('--base-url', help="Drive a running server instead of the in-process WSGI application")
+        parser.add_argument('--host', default='localhost', help="Host header for in-process requests")
+        parser.add_argument('--output', help="Write results to this JSON file")
+        parser.add_argument('--baseline', help="Results file of an earlier run to compare against")
+        parser.add_argument('--tolerance', type=float, default=0.2, help="Allowed p95 growth before flagging")
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1 or options['concurrency'] < 1 or options['warmup'] < 0:
+            raise CommandError("--requests and --concurrency must be at least 1 and --warmup not negative")
+        try:
+            fixture = load.Fixture()
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        client = load.HttpClient(options['base_url']) if options['base_url'] else load.InProcessClient(options['host'])
+        results = {
+            'started_at': datetime.now(timezone.utc).isoformat(),
+            'target': options['base_url'] or 'in-process',
+            'database': connection.vendor,
+            'requests': options['requests'],
+            'concurrency': options['concurrency'],
+            'writes': options['writes'],
+            'rows': {model.__name__: model.objects.count()
+                     for model in (Student, Course, Enrollment, Lab, Equipment, Reservation)},
+            **load.run(client, fixture, requests=options['requests'], concurrency=options['concurrency'],
+                       warmup=options['warmup'], writes=options['writes']),
+        }
+        if options['baseline']:
+            with open(options['baseline']) as f:
+                results['changes'] = load.compare(results, json.load(f), options['tolerance'])
+
+        payload = json.dumps(results, indent=2, default=str)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(payload + "\n")
+        self.stdout.write(payload)
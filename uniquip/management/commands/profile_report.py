@@ -0,0 +1,55 @@
+import io
+import pstats
+import re
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from uniquip.utils import profiling
+
+
+class Command(BaseCommand):
+    help = "Merge the cProfile dumps in PROFILING_DIRECTORY per route and report each route's hottest functions and SQL."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--directory', help="Defaults to PROFILING_DIRECTORY")
+        parser.add_argument('--route', help="Only routes matching this regular expression")
+        parser.add_argument('--top', type=int, default=20, help="Functions listed per route")
+        parser.add_argument('--sort', choices=('cumulative', 'tottime', 'calls'), default='tottime')
+        parser.add_argument('--sql-top', type=int, default=10, help="SQL statements listed per route")
+
+    def handle(self, *args, **options):
+        directory = options['directory'] or getattr(settings, 'PROFILING_DIRECTORY', 'profiles')
+        try:
+            route_filter = re.compile(options['route']) if options['route'] else None
+        except re.error as e:
+            raise CommandError(f"Invalid --route: {e}")
+
+        routes = {}
+        for dump, metadata in profiling.load(directory):
+            route = metadata.get('route', 'unmatched')
+            if route_filter is None or route_filter.search(route):
+                routes.setdefault(route, []).append((dump, metadata))
+        if not routes:
+            raise CommandError(f"No profiles found in {directory}")
+
+        # Routes that spent the most profiled time first.
+        ordered = sorted(routes.items(), key=lambda item: -sum(m['duration_ms'] for _, m in item[1]))
+        for route, profiles in ordered:
+            durations = sorted(metadata['duration_ms'] for _, metadata in profiles)
+            self.stdout.write(f"=== {route}: {len(profiles)} profiles, "
+                              f"mean {sum(durations) / len(durations):.1f} ms, max {durations[-1]:.1f} ms")
+
+            buffer = io.StringIO()
+            stats = pstats.Stats(*(dump for dump, _ in profiles), stream=buffer)
+            stats.strip_dirs().sort_stats(options['sort']).print_stats(options['top'])
+            self.stdout.write(buffer.getvalue().strip('\n'))
+
+            sql = profiling.merge_sql(profiles)
+            if sql:
+                self.stdout.write(f"\n  SQL ({sum(row['total_ms'] for row in sql):.1f} ms in "
+                                  f"{sum(row['count'] for row in sql)} queries):")
+                for row in sql[:options['sql_top']]:
+                    self.stdout.write(f"  {row['total_ms']:10.1f} ms {row['count']:6d}x  {row['caller']}\n"
+                                      f"      {row['statement'][:300]}")
+            self.stdout.write("")
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from uniquip.utils import approvals
+
+
+class Command(BaseCommand):
+    help = "Rebuild the PendingApprovals queue from reservations awaiting approval."
+
+    def handle(self, *args, **options):
+        queued = approvals.rebuild()
+        self.stdout.write(f"Queued {queued} pending approval rows")
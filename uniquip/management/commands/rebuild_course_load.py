@@ -0,0 +1,34 @@
+import json
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from uniquip.utils import course_load
+
+
+class Command(BaseCommand):
+    help = "Rebuild the per-CRN, per-day CourseLoadDaily aggregate and optionally compare it with the live query."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check-start', help="Compare against the live query from this day (YYYY-MM-DD)")
+        parser.add_argument('--check-end', help="... up to midnight of this day (YYYY-MM-DD)")
+        parser.add_argument('--skip-rebuild', action='store_true', help="Only run the consistency check")
+
+    def handle(self, *args, **options):
+        if bool(options['check_start']) != bool(options['check_end']):
+            raise CommandError("--check-start and --check-end go together")
+
+        if not options['skip_rebuild']:
+            rows = course_load.rebuild()
+            self.stdout.write(f"Rebuilt {rows} course-load rows")
+
+        if options['check_start']:
+            first_day = date.fromisoformat(options['check_start'])
+            last_day = date.fromisoformat(options['check_end'])
+            mismatches = course_load.check(first_day, last_day)
+            if mismatches:
+                self.stdout.write(json.dumps(
+                    [{'CRN': crn, 'Aggregate': actual, 'Live': expected} for crn, actual, expected in mismatches],
+                    indent=2))
+                raise CommandError(f"{len(mismatches)} CRNs differ from the live query")
+            self.stdout.write("Aggregate matches the live query")
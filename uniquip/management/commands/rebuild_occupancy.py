@@ -0,0 +1,28 @@
+import json
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from uniquip.utils.occupancy import OccupancyIndex
+
+
+class Command(BaseCommand):
+    help = "Build the per-equipment daily occupancy bitmaps from Reservations and report their memory use."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', help="First day (YYYY-MM-DD), defaults to today")
+        parser.add_argument('--days', type=int, default=30)
+        parser.add_argument('--equipment', type=int, action='append', help="Limit to these EquipmentIds")
+        parser.add_argument('--slot-minutes', type=int)
+
+    def handle(self, *args, **options):
+        first_day = date.fromisoformat(options['start']) if options['start'] else date.today()
+        if options['days'] < 1:
+            raise CommandError("--days must be at least 1")
+        last_day = first_day + timedelta(days=options['days'] - 1)
+
+        index = OccupancyIndex(slot_minutes=options['slot_minutes'])
+        built = index.rebuild(first_day, last_day, options['equipment'])
+        stats = index.memory_stats()
+        stats.update({'first_day': first_day.isoformat(), 'last_day': last_day.isoformat(), 'built': built})
+        self.stdout.write(json.dumps(stats, indent=2))
@@ -0,0 +1,31 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from uniquip.utils import usage
+
+
+class Command(BaseCommand):
+    help = "Recompute the hourly and daily equipment usage rollups from Reservations (backfill and catch-up)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', help="First day (YYYY-MM-DD), defaults to --days before today")
+        parser.add_argument('--end', help="Last day (YYYY-MM-DD), defaults to today")
+        parser.add_argument('--days', type=int, default=7)
+        parser.add_argument('--chunk-days', type=int, default=7)
+
+    def handle(self, *args, **options):
+        last_day = date.fromisoformat(options['end']) if options['end'] else date.today()
+        if options['start']:
+            first_day = date.fromisoformat(options['start'])
+        else:
+            if options['days'] < 1:
+                raise CommandError("--days must be at least 1")
+            first_day = last_day - timedelta(days=options['days'] - 1)
+        if last_day < first_day:
+            raise CommandError("--end must not be before --start")
+        if options['chunk_days'] < 1:
+            raise CommandError("--chunk-days must be at least 1")
+
+        refreshed = usage.refresh_range(first_day, last_day, chunk_days=options['chunk_days'])
+        self.stdout.write(f"Refreshed {refreshed} equipment-days from {first_day} to {last_day}")
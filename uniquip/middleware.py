@@ -1,28 +1,116 @@
-import asyncio
-from django.utils.deprecation import MiddlewareMixin
+import time
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
 from opentelemetry import trace
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
 from django.http import JsonResponse
 from opentelemetry.trace import Status, StatusCode
-from opentelemetry.sdk.trace import TracerProvider
-from uniquip.utils.s3_logger import S3Logger, LogLevel
+from uniquip.utils import metrics, profiling, sql_trace
+from uniquip.utils.s3_logger import S3Logger, LogLevel, queue_depth
 
 logger = S3Logger()
 
-class OpenTelemetryMiddleware(MiddlewareMixin):
+class OpenTelemetryMiddleware:
+    # Both sync and async capable, so under ASGI async views are not forced onto a worker thread.
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
         self.tracer = trace.get_tracer(__name__)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
 
     def __call__(self, request):
-        # Start a span for the request
-        with self.tracer.start_as_current_span("request") as span:
-            span.set_attribute("http.method", request.method)
-            span.set_attribute("http.url", request.build_absolute_uri())
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with self.request_span(request) as span:
+            started = time.perf_counter()
+            queries, token = sql_trace.begin_request()
+            response = None
 
             try:
                 response = self.get_response(request)
                 return response
             except Exception as e:
-                span.set_status(Status(StatusCode.ERROR, str(e)))  # Mark as error
-                logger.log(f"Exception occurred: {str(e)}", LogLevel.ERROR)  # Log error
-                return JsonResponse({"error": "Internal Server Error"}, status=500)
+                response = self.handle_exception(span, e)
+                return response
+            finally:
+                self.record_queries(span, queries, token)
+                self.record_metrics(request, response, started, queries)
+
+    async def __acall__(self, request):
+        with self.request_span(request) as span:
+            started = time.perf_counter()
+            queries, token = sql_trace.begin_request()
+            response = None
+
+            try:
+                response = await self.get_response(request)
+                return response
+            except Exception as e:
+                response = self.handle_exception(span, e)
+                return response
+            finally:
+                self.record_queries(span, queries, token)
+                self.record_metrics(request, response, started, queries)
+
+    @contextmanager
+    def request_span(self, request):
+        current = trace.get_current_span()
+        if current.get_span_context().is_valid:
+            # DjangoInstrumentor already opened the server span for this request; annotate it, don't nest a copy.
+            yield current
+            return
+        with self.tracer.start_as_current_span("request") as span:
+            span.set_attribute("http.method", request.method)
+            span.set_attribute("http.url", request.build_absolute_uri())
+            yield span
+
+    @staticmethod
+    def record_queries(span, queries, token):
+        # Streaming responses run their queries after this point and are not included.
+        sql_trace.end_request(token)
+        span.set_attribute("db.query_count", queries.count)
+        span.set_attribute("db.time_ms", round(queries.db_ms, 3))
+        if queries.slow:
+            span.set_attribute("db.slow_query_count", queries.slow)
+
+    @staticmethod
+    def record_metrics(request, response, started, queries):
+        # Like the query counts, a streaming response is timed to its first byte.
+        match = getattr(request, "resolver_match", None)
+        metrics.observe_request(match.route if match is not None else "unmatched", request.method,
+                                response.status_code if response is not None else 500,
+                                time.perf_counter() - started, queries)
+        metrics.s3_logger_queue_depth.set(queue_depth())
+
+    def handle_exception(self, span, e):
+        span.set_status(Status(StatusCode.ERROR, str(e)))  # Mark as error
+        logger.log(f"Exception occurred: {str(e)}", LogLevel.ERROR)  # Log error; only enqueues, never blocks on S3
+        return JsonResponse({"error": "Internal Server Error"}, status=500)
+
+
+class ProfilingMiddleware:
+    """
+    Profiles the requests uniquip.utils.profiling.Profiler selects. Under
+    ASGI requests pass through unprofiled: their views run on executor
+    threads the profiler cannot see.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, "PROFILING_ENABLED", True):
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        self.profiler = profiling.Profiler()
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.get_response(request)
+        return self.profiler(request, self.get_response)
@@ -94,4 +94,95 @@ class Reservation(models.Model):
 
     class Meta:
         db_table = 'Reservations'
+        indexes = [
+            models.Index(fields=['Equipment', 'StartTime', 'EndTime'], name='reservations_equipment_time'),
+        ]
 
+
+class IdSequence(models.Model):
+    Name = models.CharField(max_length=50, primary_key=True)
+    NextValue = models.BigIntegerField()
+
+    def __str__(self):
+        return f"{self.Name} -> {self.NextValue}"
+
+    class Meta:
+        db_table = 'IdSequences'
+
+class RecurringReservation(models.Model):
+    DAILY = 'daily'
+    WEEKLY = 'weekly'
+    FREQUENCIES = [(DAILY, 'Daily'), (WEEKLY, 'Weekly')]
+
+    RuleId = models.AutoField(primary_key=True)
+    CRN = models.ForeignKey(Course, on_delete=models.CASCADE, db_column='CRN')
+    Equipment = models.ForeignKey(Equipment, on_delete=models.CASCADE, db_column='EquipmentId')
+    NetId = models.ForeignKey(Student, on_delete=models.CASCADE, db_column='NetId')
+    Frequency = models.CharField(max_length=10, choices=FREQUENCIES)
+    Weekdays = models.JSONField(default=list)
+    StartDate = models.DateField()
+    UntilDate = models.DateField()
+    TimeSlots = models.JSONField()
+    ExcludedDates = models.JSONField(default=list)
+    CreatedAt = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.CRN_id} - {self.Equipment_id} ({self.Frequency})"
+
+    class Meta:
+        db_table = 'RecurringReservations'
+
+class PendingApproval(models.Model):
+    Reservation = models.ForeignKey(Reservation, on_delete=models.CASCADE, db_column='ReservationId',
+                                    db_constraint=False)
+    Faculty = models.ForeignKey(Faculty, on_delete=models.CASCADE, db_column='FacultyId', db_constraint=False)
+    QueuedAt = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.Faculty_id} - {self.Reservation_id}"
+
+    class Meta:
+        unique_together = (('Faculty', 'Reservation'),)
+        db_table = 'PendingApprovals'
+        indexes = [
+            models.Index(fields=['Faculty', 'QueuedAt'], name='pending_faculty_queued'),
+            models.Index(fields=['Reservation'], name='pending_reservation'),
+        ]
+
+class EquipmentUsageHourly(models.Model):
+    Equipment = models.ForeignKey(Equipment, on_delete=models.CASCADE, db_column='EquipmentId', db_constraint=False)
+    Lab = models.ForeignKey(Lab, on_delete=models.CASCADE, db_column='LabId', db_constraint=False)
+    Day = models.DateField()
+    Hour = models.SmallIntegerField()
+    Status = models.CharField(max_length=20)
+    Reservations = models.IntegerField()
+    BookedMinutes = models.IntegerField()
+
+    class Meta:
+        unique_together = (('Equipment', 'Day', 'Hour', 'Status'),)
+        db_table = 'EquipmentUsageHourly'
+        indexes = [models.Index(fields=['Day', 'Lab'], name='usage_hourly_day_lab')]
+
+class EquipmentUsageDaily(models.Model):
+    Equipment = models.ForeignKey(Equipment, on_delete=models.CASCADE, db_column='EquipmentId', db_constraint=False)
+    Lab = models.ForeignKey(Lab, on_delete=models.CASCADE, db_column='LabId', db_constraint=False)
+    Day = models.DateField()
+    Status = models.CharField(max_length=20)
+    Reservations = models.IntegerField()
+    BookedMinutes = models.IntegerField()
+
+    class Meta:
+        unique_together = (('Equipment', 'Day', 'Status'),)
+        db_table = 'EquipmentUsageDaily'
+        indexes = [models.Index(fields=['Day', 'Lab'], name='usage_daily_day_lab')]
+
+class CourseLoadDaily(models.Model):
+    CRN = models.ForeignKey(Course, on_delete=models.CASCADE, db_column='CRN', db_constraint=False)
+    Day = models.DateField()
+    UntilDay = models.DateField()
+    HoursBooked = models.IntegerField()
+
+    class Meta:
+        unique_together = (('CRN', 'Day', 'UntilDay'),)
+        db_table = 'CourseLoadDaily'
+        indexes = [models.Index(fields=['Day', 'UntilDay'], name='course_load_days')]
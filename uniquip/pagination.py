@@ -0,0 +1,23 @@
+import base64
+import json
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(**position):
+    """Opaque, URL-safe token for a keyset position such as ``after=<last id>``."""
+    raw = json.dumps(position, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token):
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        position = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, UnicodeError):
+        raise InvalidCursor("Invalid cursor")
+    if not isinstance(position, dict):
+        raise InvalidCursor("Invalid cursor")
+    return position
@@ -48,6 +48,7 @@ class ReservationSerializer(serializers.ModelSerializer):
     class Meta:
         model = Reservation
         fields = '__all__'
+        read_only_fields = ('ReservationId',)
         extra_kwargs = {
             'Equipment': {'read_only': True}
         }
@@ -55,4 +56,61 @@ class ReservationSerializer(serializers.ModelSerializer):
 class EquipmentSerializerCustom(serializers.ModelSerializer):
     class Meta:
         model = Equipment
-        fields = '__all__'
\ No newline at end of file
+        fields = '__all__'
+
+class CompiledReadSerializer:
+    """
+    Read-only renderer driven by a ModelSerializer's own field list.
+
+    The serializer's readable fields are walked once and turned into a flat
+    plan of (key, attribute, kind, handler) steps; rows are then rendered by
+    running the plan, with no per-row field binding or ``get_attribute``
+    lookups. Nested serializers become nested plans and primary-key related
+    fields read the FK column, so the output matches ``serializer.data``
+    while rendering only from relations already loaded by select_related.
+    """
+
+    def __init__(self, serializer_class):
+        self.serializer_class = serializer_class
+        self._plan = None
+
+    @property
+    def plan(self):
+        if self._plan is None:
+            self._plan = self.compile(self.serializer_class())
+        return self._plan
+
+    @classmethod
+    def compile(cls, serializer):
+        model = serializer.Meta.model
+        plan = []
+        for key, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            if isinstance(field, serializers.BaseSerializer):
+                plan.append((key, field.source, 'nested', cls.compile(field)))
+            elif isinstance(field, serializers.PrimaryKeyRelatedField) and field.pk_field is None:
+                plan.append((key, model._meta.get_field(field.source).attname, 'value', None))
+            else:
+                plan.append((key, field.source, 'field', field.to_representation))
+        return plan
+
+    def to_representation(self, instance):
+        return self._render(self.plan, instance)
+
+    def many(self, instances):
+        plan = self.plan
+        return [self._render(plan, instance) for instance in instances]
+
+    @classmethod
+    def _render(cls, plan, instance):
+        data = {}
+        for key, attribute, kind, handler in plan:
+            value = getattr(instance, attribute)
+            if value is None or kind == 'value':
+                data[key] = value
+            elif kind == 'field':
+                data[key] = handler(value)
+            else:
+                data[key] = cls._render(handler, value)
+        return data
@@ -10,11 +10,8 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
+import os
 from pathlib import Path
-from opentelemetry import trace
-from opentelemetry.sdk.trace import TracerProvider
-from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
-from opentelemetry.instrumentation.django import DjangoInstrumentor
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -31,18 +28,6 @@ DEBUG = True
 
 ALLOWED_HOSTS = ["7ea4-130-126-255-80.ngrok-free.app", "d2af-130-126-255-80.ngrok-free.app", "localhost"]
 
-# Set up the tracer provider
-trace.set_tracer_provider(TracerProvider())
-tracer = trace.get_tracer(__name__)
-
-# Add a span processor to export traces
-trace.get_tracer_provider().add_span_processor(
-    BatchSpanProcessor(ConsoleSpanExporter())  # Exports traces to console
-)
-
-# Instrument Django
-DjangoInstrumentor().instrument()
-
 # Application definition
 
 INSTALLED_APPS = [
@@ -59,6 +44,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'uniquip.middleware.OpenTelemetryMiddleware',
+    'uniquip.middleware.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -102,12 +88,22 @@ WSGI_APPLICATION = 'uniquip.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.mysql',
+        'ENGINE': 'uniquip.db.backends.mysql_pooled',
         'NAME': 'uniquip',
         'USER': 'root',
         'PASSWORD': '',
         'HOST': 'localhost',
         'PORT': '3306',
+        # Connections are returned to the pool at the end of each request rather than kept per thread.
+        'CONN_MAX_AGE': 0,
+        'POOL': {
+            'MAX_SIZE': int(os.getenv('DB_POOL_SIZE', '20')),
+            'MIN_IDLE': 2,
+            'TIMEOUT': 5,
+            'MAX_LIFETIME': 1800,
+            'MAX_IDLE': 300,
+            'PING_INTERVAL': 30,
+        },
     }
 }
 
@@ -163,4 +159,118 @@ REST_FRAMEWORK = {
     'PAGE_SIZE': 10  # Define how many items per page
 }
 
-CORS_ALLOW_ALL_ORIGINS = True
\ No newline at end of file
+CORS_ALLOW_ALL_ORIGINS = True
+
+# Occupancy bitmaps (uniquip.utils.occupancy)
+OCCUPANCY_SLOT_MINUTES = 60
+OCCUPANCY_TTL_SECONDS = 300
+OCCUPANCY_MAX_DAYS = 100000
+
+# Primary keys leased per process by uniquip.utils.id_allocator
+ID_ALLOCATOR_BLOCK_SIZE = 100
+
+# Times create_reservations reruns a booking InnoDB aborted as a deadlock or lock wait timeout
+RESERVATION_LOCK_RETRIES = 3
+
+# Equipment name/category search index (uniquip.utils.search)
+SEARCH_INDEX_TTL_SECONDS = 600
+
+# NetId -> eligible labs cache (uniquip.utils.eligibility)
+ELIGIBILITY_CACHE_SIZE = 10000
+ELIGIBILITY_TTL_SECONDS = 300
+
+# Rendered read responses (uniquip.utils.response_cache). Local memory is per
+# worker; point RESPONSE_CACHE_BACKEND at FileBasedCache (LOCATION is then a
+# directory) or a memcached/redis backend to share entries between workers.
+# Namespace versions must be seen by every worker, or a write only
+# invalidates the worker that served it: they default to files on this host;
+# with several hosts point RESPONSE_CACHE_VERSION_BACKEND at memcached/redis.
+RESPONSE_CACHE_ALIAS = 'responses'
+RESPONSE_CACHE_VERSION_ALIAS = 'response-versions'
+RESPONSE_CACHE_TTL_SECONDS = 60
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    RESPONSE_CACHE_ALIAS: {
+        'BACKEND': os.getenv('RESPONSE_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('RESPONSE_CACHE_LOCATION', 'uniquip-responses'),
+        'TIMEOUT': RESPONSE_CACHE_TTL_SECONDS,
+        'OPTIONS': {'MAX_ENTRIES': int(os.getenv('RESPONSE_CACHE_MAX_ENTRIES', '5000'))},
+    },
+    RESPONSE_CACHE_VERSION_ALIAS: {
+        'BACKEND': os.getenv('RESPONSE_CACHE_VERSION_BACKEND', 'django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': os.getenv('RESPONSE_CACHE_VERSION_LOCATION', str(BASE_DIR / 'cache' / 'response-versions')),
+        # A version that expired would start again from 0 and bring back entries stored under it.
+        'TIMEOUT': None,
+    },
+}
+
+# Threads (and so DB connections) available to async views (uniquip.utils.db_executor)
+ASYNC_DB_WORKERS = 16
+
+# Rows fetched per round trip by ?stream=1 responses (uniquip.utils.streaming)
+STREAM_FETCH_SIZE = 1000
+
+# Rows per keyset query of the reservation export (uniquip.utils.export)
+EXPORT_CHUNK_SIZE = 5000
+
+# Per-query spans and per-request query counts (uniquip.utils.sql_trace). Queries slower than
+# SQL_SLOW_QUERY_MS are logged with their EXPLAIN plan, at most once per statement per interval.
+SQL_TRACE_ENABLED = os.getenv('SQL_TRACE_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+SQL_TRACE_SPANS = True
+SQL_SLOW_QUERY_MS = float(os.getenv('SQL_SLOW_QUERY_MS', '200'))
+SQL_SLOW_QUERY_EXPLAIN_SECONDS = 60
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'slow_queries': {
+            'class': 'logging.handlers.RotatingFileHandler',
+            'filename': os.getenv('SQL_SLOW_QUERY_LOG', str(BASE_DIR / 'slow_queries.log')),
+            'maxBytes': 10 * 1024 * 1024,
+            'backupCount': 5,
+            'delay': True,
+        },
+    },
+    'loggers': {
+        'uniquip.slow_queries': {'handlers': ['slow_queries'], 'level': 'WARNING', 'propagate': False},
+    },
+}
+
+# Tracing (uniquip.utils.tracing), set up once in UniquipConfig.ready(). TRACING_HEAD_SAMPLE_RATIO of
+# new traces are recorded; of those, errors, requests over TRACING_SLOW_MS and TRACING_KEEP_RATIO of
+# the rest are exported. TRACING_EXPORTER is file (batched NDJSON under TRACING_DIRECTORY),
+# http (NDJSON POSTed to TRACING_ENDPOINT), console or none.
+TRACING_ENABLED = os.getenv('TRACING_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+TRACING_SERVICE_NAME = os.getenv('SERVICE_NAME', 'uniquip')
+TRACING_EXPORTER = os.getenv('TRACING_EXPORTER', 'file')
+TRACING_DIRECTORY = os.getenv('TRACING_DIRECTORY', str(BASE_DIR / 'traces'))
+TRACING_ENDPOINT = os.getenv('TRACING_ENDPOINT', 'http://127.0.0.1:4318/v1/spans')
+TRACING_GZIP = True
+TRACING_FILE_MAX_BYTES = 64 * 1024 * 1024
+TRACING_HEAD_SAMPLE_RATIO = float(os.getenv('TRACING_HEAD_SAMPLE_RATIO', '1.0'))
+TRACING_KEEP_RATIO = float(os.getenv('TRACING_KEEP_RATIO', '0.1'))
+TRACING_SLOW_MS = float(os.getenv('TRACING_SLOW_MS', '500'))
+TRACING_MAX_QUEUE_SIZE = 4096
+TRACING_SCHEDULE_DELAY_MS = 2000
+TRACING_MAX_EXPORT_BATCH_SIZE = 512
+TRACING_INSTRUMENT_DJANGO = True
+
+# Request metrics (uniquip.utils.metrics). Each worker process writes its own memory-mapped file in
+# METRICS_DIRECTORY and /metrics sums the files of every worker; use a local (ideally tmpfs) directory
+# and empty it when deploying.
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+METRICS_DIRECTORY = os.getenv('METRICS_DIRECTORY', str(BASE_DIR / 'metrics'))
+METRICS_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# On-demand profiling (uniquip.utils.profiling). Requests carrying PROFILING_HEADER set to
+# PROFILING_TOKEN, paths matching PROFILING_ROUTE_PATTERN and PROFILING_SAMPLE_RATE of the rest are
+# profiled with cProfile into PROFILING_DIRECTORY; `manage.py profile_report` merges them per route.
+PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+PROFILING_SAMPLE_RATE = float(os.getenv('PROFILING_SAMPLE_RATE', '0'))
+PROFILING_ROUTE_PATTERN = os.getenv('PROFILING_ROUTE_PATTERN', '')
+PROFILING_HEADER = 'X-Profile'
+PROFILING_TOKEN = os.getenv('PROFILING_TOKEN', '')
+PROFILING_DIRECTORY = os.getenv('PROFILING_DIRECTORY', str(BASE_DIR / 'profiles'))
+PROFILING_MAX_FILES = 500
@@ -0,0 +1,98 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .models import Course, CourseLab, Enrollment, Equipment, Reservation
+from uniquip.utils import approvals, course_load, usage
+from uniquip.utils.eligibility import student_eligibility
+from uniquip.utils.occupancy import occupancy
+from uniquip.utils.response_cache import EQUIPMENT, RESERVATIONS, response_cache
+from uniquip.utils.search import equipment_search
+
+
+@receiver(post_save, sender=Equipment)
+def index_equipment(sender, instance, **kwargs):
+    equipment_search.upsert(instance.EquipmentId, instance.EquipmentName, instance.Category)
+
+
+@receiver(post_delete, sender=Equipment)
+def unindex_equipment(sender, instance, **kwargs):
+    equipment_search.remove(instance.EquipmentId)
+
+
+@receiver([post_save, post_delete], sender=Enrollment)
+def invalidate_student_eligibility(sender, instance, **kwargs):
+    student_eligibility.invalidate_student(instance.NetId_id)
+    course_load.refresh([instance.CRN_id])
+    # Enrolling or dropping adds or removes the course's faculty as approvers of the student's bookings.
+    approvals.rebuild(crns=[instance.CRN_id], net_id=instance.NetId_id)
+
+
+@receiver([post_save, post_delete], sender=CourseLab)
+def invalidate_course_lab_eligibility(sender, instance, **kwargs):
+    student_eligibility.invalidate_course(instance.CRN_id)
+    course_load.refresh([instance.CRN_id])
+    approvals.rebuild(lab_ids=[instance.LabId_id])
+
+
+@receiver([post_save, post_delete], sender=Course)
+def invalidate_course_eligibility(sender, instance, **kwargs):
+    student_eligibility.invalidate_course(instance.CRN)
+    # A course changing hands moves its bookings to the new instructor's queue.
+    approvals.rebuild(crns=[instance.CRN])
+
+
+@receiver(post_save, sender=Reservation)
+def queue_reservation_approval(sender, instance, **kwargs):
+    approvals.dequeue([instance.ReservationId])
+    approvals.enqueue([instance.ReservationId])
+
+
+@receiver(post_delete, sender=Reservation)
+def unqueue_reservation_approval(sender, instance, **kwargs):
+    approvals.dequeue([instance.ReservationId])
+
+
+@receiver(pre_save, sender=Reservation)
+def remember_previous_reservation(sender, instance, **kwargs):
+    # Updates can move a reservation to other days or students; refresh the old rollups too.
+    instance._previous_reservation = sender.objects.filter(pk=instance.pk).values_list(
+        'Equipment_id', 'StartTime', 'EndTime', 'NetId_id').first()
+
+
+@receiver(post_save, sender=Reservation)
+def refresh_reservation_rollups(sender, instance, **kwargs):
+    keys = usage.keys_for([(instance.Equipment_id, instance.StartTime, instance.EndTime)])
+    previous = getattr(instance, '_previous_reservation', None)
+    if previous is not None:
+        keys |= usage.keys_for([previous[:3]])
+        course_load.remove(previous[3], [previous[1:3]])
+    usage.refresh(keys)
+    course_load.add(instance.NetId_id, [(instance.StartTime, instance.EndTime)])
+
+
+@receiver(post_delete, sender=Reservation)
+def remove_reservation_rollups(sender, instance, **kwargs):
+    usage.refresh(usage.keys_for([(instance.Equipment_id, instance.StartTime, instance.EndTime)]))
+    course_load.remove(instance.NetId_id, [(instance.StartTime, instance.EndTime)])
+
+
+@receiver([post_save, post_delete], sender=Reservation)
+def invalidate_reservation_occupancy(sender, instance, **kwargs):
+    # ORM writes (ReservationViewSet, admin) skip the incremental updates the raw SQL views make.
+    occupancy.invalidate(instance.Equipment_id, instance.StartTime, instance.EndTime)
+    previous = getattr(instance, '_previous_reservation', None)
+    if previous is not None:
+        occupancy.invalidate(*previous[:3])
+
+
+@receiver([post_save, post_delete], sender=Equipment)
+@receiver([post_save, post_delete], sender=Enrollment)
+@receiver([post_save, post_delete], sender=CourseLab)
+@receiver([post_save, post_delete], sender=Course)
+def invalidate_equipment_responses(sender, instance, **kwargs):
+    response_cache.bump(EQUIPMENT)
+
+
+@receiver([post_save, post_delete], sender=Reservation)
+def invalidate_reservation_responses(sender, instance, **kwargs):
+    response_cache.bump(RESERVATIONS)
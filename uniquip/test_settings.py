@@ -0,0 +1,30 @@
+"""
+Settings for ``python manage.py test --settings=uniquip.test_settings``.
+
+The app's SQL names its tables as ``uniquip.<Table>``, so the test database
+has to be called ``uniquip`` too. Django creates it and drops it again, so
+point TEST_DB_HOST/TEST_DB_PORT at a disposable MySQL server, never at one
+holding real data.
+"""
+import os
+
+from .settings import *  # noqa: F401,F403
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.mysql',
+        'NAME': 'uniquip',
+        'USER': os.getenv('TEST_DB_USER', 'root'),
+        'PASSWORD': os.getenv('TEST_DB_PASSWORD', ''),
+        'HOST': os.getenv('TEST_DB_HOST', '127.0.0.1'),
+        'PORT': os.getenv('TEST_DB_PORT', '3307'),
+        'TEST': {'NAME': 'uniquip'},
+    }
+}
+
+# The tables come from uniquip/db/schema, as in production, not from the models.
+MIGRATION_MODULES = {'uniquip': 'uniquip.tests.migrations'}
+
+TRACING_ENABLED = False
+METRICS_ENABLED = False
+PROFILING_ENABLED = False
@@ -0,0 +1,16 @@
+from django.db import migrations
+
+from uniquip.db import schema
+
+
+def apply_schema(apps, schema_editor):
+    schema.apply(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+    # MySQL commits DDL as it goes; there is nothing for a transaction to roll back.
+    atomic = False
+
+    initial = True
+    dependencies = []
+    operations = [migrations.RunPython(apply_schema, migrations.RunPython.noop)]
@@ -0,0 +1,59 @@
+from datetime import datetime, timedelta
+
+from django.db import connection
+from django.test import TestCase
+
+from uniquip.utils.availability import (
+    CANCELLED_STATUS, PENDING_STATUS, REJECTED_STATUS, RESERVED_STATUS, AvailabilityIndex,
+)
+from uniquip.utils.occupancy import OccupancyAvailability, OccupancyIndex, load_availability, occupancy
+
+DAY = datetime(2024, 3, 4)
+
+
+class AvailabilityPathsTests(TestCase):
+    """The interval index (unaligned windows) and the occupancy bitmaps (aligned ones) must agree."""
+
+    def setUp(self):
+        with connection.cursor() as cursor:
+            cursor.execute("INSERT INTO uniquip.Labs (LabId, LabName, LabLocation, OpenHours, CloseHours) "
+                           "VALUES (1, 'Lab', 'Room 1', '08:00:00', '20:00:00')")
+            cursor.execute("INSERT INTO uniquip.Students (NetId, Name, Email, PhoneNumber) "
+                           "VALUES ('s000000', 'Student', 's@example.edu', '2170000000')")
+            cursor.execute("INSERT INTO uniquip.Equipments (EquipmentId, LabId, EquipmentName, Category, "
+                           "IsReservable, ApprovalRequired) VALUES (1, 1, 'Microscope 1', 'Microscope', 1, 0)")
+            cursor.executemany(
+                "INSERT INTO uniquip.Reservations (ReservationId, EquipmentId, NetId, StartTime, EndTime, Status) "
+                "VALUES (%s, 1, 's000000', %s, %s, %s)",
+                [(i, DAY + timedelta(hours=hour), DAY + timedelta(hours=hour + 1), reservation_status)
+                 for i, (hour, reservation_status) in enumerate(
+                    [(9, RESERVED_STATUS), (10, CANCELLED_STATUS), (11, REJECTED_STATUS), (12, PENDING_STATUS)],
+                    start=1)])
+        occupancy.invalidate()
+        self.addCleanup(occupancy.invalidate)
+
+    def free_hours(self, index):
+        return [row['TimeSlot'][11:] for row in index.free_slots(1)]
+
+    def test_both_paths_give_the_same_free_slots(self):
+        end = DAY + timedelta(days=1)
+        intervals = AvailabilityIndex.load([1], DAY, end)
+        bitmaps = OccupancyAvailability.load([1], DAY, end)
+        expected = [f"{hour:02d}:00:00" for hour in range(8, 20) if hour not in (9, 12)]
+        self.assertEqual(self.free_hours(intervals), expected)
+        self.assertEqual(self.free_hours(bitmaps), expected)
+
+    def test_unaligned_window_ignores_inactive_reservations(self):
+        index = load_availability([1], DAY + timedelta(minutes=30), DAY + timedelta(days=1, minutes=30))
+        self.assertNotIsInstance(index, OccupancyAvailability)
+        self.assertEqual(self.free_hours(index),
+                         [f"{hour:02d}:30:00" for hour in range(8, 20) if hour not in (9, 12)])
+
+    def test_evicted_days_are_not_free(self):
+        # Room for one equipment-day: every day the heatmap loads evicts the one before it.
+        index = OccupancyIndex(max_days=1)
+        heatmap = index.heatmap([1], DAY.date() - timedelta(days=1), DAY.date() + timedelta(days=1))
+        self.assertEqual(heatmap[DAY.date().isoformat()][9:13], [1, 0, 0, 1])
+        index.invalidate()
+        self.assertTrue(index.is_occupied(1, DAY + timedelta(hours=9)))
+        self.assertFalse(index.is_free(1, DAY + timedelta(hours=12), DAY + timedelta(hours=13)))
@@ -0,0 +1,119 @@
+import threading
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from django.db import connection
+from django.test import TransactionTestCase
+
+from uniquip.benchmarks import data
+from uniquip.utils import course_load
+from uniquip.utils.occupancy import INACTIVE_STATUSES, occupancy
+from uniquip.utils.reservations import ReservationContention, create_reservations
+
+DAY = '2024-03-04'
+THREADS = 8
+
+
+class ConcurrentBookingTests(TransactionTestCase):
+    """Many threads booking through ``create_reservations`` at once, each on its own connection."""
+
+    def setUp(self):
+        with connection.cursor() as cursor:
+            cursor.execute("INSERT INTO uniquip.Faculty (FacultyId, Name, Email) VALUES (1, 'F', 'f@example.edu')")
+            cursor.execute("INSERT INTO uniquip.Courses (CRN, CourseCode, CourseName, Credits, FacultyId) "
+                           "VALUES (10000, 'CS 100', 'Course', 3, 1)")
+            cursor.execute("INSERT INTO uniquip.Labs (LabId, LabName, LabLocation, OpenHours, CloseHours) "
+                           "VALUES (1, 'Lab', 'Room 1', '08:00:00', '20:00:00')")
+            cursor.execute("INSERT INTO uniquip.CourseLab (CRN, LabId) VALUES (10000, 1)")
+            cursor.executemany(
+                "INSERT INTO uniquip.Equipments (EquipmentId, LabId, EquipmentName, Category, IsReservable, "
+                "ApprovalRequired) VALUES (%s, 1, %s, 'Microscope', 1, %s)",
+                [(i, f"Microscope {i}", int(i == 2)) for i in range(1, THREADS + 1)])
+            cursor.executemany(
+                "INSERT INTO uniquip.Students (NetId, Name, Email, PhoneNumber) VALUES (%s, %s, %s, '2170000000')",
+                [(data.SyntheticData.net_id(i), f"Student {i}", f"s{i}@example.edu") for i in range(THREADS)])
+            cursor.executemany(
+                "INSERT INTO uniquip.Enrollments (NetId, CRN, Semester, EnrolledAt) VALUES (%s, 10000, 'SP24', %s)",
+                [(data.SyntheticData.net_id(i), datetime(2024, 1, 1)) for i in range(THREADS)])
+        occupancy.invalidate()
+
+    def tearDown(self):
+        data.flush()
+        occupancy.invalidate()
+
+    def book_concurrently(self, requests_of):
+        """Run ``create_reservations`` for every thread's requests at the same moment."""
+        barrier = threading.Barrier(THREADS)
+        created = [None] * THREADS
+        errors = []
+
+        def book(i):
+            try:
+                barrier.wait()
+                created[i], _ = create_reservations(data.SyntheticData.net_id(i), requests_of(i))
+            except ReservationContention:
+                created[i] = []
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=book, args=(i,)) for i in range(THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        return [reservation for batch in created for reservation in batch]
+
+    def active_reservations(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"""
+                SELECT ReservationId, EquipmentId, StartTime, EndTime
+                FROM uniquip.Reservations
+                WHERE Status NOT IN ({", ".join(["%s"] * len(INACTIVE_STATUSES))})
+                ORDER BY EquipmentId, StartTime
+            """, list(INACTIVE_STATUSES))
+            return cursor.fetchall()
+
+    def assert_no_double_booking(self, created):
+        ids = [reservation['ReservationId'] for reservation in created]
+        self.assertEqual(len(ids), len(set(ids)), "a reservation id was handed out twice")
+
+        rows = self.active_reservations()
+        self.assertEqual(sorted(row[0] for row in rows), sorted(ids))
+        by_equipment = defaultdict(list)
+        for _, equipment_id, start_time, end_time in rows:
+            by_equipment[equipment_id].append((start_time, end_time))
+        for equipment_id, intervals in by_equipment.items():
+            for (_, previous_end), (start_time, _) in zip(intervals, intervals[1:]):
+                self.assertLessEqual(previous_end, start_time, f"equipment {equipment_id} is double-booked")
+
+    def test_competing_bookings_never_overlap(self):
+        # Every thread asks for three overlapping windows on both pieces of equipment.
+        created = self.book_concurrently(lambda i: [
+            {'EquipmentId': equipment_id, 'Day': DAY,
+             'TimeSlots': [f"{hour:02d}:00:00" for hour in range(9 + i % 3, 12 + i % 3)]}
+            for equipment_id in (1, 2)
+        ])
+        self.assertTrue(created)
+        self.assert_no_double_booking(created)
+
+    def test_disjoint_bookings_all_succeed_with_distinct_ids(self):
+        created = self.book_concurrently(lambda i: [
+            {'EquipmentId': 1 + i % 2, 'Day': DAY, 'TimeSlots': [f"{8 + i:02d}:00:00"]}
+        ])
+        self.assertEqual(len(created), THREADS)
+        self.assert_no_double_booking(created)
+
+    def test_concurrent_bookings_in_one_course_keep_its_load(self):
+        # Different equipment, so the bookings lock different reservations and nothing serializes them.
+        created = self.book_concurrently(lambda i: [
+            {'EquipmentId': i + 1, 'Day': DAY, 'TimeSlots': ['09:00:00', '10:00:00']}
+        ])
+        self.assertEqual(len(created), THREADS)
+        first_day = datetime.strptime(DAY, '%Y-%m-%d').date()
+        last_day = first_day + timedelta(days=1)
+        self.assertEqual(course_load.check(first_day, last_day), [])
+        self.assertEqual([(row['CRN'], int(row['TotalHoursBooked']))
+                          for row in course_load.course_load(first_day, last_day)], [(10000, 2 * THREADS)])
@@ -0,0 +1,72 @@
+import gzip
+import json
+import os
+from unittest import mock
+
+import boto3
+from django.test import SimpleTestCase
+from moto import mock_aws
+
+from uniquip.utils.s3_logger import LogLevel, S3Logger
+
+BUCKET = 'uniquip-test-logs'
+
+
+class S3LoggerShippingTests(SimpleTestCase):
+    """Shipping against moto's in-process S3 stand-in."""
+
+    def setUp(self):
+        environment = mock.patch.dict(os.environ, {
+            'S3_BUCKET_NAME': BUCKET,
+            'SERVICE_NAME': 'uniquip-test',
+            'AWS_REGION': 'us-east-1',
+            'AWS_ACCESS_KEY_ID': 'testing',
+            'AWS_SECRET_ACCESS_KEY': 'testing',
+            'S3_LOG_FLUSH_SECONDS': '0.05',
+            'S3_LOG_MAX_RETRIES': '0',
+        })
+        environment.start()
+        self.addCleanup(environment.stop)
+        os.environ.pop('S3_ENDPOINT_URL', None)
+        aws = mock_aws()
+        aws.start()
+        self.addCleanup(aws.stop)
+        self.s3 = boto3.client('s3', region_name='us-east-1')
+
+    def objects(self):
+        listed = self.s3.list_objects_v2(Bucket=BUCKET).get('Contents', [])
+        return {item['Key']: self.s3.get_object(Bucket=BUCKET, Key=item['Key'])['Body'].read() for item in listed}
+
+    def test_entries_are_shipped_as_segments_per_level(self):
+        self.s3.create_bucket(Bucket=BUCKET)
+        logger = S3Logger()
+        self.addCleanup(logger.close, 1)
+        for i in range(3):
+            logger.log(f"info {i}", LogLevel.INFO)
+        logger.log("error 0", LogLevel.ERROR)
+
+        self.assertTrue(logger.flush(timeout=10))
+        objects = self.objects()
+        messages = {}
+        for key, body in objects.items():
+            self.assertTrue(key.startswith('logs/uniquip-test/'), key)
+            self.assertTrue(key.endswith('.jsonl.gz'), key)
+            level = key.split('/')[2]
+            entries = [json.loads(line) for line in gzip.decompress(body).decode('utf-8').splitlines()]
+            self.assertTrue(all(entry['level'].lower() == level for entry in entries))
+            messages.setdefault(level, []).extend(entry['message'] for entry in entries)
+        self.assertEqual(sorted(messages['info']), ['info 0', 'info 1', 'info 2'])
+        self.assertEqual(messages['error'], ['error 0'])
+        self.assertEqual(logger.stats()['shipped'], 4)
+        self.assertEqual(logger.stats()['failed'], 0)
+
+    def test_failed_shipping_is_counted_and_logged(self):
+        # No bucket: every put fails.
+        logger = S3Logger()
+        self.addCleanup(logger.close, 1)
+        with self.assertLogs('uniquip.utils.s3_logger', 'ERROR') as logs:
+            logger.log("lost", LogLevel.WARNING)
+            self.assertTrue(logger.flush(timeout=10))
+        self.assertIn("Error writing 1 log entries to S3", logs.output[0])
+        self.assertEqual(logger.stats()['failed'], 1)
+        self.assertEqual(logger.stats()['shipped'], 0)
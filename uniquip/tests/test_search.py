@@ -0,0 +1,31 @@
+from django.db import connection
+from django.test import TestCase
+
+from uniquip.models import Equipment
+from uniquip.utils.search import EquipmentSearchIndex
+
+
+class SearchIndexVersionTests(TestCase):
+    """An index loaded in one process must see Equipment written through another one."""
+
+    def setUp(self):
+        with connection.cursor() as cursor:
+            cursor.execute("INSERT INTO uniquip.Labs (LabId, LabName, LabLocation, OpenHours, CloseHours) "
+                           "VALUES (1, 'Lab', 'Room 1', '08:00:00', '20:00:00')")
+            cursor.execute("INSERT INTO uniquip.Equipments (EquipmentId, LabId, EquipmentName, Category, "
+                           "IsReservable, ApprovalRequired) VALUES (1, 1, 'Microscope 1', 'Microscope', 1, 0)")
+        # Stands in for another worker's index; the Equipment signals only update this process's singleton.
+        self.other = EquipmentSearchIndex()
+        self.assertEqual(self.other.substring_ids('microscope'), {1})
+
+    def test_sees_created_equipment(self):
+        Equipment.objects.create(EquipmentId=2, Lab_id=1, EquipmentName='Centrifuge', Category='Centrifuge',
+                                 IsReservable=True, ApprovalRequired=False)
+        self.assertEqual(self.other.substring_ids('centrifuge'), {2})
+
+    def test_sees_renamed_equipment(self):
+        equipment = Equipment.objects.get(EquipmentId=1)
+        equipment.EquipmentName = 'Spectrometer 1'
+        equipment.save()
+        self.assertEqual(self.other.substring_ids('spectrometer'), {1})
+        self.assertEqual(self.other.substring_ids('microscope 1'), set())
@@ -0,0 +1,63 @@
+import tracemalloc
+
+from django.db import connection
+from django.test import TransactionTestCase
+
+from uniquip.benchmarks import data
+from uniquip.benchmarks.streaming import _serve
+from uniquip.utils.response_cache import EQUIPMENT, response_cache
+
+PATH = '/api/equipments/faculty/1/'
+SMALL = 2000
+LARGE = 20000
+
+
+class StreamingMemoryTests(TransactionTestCase):
+    """Peak memory of one request as the result set grows tenfold (what the streaming_memory benchmark measures)."""
+
+    def setUp(self):
+        with connection.cursor() as cursor:
+            cursor.execute("INSERT INTO uniquip.Faculty (FacultyId, Name, Email) VALUES (1, 'F', 'f@example.edu')")
+            cursor.execute("INSERT INTO uniquip.Courses (CRN, CourseCode, CourseName, Credits, FacultyId) "
+                           "VALUES (10000, 'CS 100', 'Course', 3, 1)")
+            cursor.execute("INSERT INTO uniquip.Labs (LabId, LabName, LabLocation, OpenHours, CloseHours) "
+                           "VALUES (1, 'Lab', 'Room 1', '08:00:00', '20:00:00')")
+            cursor.execute("INSERT INTO uniquip.CourseLab (CRN, LabId) VALUES (10000, 1)")
+
+    def tearDown(self):
+        data.flush()
+
+    def load_equipment(self, count):
+        with connection.cursor() as cursor:
+            cursor.execute("DELETE FROM uniquip.Equipments")
+            cursor.executemany(
+                "INSERT INTO uniquip.Equipments (EquipmentId, LabId, EquipmentName, Category, IsReservable, "
+                "ApprovalRequired) VALUES (%s, 1, %s, 'Microscope', 1, 0)",
+                [(equipment_id, f"Microscope {equipment_id:08d}") for equipment_id in range(1, count + 1)])
+
+    def peak_bytes(self, rows, params):
+        self.load_equipment(rows)
+        _serve(PATH, params)
+        # The buffered response is cached; measure building it, not serving it from the cache.
+        response_cache.bump(EQUIPMENT)
+        tracemalloc.start()
+        try:
+            status_code, sent = _serve(PATH, params)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        self.assertEqual(status_code, 200)
+        self.assertGreater(sent, rows * 50)
+        return peak
+
+    def test_streamed_peak_does_not_grow_with_rows(self):
+        small = self.peak_bytes(SMALL, {'stream': '1'})
+        large = self.peak_bytes(LARGE, {'stream': '1'})
+        self.assertLess(large, small * 1.5 + 256 * 1024,
+                        f"peak grew from {small} to {large} bytes for {LARGE // SMALL}x the rows")
+
+    def test_buffered_peak_grows_with_rows(self):
+        # Shows the measurement can see the growth the streamed test rules out.
+        small = self.peak_bytes(SMALL, {})
+        large = self.peak_bytes(LARGE, {})
+        self.assertGreater(large, small * 3)
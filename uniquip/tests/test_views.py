@@ -0,0 +1,28 @@
+from django.test import SimpleTestCase
+from rest_framework.test import APIRequestFactory
+
+from uniquip.views import BulkApproveReservationsView, BulkCreateReservations
+
+
+class RequestValidationTests(SimpleTestCase):
+    """Malformed bodies are rejected with 400 before any query runs."""
+
+    def post(self, view, path, body):
+        return view.as_view()(APIRequestFactory().post(path, body, format='json'))
+
+    def patch(self, view, path, body):
+        return view.as_view()(APIRequestFactory().patch(path, body, format='json'))
+
+    def test_bulk_create_rejects_reservations_that_are_not_a_list_of_objects(self):
+        for reservations in (5, 'x', {'EquipmentId': 1}, [1], [{'EquipmentId': 1}, 'x']):
+            with self.subTest(Reservations=reservations):
+                response = self.post(BulkCreateReservations, '/api/reservations/bulk-create/',
+                                     {'NetId': 's000000', 'Reservations': reservations})
+                self.assertEqual(response.status_code, 400)
+
+    def test_bulk_approve_rejects_ids_that_are_not_a_list_of_integers(self):
+        for reservation_ids in (5, '5', {'1': 1}, ['a'], [1, None], [True]):
+            with self.subTest(ReservationIds=reservation_ids):
+                response = self.patch(BulkApproveReservationsView, '/api/reservations/approve/bulk/',
+                                      {'ReservationIds': reservation_ids})
+                self.assertEqual(response.status_code, 400)
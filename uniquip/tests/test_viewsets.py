@@ -0,0 +1,43 @@
+from django.test import TransactionTestCase
+from rest_framework.test import APIRequestFactory
+
+from uniquip.benchmarks import data
+from uniquip.benchmarks.viewsets import QUERY_BUDGET, _StockEquipmentViewSet, _StockReservationViewSet
+from uniquip.views import EquipmentViewSet, ReservationViewSet
+
+COUNTS = {'students': 50, 'faculty': 5, 'courses': 10, 'labs': 3, 'equipment_per_lab': 40, 'courses_per_student': 2,
+          'reservations': 500, 'days': 20}
+
+
+class CompiledViewSetTests(TransactionTestCase):
+    """The compiled list path against the stock ModelViewSet it replaced (the viewset_pages benchmark)."""
+
+    def setUp(self):
+        data.SyntheticData(seed=0, **COUNTS).load()
+
+    def tearDown(self):
+        data.flush()
+
+    def list_page(self, viewset, path, **params):
+        response = viewset.as_view({'get': 'list'})(APIRequestFactory().get(path, params))
+        response.render()
+        self.assertEqual(response.status_code, 200)
+        return response.content
+
+    def assert_compiled_matches_stock(self, stock, compiled, path, **params):
+        expected = self.list_page(stock, path, **params)
+        with self.assertNumQueries(QUERY_BUDGET):
+            content = self.list_page(compiled, path, **params)
+        self.assertEqual(content, expected)
+
+    def test_reservations_list(self):
+        for params in ({'page_size': 100}, {'page_size': 100, 'page': 3}, {'page_size': 25, 'equipment_id': 1}):
+            with self.subTest(**params):
+                self.assert_compiled_matches_stock(_StockReservationViewSet, ReservationViewSet, '/api/reservations/',
+                                                   **params)
+
+    def test_equipments_list(self):
+        for params in ({'page_size': 100}, {'page_size': 50, 'page': 2}):
+            with self.subTest(**params):
+                self.assert_compiled_matches_stock(_StockEquipmentViewSet, EquipmentViewSet, '/api/equipments/',
+                                                   **params)
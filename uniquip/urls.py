@@ -36,11 +36,19 @@ router.register(r'reservations', views.ReservationViewSet)
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/equipment-availability/', views.EquipmentAvailability.as_view(), name='equipment-availability'),
+    path('api/equipment-availability/batch/', views.BatchEquipmentAvailability.as_view(),
+         name='equipment-availability-batch'),
+    path('api/labs/<int:lab_id>/heatmap/', views.LabHeatmapView.as_view(), name='lab-heatmap'),
     path('api/reservations/create/', views.CreateReservations.as_view(), name='create'),
+    path('api/reservations/bulk-create/', views.BulkCreateReservations.as_view(), name='bulk-create'),
+    path('api/reservations/recurring/', views.RecurringReservationView.as_view(), name='recurring-reservations'),
     path('api/equipments-list/', views.EquipmentListView.as_view(), name='equipment-list'),
+    path('api/equipments/search/', views.EquipmentSearchView.as_view(), name='equipment-search'),
     path('api/equipments/filter-value', views.CourseListView.as_view(), name='course-list'),
     path('api/reservations/delete/<int:reservation_id>/', views.DeleteReservationView.as_view(), name='delete-reservation'),
     path('api/reservations/faculty/<int:faculty_id>/', views.FacultyReservationListView.as_view(), name='faculty-reservations'),
+    path('api/reservations/export/', views.ReservationExportView.as_view(), name='reservation-export'),
+    path('api/reservations/approve/bulk/', views.BulkApproveReservationsView.as_view(), name='bulk-approve'),
     path('api/reservations/approve/<int:reservation_id>/', views.ApproveReservationView.as_view(), name='approve-reservation'),
     path('api/equipment/update/<int:pk>/', views.EquipmentUpdateView.as_view(), name='update-equipment'),
     path('api/equipments/faculty/<int:faculty_id>/', views.FacultyEquipmentListView.as_view(), name='faculty-equipment-list'),
@@ -48,5 +56,18 @@ urlpatterns = [
     path('api/equipment/toggle-reservability/<int:equipment_id>/', views.ToggleEquipmentReservability.as_view(),
          name='toggle-equipment-reservability'),
     path('api/courseload/', views.CourseLoadView.as_view(), name='courseload'),
+    path('api/cache/stats/', views.ResponseCacheStatsView.as_view(), name='response-cache-stats'),
+    path('api/db/pool-stats/', views.DatabasePoolStatsView.as_view(), name='db-pool-stats'),
+    path('metrics', views.MetricsView.as_view(), name='metrics'),
+    # Async variants of the hot read endpoints, for ASGI deployments
+    path('api/async/equipment-availability/', views.AsyncReadView.as_view(view_class=views.EquipmentAvailability),
+         name='async-equipment-availability'),
+    path('api/async/equipments-list/', views.AsyncReadView.as_view(view_class=views.EquipmentListView),
+         name='async-equipment-list'),
+    path('api/async/equipments/faculty/<int:faculty_id>/',
+         views.AsyncReadView.as_view(view_class=views.FacultyEquipmentListView), name='async-faculty-equipment-list'),
+    path('api/async/reservations/faculty/<int:faculty_id>/',
+         views.AsyncReadView.as_view(view_class=views.FacultyReservationListView),
+         name='async-faculty-reservations'),
     path('api/', include(router.urls))
 ]
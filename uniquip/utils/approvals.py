@@ -0,0 +1,234 @@
+from collections import defaultdict
+from contextlib import nullcontext
+from datetime import datetime
+
+from django.db import connection, transaction
+
+from uniquip.utils import usage
+from uniquip.utils.availability import IntervalSet
+from uniquip.utils.occupancy import PENDING_STATUS, REJECTED_STATUS, RESERVED_STATUS, occupancy
+
+APPROVE = 'approve'
+REJECT = 'reject'
+
+# The approver set of a reservation: faculty teaching a course that links the
+# equipment's lab and that the booking student is enrolled in.
+_APPROVERS_SELECT = """
+    SELECT DISTINCT R.ReservationId, Co.FacultyId, %s
+    FROM uniquip.Reservations R
+    JOIN uniquip.Equipments E ON E.EquipmentId = R.EquipmentId
+    JOIN uniquip.CourseLab CL ON CL.LabId = E.LabId
+    JOIN uniquip.Courses Co ON Co.CRN = CL.CRN
+    JOIN uniquip.Enrollments En ON En.CRN = Co.CRN AND En.NetId = R.NetId
+    WHERE R.Status = %s
+"""
+
+
+def enqueue(reservation_ids, cursor=None):
+    """Queue the given reservations for their approvers if they are awaiting approval."""
+    reservation_ids = list(reservation_ids)
+    if not reservation_ids:
+        return
+    placeholders = ", ".join(["%s"] * len(reservation_ids))
+    with _cursor(cursor) as cursor:
+        cursor.execute(f"""
+            INSERT IGNORE INTO uniquip.PendingApprovals (ReservationId, FacultyId, QueuedAt)
+            {_APPROVERS_SELECT}
+                AND R.ReservationId IN ({placeholders})
+        """, [datetime.utcnow(), PENDING_STATUS, *reservation_ids])
+
+
+def dequeue(reservation_ids, cursor=None):
+    reservation_ids = list(reservation_ids)
+    if not reservation_ids:
+        return
+    placeholders = ", ".join(["%s"] * len(reservation_ids))
+    with _cursor(cursor) as cursor:
+        cursor.execute(f"DELETE FROM uniquip.PendingApprovals WHERE ReservationId IN ({placeholders})",
+                       reservation_ids)
+
+
+def rebuild(crns=None, lab_ids=None, net_id=None):
+    """
+    Recompute the whole queue from Reservations; returns the number of queue rows.
+
+    Given ``crns`` and/or ``lab_ids`` (after an enrollment or course-lab
+    change) only pending reservations on the equipment of those labs, or of
+    the labs the CRNs link, are brought up to date, optionally only those of
+    ``net_id``: approvers who no longer qualify are removed and new ones
+    queued, and the rows that remain keep their QueuedAt. Returns the number
+    of queue rows removed plus added.
+    """
+    if crns is not None or lab_ids is not None:
+        return _rebuild_labs(list(crns or ()), list(lab_ids or ()), net_id)
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute("DELETE FROM uniquip.PendingApprovals")
+            cursor.execute(f"""
+                INSERT INTO uniquip.PendingApprovals (ReservationId, FacultyId, QueuedAt)
+                {_APPROVERS_SELECT}
+            """, [datetime.utcnow(), PENDING_STATUS])
+            return cursor.rowcount
+
+
+def _rebuild_labs(crns, lab_ids, net_id):
+    scopes = []
+    params = []
+    if crns:
+        placeholders = ", ".join(["%s"] * len(crns))
+        scopes.append(f"E.LabId IN (SELECT LabId FROM uniquip.CourseLab WHERE CRN IN ({placeholders}))")
+        params += crns
+    if lab_ids:
+        placeholders = ", ".join(["%s"] * len(lab_ids))
+        scopes.append(f"E.LabId IN ({placeholders})")
+        params += lab_ids
+    if not scopes:
+        return 0
+    scope = f"({' OR '.join(scopes)}) AND (%s IS NULL OR R.NetId = %s)"
+    params += [net_id, net_id]
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(f"""
+                DELETE PA
+                FROM uniquip.PendingApprovals PA
+                JOIN uniquip.Reservations R ON R.ReservationId = PA.ReservationId
+                JOIN uniquip.Equipments E ON E.EquipmentId = R.EquipmentId
+                WHERE {scope}
+                    AND NOT EXISTS (
+                        SELECT 1
+                        FROM uniquip.CourseLab CL
+                        JOIN uniquip.Courses Co ON Co.CRN = CL.CRN
+                        JOIN uniquip.Enrollments En ON En.CRN = Co.CRN AND En.NetId = R.NetId
+                        WHERE CL.LabId = E.LabId AND Co.FacultyId = PA.FacultyId
+                    )
+            """, params)
+            removed = cursor.rowcount
+            cursor.execute(f"""
+                INSERT IGNORE INTO uniquip.PendingApprovals (ReservationId, FacultyId, QueuedAt)
+                {_APPROVERS_SELECT}
+                    AND {scope}
+            """, [datetime.utcnow(), PENDING_STATUS, *params])
+            return removed + cursor.rowcount
+
+
+def pending_for_faculty(faculty_id, since=None, after=None, limit=None):
+    """Pending reservations queued for ``faculty_id``, oldest ReservationId first."""
+    with connection.cursor() as cursor:
+        cursor.execute(*pending_for_faculty_query(faculty_id, since, after, limit))
+        columns = [col[0] for col in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def pending_for_faculty_query(faculty_id, since=None, after=None, limit=None):
+    limit_clause = "LIMIT %s" if limit is not None else ""
+    params = [faculty_id, since, since, after or 0]
+    if limit is not None:
+        params.append(limit)
+    return f"""
+        SELECT PA.ReservationId, E.EquipmentName, S.Name, R.NetId, R.StartTime, R.EndTime, R.Status
+        FROM uniquip.PendingApprovals PA
+        JOIN uniquip.Reservations R ON R.ReservationId = PA.ReservationId
+        JOIN uniquip.Equipments E ON E.EquipmentId = R.EquipmentId
+        JOIN uniquip.Students S ON S.NetId = R.NetId
+        WHERE PA.FacultyId = %s
+            AND (%s IS NULL OR PA.QueuedAt >= %s)
+            AND PA.ReservationId > %s
+        ORDER BY PA.ReservationId
+        {limit_clause}
+    """, params
+
+
+def decide(action, reservation_ids=None, faculty_id=None, equipment_id=None):
+    """
+    Approve or reject many pending reservations in one transaction.
+
+    Targets are the given ``reservation_ids``, or everything queued for
+    ``faculty_id`` (optionally on one ``equipment_id``). Returns
+    ``{ReservationId: outcome}`` with outcomes 'approved', 'rejected',
+    'conflict' (would overlap an approved booking, or an earlier one in the
+    same batch), 'not_pending' or 'not_found'. All transitions are applied
+    with a single UPDATE.
+    """
+    if action not in (APPROVE, REJECT):
+        raise ValueError("Action must be 'approve' or 'reject'")
+    new_status = RESERVED_STATUS if action == APPROVE else REJECTED_STATUS
+
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            if reservation_ids is not None:
+                reservation_ids = sorted({int(reservation_id) for reservation_id in reservation_ids})
+                if not reservation_ids:
+                    return {}
+                cursor.execute(f"""
+                    SELECT ReservationId, EquipmentId, StartTime, EndTime, Status
+                    FROM uniquip.Reservations
+                    WHERE ReservationId IN ({", ".join(["%s"] * len(reservation_ids))})
+                    ORDER BY ReservationId
+                    FOR UPDATE
+                """, reservation_ids)
+            else:
+                cursor.execute("""
+                    SELECT R.ReservationId, R.EquipmentId, R.StartTime, R.EndTime, R.Status
+                    FROM uniquip.PendingApprovals PA
+                    JOIN uniquip.Reservations R ON R.ReservationId = PA.ReservationId
+                    WHERE PA.FacultyId = %s AND (%s IS NULL OR R.EquipmentId = %s)
+                    ORDER BY R.ReservationId
+                    FOR UPDATE
+                """, [faculty_id, equipment_id, equipment_id])
+            rows = cursor.fetchall()
+
+            outcomes = {reservation_id: 'not_found' for reservation_id in reservation_ids or ()}
+            pending = []
+            for row in rows:
+                if row[4] == PENDING_STATUS:
+                    pending.append(row)
+                else:
+                    outcomes[row[0]] = 'not_pending'
+
+            decided = []
+            if action == APPROVE and pending:
+                approved = defaultdict(IntervalSet)
+                equipment_ids = sorted({row[1] for row in pending})
+                cursor.execute(f"""
+                    SELECT EquipmentId, StartTime, EndTime
+                    FROM uniquip.Reservations
+                    WHERE EquipmentId IN ({", ".join(["%s"] * len(equipment_ids))})
+                        AND StartTime < %s
+                        AND EndTime > %s
+                        AND Status = %s
+                    FOR UPDATE
+                """, [*equipment_ids, max(row[3] for row in pending), min(row[2] for row in pending),
+                      RESERVED_STATUS])
+                for booked_equipment_id, start_time, end_time in cursor.fetchall():
+                    approved[booked_equipment_id].add(start_time, end_time)
+                for row in pending:
+                    if approved[row[1]].overlaps(row[2], row[3]):
+                        outcomes[row[0]] = 'conflict'
+                    else:
+                        approved[row[1]].add(row[2], row[3])
+                        decided.append(row)
+            else:
+                decided = pending
+
+            if decided:
+                decided_ids = [row[0] for row in decided]
+                cursor.execute(f"""
+                    UPDATE uniquip.Reservations
+                    SET Status = %s
+                    WHERE ReservationId IN ({", ".join(["%s"] * len(decided_ids))})
+                        AND Status = %s
+                """, [new_status, *decided_ids, PENDING_STATUS])
+                dequeue(decided_ids, cursor)
+                usage.refresh(usage.keys_for(row[1:4] for row in decided), cursor)
+
+    for reservation_id, decided_equipment_id, start_time, end_time, _ in decided:
+        if action == APPROVE:
+            occupancy.approve(decided_equipment_id, start_time, end_time)
+        else:
+            occupancy.remove(decided_equipment_id, start_time, end_time, PENDING_STATUS)
+        outcomes[reservation_id] = 'approved' if action == APPROVE else 'rejected'
+    return outcomes
+
+
+def _cursor(cursor):
+    return nullcontext(cursor) if cursor is not None else connection.cursor()
@@ -0,0 +1,178 @@
+from bisect import bisect_right
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from django.db import connection
+
+SLOT_LENGTH = timedelta(hours=1)
+SLOTS_PER_DAY = 24
+
+RESERVED_STATUS = 'Reserved'
+PENDING_STATUS = 'Approval Required'
+CANCELLED_STATUS = 'Cancelled'
+REJECTED_STATUS = 'Rejected'
+# Statuses that no longer hold their slot.
+INACTIVE_STATUSES = (CANCELLED_STATUS, REJECTED_STATUS)
+
+
+class IntervalSet:
+    """Sorted, non-overlapping [start, end) intervals booked on one piece of equipment."""
+
+    def __init__(self):
+        self.starts = []
+        self.ends = []
+
+    def add(self, start, end):
+        if end <= start:
+            return
+        i = bisect_right(self.starts, start)
+        if i > 0 and self.ends[i - 1] >= start:
+            i -= 1
+            start = self.starts[i]
+            end = max(end, self.ends[i])
+        j = i
+        while j < len(self.starts) and self.starts[j] <= end:
+            end = max(end, self.ends[j])
+            j += 1
+        self.starts[i:j] = [start]
+        self.ends[i:j] = [end]
+
+    def covers(self, instant):
+        i = bisect_right(self.starts, instant) - 1
+        return i >= 0 and self.ends[i] > instant
+
+    def overlaps(self, start, end):
+        i = bisect_right(self.starts, start) - 1
+        if i >= 0 and self.ends[i] > start:
+            return True
+        return i + 1 < len(self.starts) and self.starts[i + 1] < end
+
+    def __len__(self):
+        return len(self.starts)
+
+
+class AvailabilityIndex:
+    """
+    Free hourly slots for a set of equipment over [start, end).
+
+    Reservations overlapping the window are fetched once and kept as an
+    IntervalSet per equipment, so every slot check is a bisect instead of a
+    join against Reservations. Cancelled and rejected reservations do not
+    block a slot, as in the occupancy bitmaps.
+    """
+
+    def __init__(self, start, end):
+        self.start = start
+        self.end = end
+        self.equipment = {}
+        self.booked = defaultdict(IntervalSet)
+
+    @classmethod
+    def load(cls, equipment_ids, start, end):
+        index = cls(start, end)
+        equipment_ids = [int(equipment_id) for equipment_id in equipment_ids]
+        if not equipment_ids:
+            return index
+        index.load_equipment(equipment_ids)
+        placeholders = ", ".join(["%s"] * len(equipment_ids))
+        status_placeholders = ", ".join(["%s"] * len(INACTIVE_STATUSES))
+        with connection.cursor() as cursor:
+            cursor.execute(f"""
+                SELECT EquipmentId, StartTime, EndTime
+                FROM uniquip.Reservations
+                WHERE EquipmentId IN ({placeholders})
+                    AND StartTime < %s
+                    AND EndTime > %s
+                    AND Status NOT IN ({status_placeholders})
+                ORDER BY EquipmentId, StartTime
+            """, equipment_ids + [end, start] + list(INACTIVE_STATUSES))
+            for equipment_id, start_time, end_time in cursor.fetchall():
+                index.booked[equipment_id].add(start_time, end_time)
+        return index
+
+    def load_equipment(self, equipment_ids):
+        placeholders = ", ".join(["%s"] * len(equipment_ids))
+        with connection.cursor() as cursor:
+            cursor.execute(f"""
+                SELECT E.EquipmentId, L.LabId, L.LabName, L.OpenHours, L.CloseHours
+                FROM uniquip.Equipments AS E
+                JOIN uniquip.Labs AS L ON L.LabId = E.LabId
+                WHERE E.EquipmentId IN ({placeholders})
+            """, equipment_ids)
+            for equipment_id, lab_id, lab_name, open_hours, close_hours in cursor.fetchall():
+                self.equipment[equipment_id] = (lab_id, lab_name, open_hours, close_hours)
+
+    def add_reservation(self, equipment_id, start_time, end_time):
+        self.booked[equipment_id].add(start_time, end_time)
+
+    def is_free(self, equipment_id, start_time, end_time):
+        return not self.booked[equipment_id].overlaps(start_time, end_time)
+
+    def is_booked(self, equipment_id, instant):
+        booked = self.booked.get(equipment_id)
+        return booked is not None and booked.covers(instant)
+
+    @staticmethod
+    def equipment_ids_for(lab_id=None, category=None):
+        with connection.cursor() as cursor:
+            cursor.execute("""
+                SELECT EquipmentId
+                FROM uniquip.Equipments
+                WHERE (%s IS NULL OR LabId = %s)
+                    AND (%s IS NULL OR Category = %s)
+                ORDER BY EquipmentId
+            """, [lab_id, lab_id, category, category])
+            return [row[0] for row in cursor.fetchall()]
+
+    def free_grid(self, equipment_id):
+        """Free slot start times (HH:MM:SS) keyed by date."""
+        grid = {}
+        for row in self.free_slots(equipment_id):
+            grid.setdefault(row['TimeSlot'][:10], []).append(row['TimeSlot'][11:])
+        return grid
+
+    def free_slots(self, equipment_id):
+        """
+        Rows in the same shape and order as the old recursive CTE: one row per
+        free hour inside lab opening hours, grouped by the day the hour offset
+        was taken from. The one difference is the 23:00 slot's EndTimeSlot,
+        which is 00:00:00 where the CTE produced 24:00:00; Django reads MySQL
+        TIME as datetime.time, so that value made the old query fail.
+        """
+        if equipment_id not in self.equipment:
+            return []
+        lab_id, lab_name, open_hours, close_hours = self.equipment[equipment_id]
+        results = []
+        day_start = self.start
+        while day_start < self.end:
+            for hour in range(SLOTS_PER_DAY):
+                slot = day_start + hour * SLOT_LENGTH
+                if slot < self.start or slot >= self.end:
+                    continue
+                if not open_hours <= slot.time() < close_hours:
+                    continue
+                if self.is_booked(equipment_id, slot):
+                    continue
+                results.append({
+                    'LabID': lab_id,
+                    'LabName': lab_name,
+                    'OpenHours': open_hours,
+                    'CloseHours': close_hours,
+                    'Day': day_start.date(),
+                    'TimeSlot': slot.strftime('%Y-%m-%d %H:%M:%S'),
+                    'StartTimeSlot': _hour_offset(hour),
+                    'EndTimeSlot': _hour_offset(hour + 1),
+                    'EquipmentId': equipment_id,
+                })
+            day_start += timedelta(days=1)
+        return results
+
+
+def _hour_offset(hours):
+    return (datetime.min + timedelta(hours=hours)).time()
+
+
+def parse_day(value):
+    if 'T' not in value:
+        value = value + "T00:00:00"
+    return datetime.fromisoformat(value)
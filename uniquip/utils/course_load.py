@@ -0,0 +1,197 @@
+from collections import defaultdict
+from contextlib import nullcontext
+from datetime import datetime, time, timedelta
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+# The query CourseLoadView used to run on every request. Rows are multiplied
+# by the CRN's CourseLab links and every status counts; the aggregate keeps
+# both behaviours so the two agree.
+LIVE_QUERY = """
+    SELECT e.CRN, c.CourseName,
+        SUM(TIMESTAMPDIFF(HOUR, StartTime, EndTime)) AS TotalHoursBooked
+    FROM uniquip.Enrollments e
+    LEFT JOIN uniquip.Courses c ON c.CRN = e.CRN
+    INNER JOIN uniquip.CourseLab cl ON cl.CRN = c.CRN
+    LEFT JOIN uniquip.Reservations r ON r.NetId = e.NetId
+    WHERE StartTime >= %s AND EndTime <= %s
+    GROUP BY e.CRN, c.CourseName
+    ORDER BY TotalHoursBooked DESC
+"""
+
+
+def live_course_load(start_threshold, end_threshold):
+    with connection.cursor() as cursor:
+        cursor.execute(LIVE_QUERY, [start_threshold, end_threshold])
+        columns = [col[0] for col in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+AGGREGATE_QUERY = """
+    SELECT L.CRN, C.CourseName, SUM(L.HoursBooked) AS TotalHoursBooked
+    FROM uniquip.CourseLoadDaily L
+    JOIN uniquip.Courses C ON C.CRN = L.CRN
+    WHERE L.Day >= %s AND L.UntilDay <= %s
+    GROUP BY L.CRN, C.CourseName
+    ORDER BY TotalHoursBooked DESC, L.CRN
+"""
+
+
+def course_load(first_day, last_day):
+    """
+    Booked hours per CRN for reservations that start on or after
+    ``first_day`` and end by midnight of ``last_day``: the live query with
+    date thresholds, summed from CourseLoadDaily (AGGREGATE_QUERY).
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(AGGREGATE_QUERY, [first_day, last_day])
+        columns = [col[0] for col in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def until_day(end_time):
+    """First midnight at or after ``end_time``, as a date."""
+    if end_time.time() == time.min:
+        return end_time.date()
+    return end_time.date() + timedelta(days=1)
+
+
+def add(net_id, reservations, sign=1, cursor=None):
+    """
+    Apply a student's written reservations, ``(start_time, end_time)``
+    pairs, to CourseLoadDaily as a delta: ``sign=1`` when they were
+    created, ``-1`` when they were deleted. Every CRN the student is
+    enrolled in gains their hours once per CourseLab link, as the live
+    query counts them.
+
+    Increments are single ``INSERT ... ON DUPLICATE KEY UPDATE`` statements,
+    so bookings by different students of one CRN on one day, which lock
+    different reservations, add up instead of overwriting each other's
+    totals.
+    """
+    reservations = [(_naive(start_time), _naive(end_time)) for start_time, end_time in reservations]
+    if not reservations:
+        return 0
+    with _cursor(cursor) as cursor:
+        cursor.execute("""
+            SELECT e.CRN, COUNT(*)
+            FROM uniquip.Enrollments e
+            JOIN uniquip.Courses c ON c.CRN = e.CRN
+            JOIN uniquip.CourseLab cl ON cl.CRN = c.CRN
+            WHERE e.NetId = %s
+            GROUP BY e.CRN
+        """, [net_id])
+        links = cursor.fetchall()
+        totals = aggregate((crn, start_time, end_time, sign * count)
+                           for crn, count in links for start_time, end_time in reservations)
+        if not totals:
+            return 0
+        # Sorted, so concurrent writers take the key locks in the same order.
+        keys = sorted(totals)
+        cursor.executemany("""
+            INSERT INTO uniquip.CourseLoadDaily (CRN, Day, UntilDay, HoursBooked)
+            VALUES (%s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE HoursBooked = HoursBooked + VALUES(HoursBooked)
+        """, [[*key, totals[key]] for key in keys])
+        if sign < 0:
+            # The live query has no row for a CRN without reservations in the window.
+            cursor.executemany("""
+                DELETE FROM uniquip.CourseLoadDaily
+                WHERE CRN = %s AND Day = %s AND UntilDay = %s AND HoursBooked = 0
+            """, keys)
+    return len(keys)
+
+
+def remove(net_id, reservations, cursor=None):
+    return add(net_id, reservations, sign=-1, cursor=cursor)
+
+
+def refresh(crns, first_day=None, last_day=None, cursor=None):
+    """
+    Recompute CourseLoadDaily for ``crns`` over reservations starting
+    between ``first_day`` and ``last_day`` inclusive (all days when omitted),
+    for when enrollments or CourseLab links change what a reservation counts
+    towards.
+
+    The CRNs' rows are locked before the reservations are read, in one
+    transaction, so a concurrent booking's ``add`` either committed before
+    the read (and is recomputed) or waits and lands on the new totals.
+    """
+    crns = sorted(set(crns))
+    if not crns:
+        return 0
+    placeholders = ", ".join(["%s"] * len(crns))
+    start_filter = day_filter = ""
+    start_params = day_params = []
+    if first_day is not None:
+        start_filter = "AND r.StartTime >= %s AND r.StartTime < %s"
+        start_params = [datetime.combine(first_day, time.min), datetime.combine(last_day + timedelta(days=1), time.min)]
+        day_filter = "AND Day >= %s AND Day <= %s"
+        day_params = [first_day, last_day]
+
+    with transaction.atomic(), _cursor(cursor) as cursor:
+        cursor.execute(f"""
+            SELECT CRN
+            FROM uniquip.CourseLoadDaily
+            WHERE CRN IN ({placeholders}) {day_filter}
+            FOR UPDATE
+        """, crns + day_params)
+        cursor.execute(f"""
+            SELECT e.CRN, r.StartTime, r.EndTime, COUNT(*)
+            FROM uniquip.Enrollments e
+            JOIN uniquip.Courses c ON c.CRN = e.CRN
+            JOIN uniquip.CourseLab cl ON cl.CRN = c.CRN
+            JOIN uniquip.Reservations r ON r.NetId = e.NetId
+            WHERE e.CRN IN ({placeholders}) {start_filter}
+            GROUP BY e.CRN, r.StartTime, r.EndTime
+        """, crns + start_params)
+        totals = aggregate(cursor.fetchall())
+
+        cursor.execute(f"""
+            DELETE FROM uniquip.CourseLoadDaily
+            WHERE CRN IN ({placeholders}) {day_filter}
+        """, crns + day_params)
+        if totals:
+            cursor.executemany("""
+                INSERT INTO uniquip.CourseLoadDaily (CRN, Day, UntilDay, HoursBooked)
+                VALUES (%s, %s, %s, %s)
+            """, [[*key, hours] for key, hours in totals.items()])
+    return len(totals)
+
+
+def aggregate(rows):
+    """Sum (crn, start, end, multiplicity) rows into {(crn, day, until_day): hours}."""
+    totals = defaultdict(int)
+    for crn, start_time, end_time, multiplicity in rows:
+        # TIMESTAMPDIFF(HOUR, ...) truncates towards zero.
+        hours = int((end_time - start_time).total_seconds() / 3600)
+        totals[(crn, start_time.date(), until_day(end_time))] += hours * multiplicity
+    return totals
+
+
+def rebuild():
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT DISTINCT CRN FROM uniquip.CourseLab")
+        crns = [row[0] for row in cursor.fetchall()]
+        with transaction.atomic():
+            cursor.execute("DELETE FROM uniquip.CourseLoadDaily")
+            return refresh(crns, cursor=cursor)
+
+
+def check(first_day, last_day):
+    """Differences between the aggregate and the live query for a date window, as (CRN, aggregate, live)."""
+    expected = {row['CRN']: int(row['TotalHoursBooked'] or 0)
+                for row in live_course_load(datetime.combine(first_day, time.min),
+                                            datetime.combine(last_day, time.min))}
+    actual = {row['CRN']: int(row['TotalHoursBooked'] or 0) for row in course_load(first_day, last_day)}
+    return [(crn, actual.get(crn), expected.get(crn))
+            for crn in sorted(expected.keys() | actual.keys()) if actual.get(crn) != expected.get(crn)]
+
+
+def _naive(value):
+    return timezone.make_naive(value, timezone.utc) if timezone.is_aware(value) else value
+
+
+def _cursor(cursor):
+    return nullcontext(cursor) if cursor is not None else connection.cursor()
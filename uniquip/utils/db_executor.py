@@ -0,0 +1,62 @@
+import asyncio
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from django.conf import settings
+from django.db import close_old_connections
+
+
+class DatabaseExecutor:
+    """
+    Bounded thread pool for running blocking ORM/cursor work from async views.
+
+    Under ASGI Django gives every request running a sync view a thread of
+    its own, so a burst of requests means a burst of threads and database
+    connections. Async views hand their database work to this pool instead:
+    at most ASYNC_DB_WORKERS calls run at once, each on its thread's
+    connection (so the pool also caps connections), and the caller's
+    contextvars (the current trace span) are carried into the thread.
+    Connections are released after every call, as at the end of a request.
+    """
+
+    def __init__(self, max_workers=None):
+        self.max_workers = max_workers or getattr(settings, 'ASYNC_DB_WORKERS', 16)
+        self._executor = None
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='uniquip-db')
+        return self._executor
+
+    async def run(self, func, *args, **kwargs):
+        context = contextvars.copy_context()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, partial(context.run, _call, func, args, kwargs))
+
+    def stats(self):
+        executor = self._executor
+        return {
+            'max_workers': self.max_workers,
+            'threads': len(executor._threads) if executor is not None else 0,
+            'queued': executor._work_queue.qsize() if executor is not None else 0,
+        }
+
+
+def _call(func, args, kwargs):
+    # Like the request_started/request_finished handlers: connections past CONN_MAX_AGE or broken are
+    # dropped before the call, and afterwards (with CONN_MAX_AGE = 0) handed back to the pool rather
+    # than held by an idle executor thread.
+    close_old_connections()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+database_executor = DatabaseExecutor()
@@ -0,0 +1,117 @@
+import threading
+import time
+from collections import OrderedDict, defaultdict
+
+from django.conf import settings
+from django.db import connection
+
+
+class Eligibility:
+    __slots__ = ('course_labs', 'crns', 'loaded_at')
+
+    def __init__(self, course_labs, crns, loaded_at):
+        self.course_labs = course_labs
+        self.crns = crns
+        self.loaded_at = loaded_at
+
+    @property
+    def course_codes(self):
+        return sorted(self.course_labs)
+
+    def lab_ids(self, course_code=None):
+        if course_code is None:
+            return sorted(set().union(*self.course_labs.values()))
+        return sorted(self.course_labs.get(course_code, ()))
+
+
+class StudentEligibilityCache:
+    """
+    LRU map from NetId to the labs each of the student's courses unlocks.
+
+    This is the Students -> Enrollments -> CourseLab join the equipment list
+    and filter-value endpoints used to redo per request. It is kept at lab
+    level, so Equipment changes never invalidate it: the equipment query
+    applies IsReservable/ApprovalRequired itself. Enrollment changes drop
+    the student's entry; CourseLab and Course changes drop every student of
+    that CRN. Entries also expire after ELIGIBILITY_TTL_SECONDS to pick up
+    writes made outside this process.
+    """
+
+    def __init__(self, max_entries=None, ttl=None):
+        self.max_entries = max_entries or getattr(settings, 'ELIGIBILITY_CACHE_SIZE', 10000)
+        self.ttl = ttl if ttl is not None else getattr(settings, 'ELIGIBILITY_TTL_SECONDS', 300)
+        self.entries = OrderedDict()
+        self.students_by_crn = defaultdict(set)
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, net_id):
+        with self.lock:
+            entry = self.entries.get(net_id)
+            if entry is not None and time.monotonic() - entry.loaded_at <= self.ttl:
+                self.entries.move_to_end(net_id)
+                self.hits += 1
+                return entry
+            self.misses += 1
+
+        with connection.cursor() as cursor:
+            cursor.execute("""
+                SELECT C.CourseCode, C.CRN, CL.LabId
+                FROM uniquip.Enrollments E
+                JOIN uniquip.Courses C ON E.CRN = C.CRN
+                LEFT JOIN uniquip.CourseLab CL ON CL.CRN = C.CRN
+                WHERE E.NetId = %s
+            """, [net_id])
+            rows = cursor.fetchall()
+
+        course_labs = defaultdict(set)
+        crns = set()
+        for course_code, crn, lab_id in rows:
+            # A CRN without labs yet is still indexed, so linking it to one drops this entry.
+            crns.add(crn)
+            if lab_id is not None:
+                course_labs[course_code].add(lab_id)
+        entry = Eligibility({code: frozenset(labs) for code, labs in course_labs.items()}, frozenset(crns),
+                            time.monotonic())
+
+        with self.lock:
+            self._drop(net_id)
+            self.entries[net_id] = entry
+            for crn in crns:
+                self.students_by_crn[crn].add(net_id)
+            while len(self.entries) > self.max_entries:
+                self._drop(next(iter(self.entries)))
+        return entry
+
+    def invalidate_student(self, net_id):
+        with self.lock:
+            self._drop(net_id)
+
+    def invalidate_course(self, crn):
+        with self.lock:
+            for net_id in list(self.students_by_crn.pop(crn, ())):
+                self._drop(net_id)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.students_by_crn.clear()
+
+    def _drop(self, net_id):
+        entry = self.entries.pop(net_id, None)
+        if entry is None:
+            return
+        for crn in entry.crns:
+            students = self.students_by_crn.get(crn)
+            if students is not None:
+                students.discard(net_id)
+                if not students:
+                    del self.students_by_crn[crn]
+
+    def stats(self):
+        with self.lock:
+            return {'entries': len(self.entries), 'hits': self.hits, 'misses': self.misses}
+
+
+student_eligibility = StudentEligibilityCache()
@@ -0,0 +1,109 @@
+import csv
+import io
+import zlib
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from rest_framework.utils.encoders import JSONEncoder
+
+from uniquip.filters import ReservationFilter
+from uniquip.models import Reservation
+
+NDJSON = 'ndjson'
+CSV = 'csv'
+FORMATS = {NDJSON: 'application/x-ndjson', CSV: 'text/csv'}
+
+COLUMNS = ('ReservationId', 'EquipmentId', 'EquipmentName', 'LabId', 'LabName', 'NetId', 'StartTime', 'EndTime',
+           'Status')
+_FIELDS = ('ReservationId', 'Equipment_id', 'Equipment__EquipmentName', 'Equipment__Lab_id', 'Equipment__Lab__LabName',
+           'NetId_id', 'StartTime', 'EndTime', 'Status')
+
+_encoder = JSONEncoder(ensure_ascii=False, separators=(',', ':'), allow_nan=False)
+
+
+class ExportError(ValueError):
+    pass
+
+
+def filtered_queryset(filters):
+    """Reservations matching ``filters`` under the same rules as ReservationFilter on /api/reservations/."""
+    filterset = ReservationFilter(filters, queryset=Reservation.objects.all())
+    if not filterset.is_valid():
+        raise ExportError('; '.join(f"{name}: {' '.join(errors)}" for name, errors in filterset.errors.items()))
+    return filterset.qs
+
+
+def export_rows(queryset, chunk_size=None):
+    """
+    Yield ``queryset`` as tuples in COLUMNS order, ReservationId ascending.
+
+    Rows are read in keyset chunks (``ReservationId > last`` ... ``LIMIT
+    chunk_size``) so every chunk is an index range scan however deep the
+    export is, and only one chunk is held at a time.
+    """
+    chunk_size = chunk_size or getattr(settings, 'EXPORT_CHUNK_SIZE', 5000)
+    queryset = queryset.order_by('ReservationId').values_list(*_FIELDS)
+    last_id = None
+    while True:
+        chunk = queryset if last_id is None else queryset.filter(ReservationId__gt=last_id)
+        rows = list(chunk[:chunk_size])
+        yield from rows
+        if len(rows) < chunk_size:
+            return
+        last_id = rows[-1][0]
+
+
+def encode(rows, export_format, chunk_rows=1000):
+    """Encode rows as NDJSON lines or CSV (with a header), yielding a bytes chunk every ``chunk_rows`` rows."""
+    buffer = io.StringIO()
+    if export_format == CSV:
+        writer = csv.writer(buffer)
+        writer.writerow(COLUMNS)
+        write = writer.writerow
+    else:
+        def write(row):
+            buffer.write(_encoder.encode(dict(zip(COLUMNS, row))))
+            buffer.write('\n')
+    pending = 0
+    for row in rows:
+        if export_format == CSV:
+            row = [value.isoformat() if hasattr(value, 'isoformat') else value for value in row]
+        write(row)
+        pending += 1
+        if pending >= chunk_rows:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+
+def gzipped(chunks, level=6):
+    """Incrementally gzip a stream of bytes chunks."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export(filters, export_format=NDJSON, compress=False, chunk_size=None):
+    """Bytes chunks of the filtered reservation export; filters are validated before anything is yielded."""
+    if export_format not in FORMATS:
+        raise ExportError(f"export_format must be one of {', '.join(FORMATS)}")
+    chunks = encode(export_rows(filtered_queryset(filters), chunk_size), export_format)
+    return gzipped(chunks) if compress else chunks
+
+
+def export_response(chunks, export_format, compress=False):
+    content_type = 'application/gzip' if compress else FORMATS[export_format]
+    response = StreamingHttpResponse(chunks, content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename(export_format, compress)}"'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def filename(export_format, compress=False):
+    return f"reservations.{export_format}" + ('.gz' if compress else '')
@@ -0,0 +1,72 @@
+import os
+import threading
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+
+
+class HiLoAllocator:
+    """
+    Hands out primary keys from blocks leased off a row in IdSequences.
+
+    Each process leases ``block_size`` ids at a time with a short
+    SELECT ... FOR UPDATE transaction and then serves them from memory, so
+    concurrent writers never share an id and the hot path does no MAX()
+    probe. Ids left in a block when the process exits are skipped, not
+    reused. The first lease seeds the sequence from MAX(column) + 1.
+    """
+
+    def __init__(self, name, table, column, block_size=None):
+        self.name = name
+        self.table = table
+        self.column = column
+        self.block_size = block_size or getattr(settings, 'ID_ALLOCATOR_BLOCK_SIZE', 100)
+        self.lock = threading.Lock()
+        self.pid = None
+        self.next_id = 0
+        self.limit = 0
+
+    def allocate(self, count=1):
+        with self.lock:
+            if self.pid != os.getpid():
+                # A forked worker must not serve the block its parent leased.
+                self.pid = os.getpid()
+                self.next_id = self.limit = 0
+            ids = []
+            while len(ids) < count:
+                if self.next_id >= self.limit:
+                    self._lease(max(self.block_size, count - len(ids)))
+                take = min(count - len(ids), self.limit - self.next_id)
+                ids.extend(range(self.next_id, self.next_id + take))
+                self.next_id += take
+            return ids
+
+    def _lease(self, size):
+        if connection.in_atomic_block:
+            raise RuntimeError(f"{self.name} ids must be allocated outside a transaction, "
+                               "otherwise a rollback would hand the same block out twice")
+        while True:
+            try:
+                with transaction.atomic():
+                    with connection.cursor() as cursor:
+                        cursor.execute("SELECT NextValue FROM uniquip.IdSequences WHERE Name = %s FOR UPDATE",
+                                       [self.name])
+                        row = cursor.fetchone()
+                        if row is None:
+                            cursor.execute(f"SELECT COALESCE(MAX({self.column}), 0) + 1 FROM uniquip.{self.table}")
+                            start = cursor.fetchone()[0]
+                            cursor.execute("INSERT INTO uniquip.IdSequences (Name, NextValue) VALUES (%s, %s)",
+                                           [self.name, start + size])
+                        else:
+                            start = row[0]
+                            cursor.execute("UPDATE uniquip.IdSequences SET NextValue = %s WHERE Name = %s",
+                                           [start + size, self.name])
+                break
+            except IntegrityError:
+                # Another process seeded the sequence first; lease from its row instead.
+                continue
+        self.next_id = start
+        self.limit = start + size
+
+
+reservation_ids = HiLoAllocator('reservations', 'Reservations', 'ReservationId')
@@ -0,0 +1,353 @@
+import bisect
+import json
+import math
+import mmap
+import os
+import re
+import struct
+import threading
+
+from django.conf import settings
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+METHODS = frozenset(('GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'))
+
+_HEADER = struct.Struct('<Q')
+_LENGTH = struct.Struct('<I')
+_VALUE = struct.Struct('<d')
+_FILE_NAME = re.compile(r'^metrics-(\d+)\.db$')
+
+
+def _padded(length):
+    # Key length prefix plus key, rounded up so every value sits on an 8-byte boundary.
+    size = _LENGTH.size + length
+    return size + (-size % 8)
+
+
+def _entries(data, used):
+    position = _HEADER.size
+    while position < used:
+        length = _LENGTH.unpack_from(data, position)[0]
+        key = bytes(data[position + _LENGTH.size:position + _LENGTH.size + length]).decode('utf-8')
+        offset = position + _padded(length)
+        yield key, _VALUE.unpack_from(data, offset)[0], offset
+        position = offset + _VALUE.size
+
+
+class MetricsFile:
+    """
+    One process's samples in a memory-mapped file: an 8-byte header holding
+    the bytes in use, then ``<key length><key><float64 value>`` entries.
+
+    Only the owning process writes, so there is no cross-process locking;
+    a new entry is written in full before the header moves past it, so a
+    reader in another process never sees half of one. The file doubles in
+    size when it fills up. Reopening an existing file (a restarted worker
+    that got the same pid) carries on from its values.
+    """
+
+    def __init__(self, path, initial_size=64 * 1024):
+        self.path = path
+        self._lock = threading.Lock()
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        size = os.fstat(self._fd).st_size
+        if size < initial_size:
+            os.ftruncate(self._fd, initial_size)
+            size = initial_size
+        self._map = mmap.mmap(self._fd, size)
+        self._used = _HEADER.unpack_from(self._map, 0)[0] or _HEADER.size
+        self._offsets = {key: offset for key, _, offset in _entries(self._map, self._used)}
+
+    def add(self, updates):
+        """Add each ``(key, amount)`` pair, under one lock acquisition."""
+        with self._lock:
+            for key, amount in updates:
+                offset = self._offsets.get(key)
+                if offset is None:
+                    offset = self._append(key)
+                _VALUE.pack_into(self._map, offset, _VALUE.unpack_from(self._map, offset)[0] + amount)
+
+    def set(self, key, value):
+        with self._lock:
+            offset = self._offsets.get(key)
+            if offset is None:
+                offset = self._append(key)
+            _VALUE.pack_into(self._map, offset, value)
+
+    def _append(self, key):
+        encoded = key.encode('utf-8')
+        offset = self._used + _padded(len(encoded))
+        end = offset + _VALUE.size
+        if end > len(self._map):
+            self._grow(end)
+        _LENGTH.pack_into(self._map, self._used, len(encoded))
+        self._map[self._used + _LENGTH.size:self._used + _LENGTH.size + len(encoded)] = encoded
+        _VALUE.pack_into(self._map, offset, 0.0)
+        # Published last, so readers only ever see complete entries.
+        _HEADER.pack_into(self._map, 0, end)
+        self._used = end
+        self._offsets[key] = offset
+        return offset
+
+    def _grow(self, needed):
+        size = len(self._map)
+        while size < needed:
+            size *= 2
+        self._map.close()
+        os.ftruncate(self._fd, size)
+        self._map = mmap.mmap(self._fd, size)
+
+    def close(self):
+        with self._lock:
+            self._map.close()
+            os.close(self._fd)
+
+
+def read(path):
+    """The ``(key, value)`` pairs of a metrics file, read without mapping or locking it."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    if len(data) < _HEADER.size:
+        return
+    used = min(_HEADER.unpack_from(data, 0)[0], len(data))
+    for key, value, _ in _entries(data, used):
+        yield key, value
+
+
+_process_values = None
+_process_lock = threading.Lock()
+
+
+def directory():
+    return getattr(settings, 'METRICS_DIRECTORY', 'metrics')
+
+
+def _values():
+    values = _process_values
+    if values is None:
+        values = _open()
+    return values or None
+
+
+def _open():
+    global _process_values
+    with _process_lock:
+        if _process_values is None:
+            if getattr(settings, 'METRICS_ENABLED', True):
+                os.makedirs(directory(), exist_ok=True)
+                _process_values = MetricsFile(os.path.join(directory(), f"metrics-{os.getpid()}.db"))
+            else:
+                _process_values = False
+        return _process_values
+
+
+def _after_fork():
+    # A forked worker writes its own file, not the one it inherited from the parent.
+    global _process_values, _process_lock
+    _process_values = None
+    _process_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_after_fork)
+
+
+_metrics = {}
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._keys = {}
+        _metrics[name] = self
+
+    def _key(self, suffix, label_values, le=None):
+        return json.dumps([self.name, suffix, list(label_values), le])
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, *label_values, amount=1):
+        values = _values()
+        if values is not None:
+            values.add(self.updates(amount, label_values))
+
+    def updates(self, amount, label_values):
+        key = self._keys.get(label_values)
+        if key is None:
+            key = self._keys[label_values] = self._key('', label_values)
+        return ((key, amount),)
+
+
+class Gauge(_Metric):
+    """Last value set by each live process, summed across processes."""
+
+    kind = 'gauge'
+
+    def set(self, value, *label_values):
+        values = _values()
+        if values is None:
+            return
+        key = self._keys.get(label_values)
+        if key is None:
+            key = self._keys[label_values] = self._key('', label_values)
+        values.set(key, value)
+
+
+class Histogram(_Metric):
+    """
+    Buckets are stored per bucket rather than cumulatively, so an
+    observation is three additions; ``render`` accumulates them.
+    """
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, amount, *label_values):
+        values = _values()
+        if values is not None:
+            values.add(self.updates(amount, label_values))
+
+    def updates(self, amount, label_values):
+        keys = self._keys.get(label_values)
+        if keys is None:
+            keys = self._keys[label_values] = (
+                [self._key('_bucket', label_values, _bound(bound)) for bound in self.buckets],
+                self._key('_sum', label_values),
+                self._key('_count', label_values),
+            )
+        buckets, total, count = keys
+        return (buckets[bisect.bisect_left(self.buckets, amount)], 1), (total, amount), (count, 1)
+
+
+request_duration = Histogram(
+    'uniquip_http_request_duration_seconds', 'Time to the response, by route, method and status.',
+    labels=('route', 'method', 'status'), buckets=getattr(settings, 'METRICS_LATENCY_BUCKETS', DEFAULT_BUCKETS))
+request_db_time = Histogram(
+    'uniquip_http_request_db_seconds', 'Time spent in database queries per request, by route.',
+    labels=('route',), buckets=getattr(settings, 'METRICS_LATENCY_BUCKETS', DEFAULT_BUCKETS))
+db_queries = Counter('uniquip_db_queries_total', 'Database queries run by requests, by route.', labels=('route',))
+db_slow_queries = Counter('uniquip_db_slow_queries_total', 'Queries over SQL_SLOW_QUERY_MS, by route.',
+                          labels=('route',))
+response_cache_lookups = Counter('uniquip_response_cache_lookups_total', 'Response cache lookups, by result.',
+                                 labels=('result',))
+response_cache_not_modified = Counter('uniquip_response_cache_not_modified_total',
+                                      'Cached responses answered with 304 Not Modified.')
+s3_logger_queue_depth = Gauge('uniquip_s3_logger_queue_depth',
+                              'Log entries waiting to be shipped to S3, as of each worker\'s last request.')
+
+
+def observe_request(route, method, status_code, seconds, queries):
+    """Record one finished request, in one write; ``queries`` is its sql_trace QueryStats."""
+    values = _values()
+    if values is None:
+        return
+    route = (route,)
+    updates = [*request_duration.updates(seconds, (*route, method if method in METHODS else 'other', str(status_code))),
+               *request_db_time.updates(queries.db_ms / 1000, route)]
+    if queries.count:
+        updates += db_queries.updates(queries.count, route)
+    if queries.slow:
+        updates += db_slow_queries.updates(queries.slow, route)
+    values.add(updates)
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def collect(path=None):
+    """
+    Sum the samples of every process's file in ``path``. Counters and
+    histograms include processes that have exited, so totals never go
+    backwards when a worker is recycled; gauges only count live processes.
+    """
+    path = path or directory()
+    try:
+        names = sorted(os.listdir(path))
+    except FileNotFoundError:
+        return {}
+    decoded = {}
+    samples = {}
+    for name in names:
+        match = _FILE_NAME.match(name)
+        if match is None:
+            continue
+        alive = None
+        for key, value in read(os.path.join(path, name)):
+            parts = decoded.get(key)
+            if parts is None:
+                metric_name, suffix, label_values, le = json.loads(key)
+                parts = decoded[key] = (metric_name, (suffix, tuple(label_values), le))
+            metric = _metrics.get(parts[0])
+            if metric is None:
+                continue
+            if metric.kind == 'gauge':
+                if alive is None:
+                    alive = _alive(int(match.group(1)))
+                if not alive:
+                    continue
+            family = samples.setdefault(parts[0], {})
+            family[parts[1]] = family.get(parts[1], 0.0) + value
+    return samples
+
+
+def render(samples):
+    """``collect()`` output in the Prometheus text exposition format."""
+    lines = []
+    for metric in _metrics.values():
+        family = samples.get(metric.name)
+        if not family:
+            continue
+        lines.append(f"# HELP {metric.name} {metric.documentation}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        series = sorted({label_values for _, label_values, _ in family if len(label_values) == len(metric.labels)})
+        for label_values in series:
+            if metric.kind == 'histogram':
+                cumulative = 0.0
+                for bound in metric.buckets:
+                    cumulative += family.get(('_bucket', label_values, _bound(bound)), 0.0)
+                    lines.append(f"{metric.name}_bucket{_labels(metric.labels, label_values, _bound(bound))} "
+                                 f"{_format(cumulative)}")
+                for suffix in ('_sum', '_count'):
+                    lines.append(f"{metric.name}{suffix}{_labels(metric.labels, label_values)} "
+                                 f"{_format(family.get((suffix, label_values, None), 0.0))}")
+            else:
+                lines.append(f"{metric.name}{_labels(metric.labels, label_values)} "
+                             f"{_format(family[('', label_values, None)])}")
+    return '\n'.join(lines) + '\n'
+
+
+def _bound(bound):
+    return '+Inf' if bound == math.inf else repr(float(bound))
+
+
+def _format(value):
+    if value.is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(value)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, label_values, le=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, label_values)]
+    if le is not None:
+        pairs.append(f'le="{le}"')
+    return '{' + ','.join(pairs) + '}' if pairs else ''
@@ -0,0 +1,293 @@
+import sys
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+from uniquip.utils.availability import (  # noqa: F401 (the statuses are imported from here)
+    CANCELLED_STATUS, INACTIVE_STATUSES, PENDING_STATUS, REJECTED_STATUS, RESERVED_STATUS, SLOT_LENGTH,
+    AvailabilityIndex,
+)
+
+
+class DayOccupancy:
+    """
+    Reservation counts per slot for one equipment on one day.
+
+    ``reserved`` and ``pending`` are bytearrays of per-slot counts so that a
+    single reservation can be added or removed without rescanning the others;
+    ``occupied`` and ``waiting`` are the matching bitmasks used for lookups.
+    """
+
+    __slots__ = ('reserved', 'pending', 'occupied', 'waiting', 'loaded_at')
+
+    def __init__(self, slots, loaded_at):
+        self.reserved = bytearray(slots)
+        self.pending = bytearray(slots)
+        self.occupied = 0
+        self.waiting = 0
+        self.loaded_at = loaded_at
+
+    def apply(self, first, last, delta, pending):
+        counts = self.pending if pending else self.reserved
+        for slot in range(first, last):
+            counts[slot] = max(0, min(255, counts[slot] + delta))
+        self.waiting = _mask(self.pending)
+        self.occupied = _mask(self.reserved) | self.waiting
+
+
+def _mask(counts):
+    mask = 0
+    for slot, count in enumerate(counts):
+        if count:
+            mask |= 1 << slot
+    return mask
+
+
+class OccupancyIndex:
+    """
+    Per-equipment, per-day occupancy bitmaps.
+
+    Days are loaded from Reservations on first use and kept for
+    OCCUPANCY_TTL_SECONDS; the reservation write views apply their changes
+    incrementally in between, and ORM writes drop the days they touch (see
+    signals), so availability checks and heatmaps are bit operations rather
+    than SQL scans. At most OCCUPANCY_MAX_DAYS equipment-days are kept; the
+    least recently used go first. ``ensure`` returns the days it loaded or
+    found, and lookups read from that so a day evicted in the meantime is
+    still answered; a day that is not loaded at all is loaded, never taken
+    as free. Cancelled and rejected reservations do not occupy a slot.
+    """
+
+    def __init__(self, slot_minutes=None, ttl=None, max_days=None):
+        self.slot_minutes = slot_minutes or getattr(settings, 'OCCUPANCY_SLOT_MINUTES', 60)
+        self.ttl = ttl if ttl is not None else getattr(settings, 'OCCUPANCY_TTL_SECONDS', 300)
+        self.max_days = max_days or getattr(settings, 'OCCUPANCY_MAX_DAYS', 100000)
+        self.resolution = timedelta(minutes=self.slot_minutes)
+        self.slots_per_day = (24 * 60) // self.slot_minutes
+        self.days = OrderedDict()
+        self.lock = threading.Lock()
+
+    def slot_range(self, day, start_time, end_time):
+        """Slots of ``day`` whose start instant falls inside [start_time, end_time)."""
+        day_start = datetime.combine(day, datetime.min.time())
+        first = max(0, -((day_start - start_time) // self.resolution))
+        last = min(self.slots_per_day, -((day_start - end_time) // self.resolution))
+        return first, last
+
+    def day_mask(self, first, last):
+        if last <= first:
+            return 0
+        return ((1 << (last - first)) - 1) << first
+
+    def ensure(self, equipment_ids, first_day, last_day):
+        """
+        Load whatever is missing or expired of [first_day, last_day]; returns
+        ``{(equipment_id, day): DayOccupancy}`` for all of it, to look up from
+        for the rest of the request.
+        """
+        days = _days(first_day, last_day)
+        now = time.monotonic()
+        stale = set()
+        loaded = {}
+        with self.lock:
+            for equipment_id in equipment_ids:
+                for day in days:
+                    occupancy = self.days.get((equipment_id, day))
+                    if occupancy is None or now - occupancy.loaded_at > self.ttl:
+                        stale.add(equipment_id)
+                    else:
+                        self.days.move_to_end((equipment_id, day))
+                        loaded[(equipment_id, day)] = occupancy
+        if stale:
+            loaded.update(self._load(first_day, last_day, sorted(stale)))
+        return loaded
+
+    def rebuild(self, first_day, last_day, equipment_ids=None):
+        """(Re)load [first_day, last_day] from Reservations; all equipment when equipment_ids is None."""
+        return len(self._load(first_day, last_day, equipment_ids))
+
+    def _load(self, first_day, last_day, equipment_ids=None):
+        days = _days(first_day, last_day)
+        window_start = datetime.combine(first_day, datetime.min.time())
+        window_end = datetime.combine(last_day + timedelta(days=1), datetime.min.time())
+        status_placeholders = ", ".join(["%s"] * len(INACTIVE_STATUSES))
+        with connection.cursor() as cursor:
+            if equipment_ids is None:
+                cursor.execute("SELECT EquipmentId FROM uniquip.Equipments")
+                equipment_ids = [row[0] for row in cursor.fetchall()]
+            if not equipment_ids:
+                return {}
+            placeholders = ", ".join(["%s"] * len(equipment_ids))
+            cursor.execute(f"""
+                SELECT EquipmentId, StartTime, EndTime, Status
+                FROM uniquip.Reservations
+                WHERE EquipmentId IN ({placeholders})
+                    AND StartTime < %s
+                    AND EndTime > %s
+                    AND Status NOT IN ({status_placeholders})
+            """, list(equipment_ids) + [window_end, window_start] + list(INACTIVE_STATUSES))
+            rows = cursor.fetchall()
+
+        loaded_at = time.monotonic()
+        fresh = {(equipment_id, day): DayOccupancy(self.slots_per_day, loaded_at)
+                 for equipment_id in equipment_ids for day in days}
+        for equipment_id, start_time, end_time, reservation_status in rows:
+            self._apply(fresh, equipment_id, start_time, end_time, 1, reservation_status == PENDING_STATUS)
+        with self.lock:
+            for key, occupancy in fresh.items():
+                self.days[key] = occupancy
+                self.days.move_to_end(key)
+            while len(self.days) > self.max_days:
+                self.days.popitem(last=False)
+        return fresh
+
+    def add(self, equipment_id, start_time, end_time, reservation_status):
+        if reservation_status in INACTIVE_STATUSES:
+            return
+        with self.lock:
+            self._apply(self.days, equipment_id, start_time, end_time, 1, reservation_status == PENDING_STATUS)
+
+    def remove(self, equipment_id, start_time, end_time, reservation_status):
+        if reservation_status in INACTIVE_STATUSES:
+            return
+        with self.lock:
+            self._apply(self.days, equipment_id, start_time, end_time, -1, reservation_status == PENDING_STATUS)
+
+    def approve(self, equipment_id, start_time, end_time):
+        with self.lock:
+            self._apply(self.days, equipment_id, start_time, end_time, -1, True)
+            self._apply(self.days, equipment_id, start_time, end_time, 1, False)
+
+    def _apply(self, days, equipment_id, start_time, end_time, delta, pending):
+        # Only days that are already loaded are touched; others load fresh from the table.
+        day = start_time.date()
+        while datetime.combine(day, datetime.min.time()) < end_time:
+            occupancy = days.get((equipment_id, day))
+            if occupancy is not None:
+                first, last = self.slot_range(day, start_time, end_time)
+                if first < last:
+                    occupancy.apply(first, last, delta, pending)
+            day += timedelta(days=1)
+
+    def occupied_mask(self, equipment_id, day, loaded=None):
+        """Occupied slots of one day, from ``loaded`` (what ``ensure`` returned) or the index, loading it if absent."""
+        key = (equipment_id, day)
+        occupancy = loaded.get(key) if loaded is not None else None
+        if occupancy is None:
+            with self.lock:
+                occupancy = self.days.get(key)
+        if occupancy is None:
+            # Evicted or never loaded: an unknown day is not a free one.
+            occupancy = self._load(day, day, [equipment_id])[key]
+            if loaded is not None:
+                loaded[key] = occupancy
+        return occupancy.occupied
+
+    def is_occupied(self, equipment_id, instant, loaded=None):
+        offset = instant - datetime.combine(instant.date(), datetime.min.time())
+        slot, remainder = divmod(offset, self.resolution)
+        if remainder:
+            raise ValueError(f"{instant} is not aligned to {self.slot_minutes}-minute slots")
+        return bool(self.occupied_mask(equipment_id, instant.date(), loaded) >> slot & 1)
+
+    def is_free(self, equipment_id, start_time, end_time):
+        loaded = self.ensure([equipment_id], start_time.date(), (end_time - timedelta(microseconds=1)).date())
+        day = start_time.date()
+        while datetime.combine(day, datetime.min.time()) < end_time:
+            if (self.occupied_mask(equipment_id, day, loaded)
+                    & self.day_mask(*self.slot_range(day, start_time, end_time))):
+                return False
+            day += timedelta(days=1)
+        return True
+
+    def heatmap(self, equipment_ids, first_day, last_day):
+        """Number of occupied equipment per slot, per day."""
+        loaded = self.ensure(equipment_ids, first_day, last_day)
+        result = {}
+        for day in _days(first_day, last_day):
+            masks = [self.occupied_mask(equipment_id, day, loaded) for equipment_id in equipment_ids]
+            result[day.isoformat()] = [
+                sum(mask >> slot & 1 for mask in masks) for slot in range(self.slots_per_day)
+            ]
+        return result
+
+    def invalidate(self, equipment_id=None, start_time=None, end_time=None):
+        """
+        Drop loaded days so they reload from Reservations: every day, one
+        equipment's, or the ones a reservation from ``start_time`` to
+        ``end_time`` touches.
+        """
+        with self.lock:
+            if equipment_id is None:
+                self.days.clear()
+            elif start_time is None:
+                for key in [key for key in self.days if key[0] == equipment_id]:
+                    del self.days[key]
+            else:
+                start_time, end_time = _naive(start_time), _naive(end_time)
+                day = start_time.date()
+                self.days.pop((equipment_id, day), None)
+                day += timedelta(days=1)
+                while datetime.combine(day, datetime.min.time()) < end_time:
+                    self.days.pop((equipment_id, day), None)
+                    day += timedelta(days=1)
+
+    def memory_stats(self):
+        with self.lock:
+            entries = list(self.days.items())
+            container = sys.getsizeof(self.days)
+        total = container
+        for key, occupancy in entries:
+            total += sys.getsizeof(key) + sys.getsizeof(occupancy)
+            total += sys.getsizeof(occupancy.reserved) + sys.getsizeof(occupancy.pending)
+            total += sys.getsizeof(occupancy.occupied) + sys.getsizeof(occupancy.waiting)
+        return {
+            'slot_minutes': self.slot_minutes,
+            'equipment_days': len(entries),
+            'bytes': total,
+            'bytes_per_10k_equipment_days': total * 10000 // len(entries) if entries else 0,
+        }
+
+
+class OccupancyAvailability(AvailabilityIndex):
+    """AvailabilityIndex answering slot checks from the shared occupancy bitmaps."""
+
+    loaded = None
+
+    @classmethod
+    def load(cls, equipment_ids, start, end):
+        index = cls(start, end)
+        equipment_ids = [int(equipment_id) for equipment_id in equipment_ids]
+        if not equipment_ids:
+            return index
+        index.load_equipment(equipment_ids)
+        index.loaded = occupancy.ensure(equipment_ids, start.date(), (end - timedelta(microseconds=1)).date())
+        return index
+
+    def is_booked(self, equipment_id, instant):
+        return occupancy.is_occupied(equipment_id, instant, self.loaded)
+
+
+def load_availability(equipment_ids, start, end):
+    """Use the occupancy bitmaps when the window lines up with their slots, the interval index otherwise."""
+    offset = start - datetime.combine(start.date(), datetime.min.time())
+    if offset % occupancy.resolution or SLOT_LENGTH % occupancy.resolution:
+        return AvailabilityIndex.load(equipment_ids, start, end)
+    return OccupancyAvailability.load(equipment_ids, start, end)
+
+
+def _naive(value):
+    # ORM instances carry aware datetimes; the bitmaps are keyed like the raw rows, in UTC.
+    return timezone.make_naive(value, timezone.utc) if timezone.is_aware(value) else value
+
+
+def _days(first_day, last_day):
+    return [first_day + timedelta(days=offset) for offset in range((last_day - first_day).days + 1)]
+
+
+occupancy = OccupancyIndex()
@@ -0,0 +1,188 @@
+import cProfile
+import hmac
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+from datetime import datetime
+
+from django.conf import settings
+from django.db import connection
+
+from uniquip.utils.sql_trace import normalize
+
+_SKIPPED_MODULES = ('uniquip.utils.profiling', 'uniquip.utils.sql_trace', 'uniquip.middleware')
+
+
+class SqlAttribution:
+    """
+    Execute wrapper for a profiled request: time per normalized statement
+    and per app function that issued it (the innermost ``uniquip`` frame),
+    which a cProfile dump alone only shows as time inside the driver.
+    """
+
+    def __init__(self):
+        self.statements = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            entry = self.statements.setdefault((normalize(sql), self.caller()), [0, 0.0])
+            entry[0] += 1
+            entry[1] += elapsed_ms
+
+    @staticmethod
+    def caller():
+        frame = sys._getframe(2)
+        while frame is not None:
+            module = frame.f_globals.get('__name__', '')
+            if module.startswith('uniquip.') and module not in _SKIPPED_MODULES:
+                return f"{module}:{frame.f_code.co_name}:{frame.f_lineno}"
+            frame = frame.f_back
+        return None
+
+    def summary(self):
+        rows = [{'statement': statement, 'caller': caller, 'count': count, 'total_ms': round(total_ms, 3)}
+                for (statement, caller), (count, total_ms) in self.statements.items()]
+        return sorted(rows, key=lambda row: row['total_ms'], reverse=True)
+
+
+class Profiler:
+    """
+    Decides which requests to profile and writes their dumps.
+
+    A request is profiled when it carries PROFILING_HEADER set to
+    PROFILING_TOKEN, when its path matches PROFILING_ROUTE_PATTERN, or with
+    probability PROFILING_SAMPLE_RATE. Only one request per process is
+    profiled at a time (the interpreter has one profiler hook); requests
+    arriving meanwhile run unprofiled. Each profile is a pstats dump plus a
+    JSON sidecar with the route, status, timing and SQL attribution:
+
+        <directory>/<YYYYmmddTHHMMSS>-<pid>-<n>.prof
+        <directory>/<YYYYmmddTHHMMSS>-<pid>-<n>.json
+
+    and the oldest pairs are deleted beyond PROFILING_MAX_FILES. The id is
+    returned in the X-Profile-Id response header. A streaming response is
+    profiled up to the point it is returned, not while its body is sent.
+    """
+
+    def __init__(self, directory=None, sample_rate=None, route_pattern=None, header=None, token=None,
+                 max_files=None):
+        self.directory = directory or getattr(settings, 'PROFILING_DIRECTORY', 'profiles')
+        self.sample_rate = sample_rate if sample_rate is not None else getattr(settings, 'PROFILING_SAMPLE_RATE', 0.0)
+        route_pattern = route_pattern if route_pattern is not None else getattr(settings, 'PROFILING_ROUTE_PATTERN', '')
+        self.route_pattern = re.compile(route_pattern) if route_pattern else None
+        header = header or getattr(settings, 'PROFILING_HEADER', 'X-Profile')
+        self.header = 'HTTP_' + header.upper().replace('-', '_')
+        self.token = token if token is not None else getattr(settings, 'PROFILING_TOKEN', '')
+        self.max_files = max_files if max_files is not None else getattr(settings, 'PROFILING_MAX_FILES', 500)
+        self._busy = threading.Lock()
+        self._sequence = 0
+
+    def wanted(self, request):
+        if self.token:
+            supplied = request.META.get(self.header)
+            if supplied is not None and hmac.compare_digest(supplied.encode('utf-8'), self.token.encode('utf-8')):
+                return 'header'
+        if self.route_pattern is not None and self.route_pattern.search(request.path):
+            return 'route'
+        if self.sample_rate and random.random() < self.sample_rate:
+            return 'sample'
+        return None
+
+    def __call__(self, request, get_response):
+        reason = self.wanted(request)
+        if reason is None or not self._busy.acquire(blocking=False):
+            return get_response(request)
+        try:
+            return self.run(request, get_response, reason)
+        finally:
+            self._busy.release()
+
+    def run(self, request, get_response, reason):
+        sql = SqlAttribution()
+        profile = cProfile.Profile()
+        started_at = datetime.utcnow()
+        started = time.perf_counter()
+        with connection.execute_wrapper(sql):
+            profile.enable()
+            try:
+                response = get_response(request)
+            finally:
+                profile.disable()
+        match = getattr(request, 'resolver_match', None)
+        response['X-Profile-Id'] = self.save(profile, {
+            'route': match.route if match is not None else 'unmatched',
+            'view': match.view_name if match is not None else None,
+            'method': request.method,
+            'path': request.get_full_path(),
+            'status': response.status_code,
+            'reason': reason,
+            'duration_ms': round((time.perf_counter() - started) * 1000, 3),
+            'started_at': started_at.isoformat(),
+            'pid': os.getpid(),
+            'sql': sql.summary(),
+        })
+        return response
+
+    def save(self, profile, metadata):
+        """Write the dump and its sidecar; returns the profile id (the shared file stem)."""
+        os.makedirs(self.directory, exist_ok=True)
+        self._sequence += 1
+        profile_id = f"{datetime.utcnow().strftime('%Y%m%dT%H%M%S')}-{os.getpid()}-{self._sequence}"
+        base = os.path.join(self.directory, profile_id)
+        profile.dump_stats(base + '.prof')
+        with open(base + '.json', 'w') as f:
+            json.dump(metadata, f, default=str)
+        self.rotate()
+        return profile_id
+
+    def rotate(self):
+        dumps = sorted((entry for entry in os.scandir(self.directory) if entry.name.endswith('.prof')),
+                       key=lambda entry: entry.stat().st_mtime)
+        for entry in dumps[:max(len(dumps) - self.max_files, 0)]:
+            for path in (entry.path, entry.path[:-len('.prof')] + '.json'):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+
+def load(directory):
+    """``(dump path, metadata)`` for every profile in ``directory`` that has both files."""
+    try:
+        names = sorted(os.listdir(directory))
+    except FileNotFoundError:
+        return []
+    profiles = []
+    for name in names:
+        if not name.endswith('.json'):
+            continue
+        dump = os.path.join(directory, name[:-len('.json')] + '.prof')
+        if not os.path.exists(dump):
+            continue
+        try:
+            with open(os.path.join(directory, name)) as f:
+                profiles.append((dump, json.load(f)))
+        except (OSError, ValueError):
+            continue
+    return profiles
+
+
+def merge_sql(profiles):
+    """SQL attribution rows of several profiles added up per statement and caller."""
+    merged = {}
+    for _, metadata in profiles:
+        for row in metadata.get('sql', ()):
+            entry = merged.setdefault((row['statement'], row['caller']), [0, 0.0])
+            entry[0] += row['count']
+            entry[1] += row['total_ms']
+    rows = [{'statement': statement, 'caller': caller, 'count': count, 'total_ms': round(total_ms, 3)}
+            for (statement, caller), (count, total_ms) in merged.items()]
+    return sorted(rows, key=lambda row: row['total_ms'], reverse=True)
@@ -0,0 +1,222 @@
+import random
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import OperationalError, connection, transaction
+
+from uniquip.utils import approvals, course_load, usage
+from uniquip.utils.availability import SLOT_LENGTH, IntervalSet
+from uniquip.utils.id_allocator import reservation_ids
+from uniquip.utils.occupancy import INACTIVE_STATUSES, PENDING_STATUS, RESERVED_STATUS, occupancy
+
+
+class ReservationRequestError(ValueError):
+    pass
+
+
+class StudentNotFound(ReservationRequestError):
+    pass
+
+
+class ReservationContention(Exception):
+    """The booking transaction kept deadlocking or waiting on locks held by concurrent bookings."""
+
+
+# ER_LOCK_DEADLOCK and ER_LOCK_WAIT_TIMEOUT: InnoDB rolled the transaction back, so it is safe to run again.
+LOCK_ERRORS = (1213, 1205)
+
+
+def merge_slot_requests(requests):
+    """
+    Batched ``merge_time_slots``: turn many {EquipmentId, Day, TimeSlots}
+    requests into (equipment_id, start, end) ranges of consecutive hours.
+
+    All slots are parsed and sorted once, then merged in a single sweep, so
+    repeated or overlapping slots for the same equipment collapse together.
+    """
+    starts = set()
+    for item in requests:
+        try:
+            equipment_id = int(item['EquipmentId'])
+            day = item['Day']
+            time_slots = item['TimeSlots']
+        except (KeyError, TypeError, ValueError):
+            raise ReservationRequestError("Each reservation needs EquipmentId, Day and TimeSlots")
+        if time_slots is None:
+            continue
+        if not isinstance(time_slots, (list, tuple)):
+            raise ReservationRequestError("TimeSlots must be a list of HH:MM:SS start times")
+        for slot in time_slots:
+            try:
+                starts.add((equipment_id, datetime.strptime(f"{day}T{slot}", "%Y-%m-%dT%H:%M:%S")))
+            except (TypeError, ValueError):
+                raise ReservationRequestError(f"Invalid Day '{day}' or time slot '{slot}', "
+                                              "expected YYYY-MM-DD and HH:MM:SS")
+
+    merged = []
+    for equipment_id, start in sorted(starts):
+        if merged and merged[-1][0] == equipment_id and merged[-1][2] == start:
+            merged[-1][2] = start + SLOT_LENGTH
+        else:
+            merged.append([equipment_id, start, start + SLOT_LENGTH])
+    return [tuple(slot) for slot in merged]
+
+
+def create_reservations(net_id, requests, all_or_nothing=False, in_transaction=None):
+    """
+    Book many slots for ``net_id`` in one transaction.
+
+    Returns ``(created, conflicts)``. Existing reservations on the requested
+    equipment are read with one locking range query and every candidate is
+    checked against them and against the earlier candidates in the batch;
+    whatever is free is inserted with a single multi-row INSERT. With
+    ``all_or_nothing`` any conflict means nothing is created.
+    ``in_transaction(created_rows)`` runs after the INSERT inside the same
+    transaction when at least one row is created. A transaction InnoDB
+    aborts as a deadlock or lock wait timeout is run again up to
+    RESERVATION_LOCK_RETRIES times before ``ReservationContention``.
+    """
+    slots = merge_slot_requests(requests)
+    if not slots:
+        return [], []
+
+    equipment_ids = sorted({equipment_id for equipment_id, _, _ in slots})
+    placeholders = ", ".join(["%s"] * len(equipment_ids))
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT NetId FROM uniquip.Students WHERE NetId = %s", [net_id])
+        if cursor.fetchone() is None:
+            raise StudentNotFound("Student not found")
+        cursor.execute(f"""
+            SELECT EquipmentId, IsReservable, ApprovalRequired
+            FROM uniquip.Equipments
+            WHERE EquipmentId IN ({placeholders})
+        """, equipment_ids)
+        equipment = {row[0]: (bool(row[1]), bool(row[2])) for row in cursor.fetchall()}
+
+    conflicts = []
+    candidates = []
+    for equipment_id, start_time, end_time in slots:
+        if equipment_id not in equipment:
+            conflicts.append(_slot(equipment_id, start_time, end_time, reason='Equipment not found'))
+        elif not equipment[equipment_id][0]:
+            conflicts.append(_slot(equipment_id, start_time, end_time, reason='Equipment is not reservable'))
+        else:
+            candidates.append((equipment_id, start_time, end_time))
+    if not candidates or (all_or_nothing and conflicts):
+        return [], conflicts
+
+    new_ids = reservation_ids.allocate(len(candidates))
+    retries = getattr(settings, 'RESERVATION_LOCK_RETRIES', 3)
+    for attempt in range(retries + 1):
+        try:
+            rows, booking_conflicts = _book(net_id, candidates, new_ids, equipment, all_or_nothing, conflicts,
+                                            in_transaction)
+            break
+        except OperationalError as e:
+            if e.args[0] not in LOCK_ERRORS:
+                raise
+            # Inside a caller's transaction the whole of it was rolled back, not just this part.
+            if connection.in_atomic_block or attempt == retries:
+                raise ReservationContention("These time slots are being booked concurrently, try again") from e
+            time.sleep(random.uniform(0, 0.05 * 2 ** attempt))
+    conflicts = conflicts + booking_conflicts
+    if rows is None:
+        return [], conflicts
+
+    created = []
+    for reservation_id, equipment_id, _, start_time, end_time, reservation_status in rows:
+        occupancy.add(equipment_id, start_time, end_time, reservation_status)
+        created.append({
+            'ReservationId': reservation_id,
+            'EquipmentId': equipment_id,
+            'NetId': net_id,
+            'StartTime': start_time.isoformat(),
+            'EndTime': end_time.isoformat(),
+            'Status': reservation_status
+        })
+    return created, conflicts
+
+
+def _book(net_id, candidates, new_ids, equipment, all_or_nothing, conflicts, in_transaction):
+    """
+    The locking part of ``create_reservations``, one transaction. Returns
+    ``(rows, new_conflicts)``; ``rows`` is None when ``all_or_nothing``
+    means nothing may be created.
+    """
+    booking_conflicts = []
+    with transaction.atomic():
+        booked = defaultdict(IntervalSet)
+        candidate_ids = sorted({equipment_id for equipment_id, _, _ in candidates})
+        status_placeholders = ", ".join(["%s"] * len(INACTIVE_STATUSES))
+        with connection.cursor() as cursor:
+            cursor.execute(f"""
+                SELECT EquipmentId, StartTime, EndTime
+                FROM uniquip.Reservations
+                WHERE EquipmentId IN ({", ".join(["%s"] * len(candidate_ids))})
+                    AND StartTime < %s
+                    AND EndTime > %s
+                    AND Status NOT IN ({status_placeholders})
+                FOR UPDATE
+            """, candidate_ids + [max(end for _, _, end in candidates), min(start for _, start, _ in candidates)]
+                 + list(INACTIVE_STATUSES))
+            for equipment_id, start_time, end_time in cursor.fetchall():
+                booked[equipment_id].add(start_time, end_time)
+
+            rows = []
+            for new_id, (equipment_id, start_time, end_time) in zip(new_ids, candidates):
+                if booked[equipment_id].overlaps(start_time, end_time):
+                    booking_conflicts.append(_slot(equipment_id, start_time, end_time,
+                                                   reason='Time slot already reserved'))
+                    continue
+                booked[equipment_id].add(start_time, end_time)
+                reservation_status = PENDING_STATUS if equipment[equipment_id][1] else RESERVED_STATUS
+                rows.append([new_id, equipment_id, net_id, start_time, end_time, reservation_status])
+
+            if all_or_nothing and (conflicts or booking_conflicts):
+                return None, booking_conflicts
+            if rows:
+                cursor.executemany("""
+                    INSERT INTO uniquip.Reservations (ReservationId, EquipmentId, NetId, StartTime, EndTime, Status)
+                    VALUES (%s, %s, %s, %s, %s, %s)
+                """, rows)
+                approvals.enqueue([row[0] for row in rows if row[5] == PENDING_STATUS], cursor)
+                usage.refresh(usage.keys_for((row[1], row[3], row[4]) for row in rows), cursor)
+                course_load.add(net_id, [(row[3], row[4]) for row in rows], cursor=cursor)
+                if in_transaction is not None:
+                    in_transaction(rows)
+    return rows, booking_conflicts
+
+
+def _slot(equipment_id, start_time, end_time, **extra):
+    return {'EquipmentId': equipment_id, 'StartTime': start_time.isoformat(), 'EndTime': end_time.isoformat(), **extra}
+
+
+def expand_recurrence(frequency, start_date, until_date, weekdays=None, excluded_dates=(), max_occurrences=400):
+    """
+    Days a daily or weekly rule occurs on between ``start_date`` and
+    ``until_date`` inclusive. Weekly rules repeat on ``weekdays``
+    (0 = Monday), defaulting to the weekday of ``start_date``.
+    """
+    if until_date < start_date:
+        raise ReservationRequestError("UntilDate must not be before StartDate")
+    if frequency == 'daily':
+        weekdays = set(range(7))
+    elif frequency == 'weekly':
+        weekdays = set(weekdays or [start_date.weekday()])
+        if not weekdays <= set(range(7)):
+            raise ReservationRequestError("Weekdays must be between 0 (Monday) and 6 (Sunday)")
+    else:
+        raise ReservationRequestError("Frequency must be 'daily' or 'weekly'")
+
+    excluded = set(excluded_dates)
+    days = []
+    day = start_date
+    while day <= until_date:
+        if day.weekday() in weekdays and day not in excluded:
+            days.append(day)
+            if len(days) > max_occurrences:
+                raise ReservationRequestError(f"A rule may expand to at most {max_occurrences} days")
+        day += timedelta(days=1)
+    return days
@@ -0,0 +1,188 @@
+import hashlib
+import threading
+
+from django.conf import settings
+from django.core import checks
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+
+from uniquip.utils import metrics
+
+EQUIPMENT = 'equipment'
+RESERVATIONS = 'reservations'
+
+
+class ResponseCache:
+    """
+    Rendered GET responses keyed by path, query string, negotiated media
+    type and the current version of the namespaces the view reads.
+
+    Write views call ``bump`` on the namespaces they change, which moves
+    every reader of that namespace to fresh keys; stale entries simply age
+    out of the backend. Entries live in the RESPONSE_CACHE_ALIAS entry of
+    CACHES (local memory per worker, or a file/memcached/redis backend to
+    share them). Versions live in RESPONSE_CACHE_VERSION_ALIAS, which has to
+    be shared by every worker so a write in one invalidates all of them;
+    ``check_shared_versions`` warns when it is not.
+    """
+
+    def __init__(self, alias=None, timeout=None, version_alias=None):
+        self.alias = alias or getattr(settings, 'RESPONSE_CACHE_ALIAS', 'responses')
+        self.version_alias = version_alias or getattr(settings, 'RESPONSE_CACHE_VERSION_ALIAS', 'response-versions')
+        self.timeout = timeout if timeout is not None else getattr(settings, 'RESPONSE_CACHE_TTL_SECONDS', 60)
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.stored = 0
+        self.stored_bytes = 0
+        self.served_bytes = 0
+
+    @property
+    def backend(self):
+        return caches[self.alias]
+
+    @property
+    def version_backend(self):
+        return caches[self.version_alias]
+
+    def versions(self, namespaces):
+        keys = [f"response-version:{namespace}" for namespace in namespaces]
+        found = self.version_backend.get_many(keys)
+        return [found.get(key, 0) for key in keys]
+
+    def bump(self, *namespaces):
+        """Move each namespace to a new version; returns the new versions."""
+        backend = self.version_backend
+        versions = []
+        for namespace in namespaces:
+            key = f"response-version:{namespace}"
+            try:
+                versions.append(backend.incr(key))
+            except ValueError:
+                if backend.add(key, 1, timeout=None):
+                    versions.append(1)
+                else:
+                    versions.append(backend.incr(key))
+        return versions
+
+    def key(self, request, media_type, namespaces):
+        versions = self.versions(namespaces)
+        raw = "|".join([request.path, request.META.get('QUERY_STRING', ''), media_type or '',
+                        *(f"{namespace}={version}" for namespace, version in zip(namespaces, versions))])
+        return "response:" + hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        entry = self.backend.get(key)
+        with self.lock:
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        metrics.response_cache_lookups.inc('miss' if entry is None else 'hit')
+        return entry
+
+    def set(self, key, response):
+        entry = (response.content, response['Content-Type'], etag(response.content))
+        self.backend.set(key, entry, self.timeout)
+        with self.lock:
+            self.stored += 1
+            self.stored_bytes += len(response.content)
+        return entry
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            stats = {
+                'backend': type(self.backend).__name__,
+                'version_backend': type(self.version_backend).__name__,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else None,
+                'not_modified': self.not_modified,
+                'stored': self.stored,
+                'stored_bytes': self.stored_bytes,
+                'served_bytes': self.served_bytes,
+            }
+        # Only the local-memory backend can report what it currently holds.
+        entries = getattr(self.backend, '_cache', None)
+        if entries is not None:
+            stats['entries'] = len(entries)
+            stats['bytes'] = sum(len(value) for value in list(entries.values()))
+        return stats
+
+
+def etag(content):
+    return '"' + hashlib.sha256(content).hexdigest()[:32] + '"'
+
+
+class CachedResponseMixin:
+    """
+    APIView mixin serving GET requests from ``response_cache`` with a strong
+    ETag; a matching If-None-Match gets a 304 with no body. Views list the
+    namespaces their payload depends on in ``cache_namespaces``.
+    """
+
+    cache_namespaces = ()
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method != 'GET':
+            return super().dispatch(request, *args, **kwargs)
+
+        media_type = request.META.get('HTTP_ACCEPT', '')
+        key = response_cache.key(request, media_type, self.cache_namespaces)
+        entry = response_cache.get(key)
+        if entry is None:
+            response = super().dispatch(request, *args, **kwargs)
+            if response.status_code != 200 or getattr(response, 'streaming', False):
+                return response
+            if hasattr(response, 'render'):
+                response.render()
+            entry = response_cache.set(key, response)
+        return cached_response(request, entry)
+
+
+class InvalidatesResponseCacheMixin:
+    """APIView mixin bumping ``invalidates_namespaces`` after every successful write."""
+
+    invalidates_namespaces = ()
+
+    def dispatch(self, request, *args, **kwargs):
+        response = super().dispatch(request, *args, **kwargs)
+        if request.method not in ('GET', 'HEAD', 'OPTIONS') and 200 <= response.status_code < 300:
+            response_cache.bump(*self.invalidates_namespaces)
+        return response
+
+
+def cached_response(request, entry):
+    content, content_type, tag = entry
+    if tag in [value.strip() for value in request.META.get('HTTP_IF_NONE_MATCH', '').split(',')]:
+        response = HttpResponseNotModified()
+        with response_cache.lock:
+            response_cache.not_modified += 1
+        metrics.response_cache_not_modified.inc()
+    else:
+        response = HttpResponse(content, content_type=content_type)
+        with response_cache.lock:
+            response_cache.served_bytes += len(content)
+    response['ETag'] = tag
+    response['Cache-Control'] = 'no-cache'
+    patch_vary_headers(response, ['Accept'])
+    return response
+
+
+response_cache = ResponseCache()
+
+
+@checks.register(checks.Tags.caches)
+def check_shared_versions(app_configs, **kwargs):
+    if not isinstance(response_cache.version_backend, LocMemCache):
+        return []
+    return [checks.Warning(
+        f"The '{response_cache.version_alias}' cache holding response cache versions is local memory, so each "
+        "worker process has its own: a write only invalidates cached responses in the worker that served it.",
+        hint="Use FileBasedCache (one host) or memcached/redis for RESPONSE_CACHE_VERSION_BACKEND.",
+        id='uniquip.W001',
+    )]
@@ -1,99 +1,206 @@
-import logging
+import atexit
 import boto3
+import gzip
 import json
+import logging
 import os
+import queue
+import threading
+import time
 import uuid
-import asyncio
+import weakref
 from datetime import datetime
 from dotenv import load_dotenv
 from enum import Enum
-from botocore.exceptions import ClientError
-from asyncio import Lock
 from opentelemetry import trace
-from opentelemetry.sdk.trace import TracerProvider
 
 
 load_dotenv()
 
-trace.set_tracer_provider(TracerProvider())
 tracer = trace.get_tracer(__name__)
+shipping_logger = logging.getLogger(__name__)
+_loggers = weakref.WeakSet()
 
 class LogLevel(Enum):
     INFO = "INFO"
     WARNING = "WARNING"
     ERROR = "ERROR"
 
+class OverflowPolicy(Enum):
+    DROP_NEWEST = "drop_newest"  # discard the entry being logged
+    DROP_OLDEST = "drop_oldest"  # discard the oldest queued entry to make room
+    BLOCK = "block"              # wait up to S3_LOG_BLOCK_SECONDS, then drop the new entry
+
 class S3Logger:
+    """
+    Ships log entries to S3 without blocking the caller.
+
+    ``log()`` only builds the entry and puts it on a bounded queue. A daemon
+    thread drains the queue and writes a new immutable segment object per
+    level and day whenever S3_LOG_BATCH_SIZE entries are waiting or the
+    oldest has waited S3_LOG_FLUSH_SECONDS:
+
+        logs/<service>/<level>/<YYYY-MM-DD>/<HHMMSS>-<pid>-<id>.jsonl[.gz]
+
+    When the queue is full the S3_LOG_OVERFLOW policy applies and ``dropped``
+    is incremented. Queued entries are flushed at interpreter exit.
+    """
+
     def __init__(self):
         self.bucket_name = os.getenv("S3_BUCKET_NAME")
         self.service_name = os.getenv("SERVICE_NAME", "default-service")
         self.s3_client = boto3.client(
             "s3",
             region_name=os.getenv("AWS_REGION"),
+            endpoint_url=os.getenv("S3_ENDPOINT_URL"),
             aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
             aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY")
         )
-        self.lock = Lock()
-        try:
-            self.loop = asyncio.get_running_loop()
-        except RuntimeError:
-            self.loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(self.loop)
+        self.batch_size = int(os.getenv("S3_LOG_BATCH_SIZE", "500"))
+        self.flush_seconds = float(os.getenv("S3_LOG_FLUSH_SECONDS", "5"))
+        self.compress = os.getenv("S3_LOG_GZIP", "true").lower() in ("1", "true", "yes")
+        self.overflow = OverflowPolicy(os.getenv("S3_LOG_OVERFLOW", OverflowPolicy.DROP_NEWEST.value))
+        self.block_seconds = float(os.getenv("S3_LOG_BLOCK_SECONDS", "0.05"))
+        self.max_retries = int(os.getenv("S3_LOG_MAX_RETRIES", "3"))
+        self.queue = queue.Queue(maxsize=int(os.getenv("S3_LOG_QUEUE_SIZE", "10000")))
+
+        self.dropped = 0
+        self.shipped = 0
+        self.failed = 0
+        self._worker = None
+        self._worker_pid = None
+        self._start_lock = threading.Lock()
+        self._stopping = threading.Event()
+        atexit.register(self.close)
+        _loggers.add(self)
 
     def log(self, message, level=LogLevel.INFO):
-        span = trace.get_current_span()
-        trace_id = format(span.get_span_context().trace_id, "032x") if span.get_span_context() else str(uuid.uuid4())
-        print(trace_id)
+        span_context = trace.get_current_span().get_span_context()
+        trace_id = format(span_context.trace_id, "032x") if span_context.is_valid else str(uuid.uuid4())
+        self._ensure_worker()
+        self._enqueue({
+            "timestamp": datetime.utcnow().isoformat(),
+            "service": self.service_name,
+            "level": level.name,
+            "message": message,
+            "log_id": str(uuid.uuid4()),
+            "trace_id": trace_id
+        })
+
+    def _enqueue(self, entry):
         try:
-            loop = asyncio.get_running_loop()
-            loop.create_task(self._async_log(message, level, trace_id))
-        except RuntimeError:
-            asyncio.run(self._async_log(message, level, trace_id))
+            if self.overflow is OverflowPolicy.BLOCK:
+                self.queue.put(entry, timeout=self.block_seconds)
+            else:
+                self.queue.put_nowait(entry)
+            return
+        except queue.Full:
+            pass
 
-    async def _async_log(self, message, level, trace_id):
-        async with self.lock:
+        if self.overflow is OverflowPolicy.DROP_OLDEST:
             try:
-                log_entry = {
-                    "timestamp": datetime.utcnow().isoformat(),
-                    "service": self.service_name,
-                    "level": level.name,
-                    "message": message,
-                    "log_id": str(uuid.uuid4()),
-                    "trace_id": trace_id
-                }
-                log_filename = f"logs/{self.service_name}/{level.name.lower()}/{datetime.utcnow().strftime('%Y-%m-%d')}.jsonl"
-
-                loop = asyncio.get_running_loop()
-
-                # Move S3 GET to executor
-                def fetch_existing_logs():
-                    try:
-                        return self.s3_client.get_object(Bucket=self.bucket_name, Key=log_filename)[
-                            "Body"].read().decode("utf-8")
-                    except ClientError as e:
-                        if e.response["Error"]["Code"] == "NoSuchKey":
-                            return ""  # No previous logs exist
-                        else:
-                            raise e
-
-                existing_logs = await loop.run_in_executor(None, fetch_existing_logs)
-
-                print(log_entry)
-
-                # Append new log entry
-                updated_logs = existing_logs + json.dumps(log_entry) + "\n"
-
-                # Move S3 PUT to executor
-                def upload_logs():
+                self.queue.get_nowait()
+                self.queue.task_done()
+                self.queue.put_nowait(entry)
+            except (queue.Empty, queue.Full):
+                pass
+        self.dropped += 1
+
+    def _ensure_worker(self):
+        # Started lazily and per process, so workers forked after import get their own thread.
+        if self._worker_pid == os.getpid() and self._worker.is_alive():
+            return
+        with self._start_lock:
+            if self._worker_pid == os.getpid() and self._worker.is_alive():
+                return
+            self._stopping.clear()
+            self._worker = threading.Thread(target=self._run, name="s3-log-shipper", daemon=True)
+            self._worker_pid = os.getpid()
+            self._worker.start()
+
+    def _run(self):
+        while True:
+            batch = []
+            deadline = None
+            while len(batch) < self.batch_size:
+                timeout = self.flush_seconds if deadline is None else deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    entry = self.queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                batch.append(entry)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_seconds
+            if batch:
+                self._ship(batch)
+                for _ in batch:
+                    self.queue.task_done()
+            elif self._stopping.is_set():
+                return
+
+    def _ship(self, batch):
+        segments = {}
+        for entry in batch:
+            segments.setdefault((entry["level"].lower(), entry["timestamp"][:10]), []).append(entry)
+
+        for (level, day), entries in segments.items():
+            body = "".join(json.dumps(entry) + "\n" for entry in entries).encode("utf-8")
+            key = (f"logs/{self.service_name}/{level}/{day}/"
+                   f"{datetime.utcnow().strftime('%H%M%S')}-{os.getpid()}-{uuid.uuid4().hex[:12]}.jsonl")
+            extra = {}
+            if self.compress:
+                body = gzip.compress(body)
+                key += ".gz"
+                extra["ContentEncoding"] = "gzip"
+
+            for attempt in range(self.max_retries + 1):
+                try:
                     self.s3_client.put_object(
                         Bucket=self.bucket_name,
-                        Key=log_filename,
-                        Body=updated_logs.encode("utf-8"),
-                        ContentType="application/json",
-                        ACL="private"
+                        Key=key,
+                        Body=body,
+                        ContentType="application/x-ndjson",
+                        ACL="private",
+                        **extra
                     )
+                    self.shipped += len(entries)
+                    break
+                except Exception:
+                    if attempt == self.max_retries:
+                        self.failed += len(entries)
+                        shipping_logger.exception("Error writing %d log entries to S3 as %s", len(entries), key)
+                    else:
+                        time.sleep(min(2 ** attempt * 0.1, 2))
+
+    def flush(self, timeout=None):
+        """Block until everything queued so far has been shipped (or ``timeout`` seconds pass)."""
+        if self._worker is None or self._worker_pid != os.getpid():
+            return self.queue.empty()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.queue.all_tasks_done:
+            while self.queue.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self.queue.all_tasks_done.wait(remaining)
+        return True
+
+    def close(self, timeout=10):
+        self.flush(timeout)
+        self._stopping.set()
+
+    def stats(self):
+        return {
+            "queue_depth": self.queue.qsize(),
+            "queue_capacity": self.queue.maxsize,
+            "shipped": self.shipped,
+            "dropped": self.dropped,
+            "failed": self.failed,
+        }
 
-                await loop.run_in_executor(None, upload_logs)
 
-            except Exception as e:
-                print(f"Error writing log to S3: {e}")
\ No newline at end of file
+def queue_depth():
+    """Entries waiting to be shipped, across every logger in this process."""
+    return sum(logger.queue.qsize() for logger in list(_loggers))
@@ -0,0 +1,189 @@
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connection
+
+from uniquip.utils.response_cache import response_cache
+
+GRAM = 3
+# Shared version (kept with the response cache versions) moved by every Equipment write in any process.
+VERSION_NAMESPACE = 'equipment-search'
+
+
+def _grams(text):
+    return {text[i:i + GRAM] for i in range(len(text) - GRAM + 1)}
+
+
+class EquipmentSearchIndex:
+    """
+    Trigram inverted index over Equipment.EquipmentName and Category.
+
+    ``substring_ids`` narrows a LIKE '%term%' on names to candidate ids from
+    the posting lists and verifies them in memory; ``search`` ranks name and
+    category matches by trigram similarity, so prefixes, substrings and
+    small typos all match. The index loads on first use and is kept current
+    by the Equipment save/delete signals. Those signals also move a shared
+    version, and every lookup compares it with the version the index was
+    loaded at, so writes made in other processes are picked up on the next
+    lookup; the index is also reloaded after SEARCH_INDEX_TTL_SECONDS.
+    """
+
+    def __init__(self, ttl=None):
+        self.ttl = ttl if ttl is not None else getattr(settings, 'SEARCH_INDEX_TTL_SECONDS', 600)
+        self.docs = {}
+        self.postings = defaultdict(set)
+        self.loaded_at = None
+        self.version = None
+        self.lock = threading.RLock()
+
+    def ensure_loaded(self):
+        version = response_cache.versions([VERSION_NAMESPACE])[0]
+        if (self.loaded_at is None or version != self.version
+                or time.monotonic() - self.loaded_at > self.ttl):
+            self.load(version)
+
+    def load(self, version=None):
+        # The version is read before the rows, so a write landing in between reloads again.
+        if version is None:
+            version = response_cache.versions([VERSION_NAMESPACE])[0]
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT EquipmentId, EquipmentName, Category FROM uniquip.Equipments")
+            rows = cursor.fetchall()
+        self.build(rows, version)
+
+    def build(self, rows, version=None):
+        docs = {}
+        postings = defaultdict(set)
+        for equipment_id, name, category in rows:
+            doc = docs[equipment_id] = self._document(name, category)
+            for gram in self._doc_grams(doc):
+                postings[gram].add(equipment_id)
+        with self.lock:
+            self.docs = docs
+            self.postings = postings
+            self.loaded_at = time.monotonic()
+            self.version = version
+
+    def upsert(self, equipment_id, name, category):
+        with self.lock:
+            current = self._changed()
+            if self.loaded_at is None:
+                return
+            self._discard(equipment_id)
+            doc = self.docs[equipment_id] = self._document(name, category)
+            for gram in self._doc_grams(doc):
+                self.postings[gram].add(equipment_id)
+            if not current:
+                self.version = None
+
+    def remove(self, equipment_id):
+        with self.lock:
+            current = self._changed()
+            if self.loaded_at is not None:
+                self._discard(equipment_id)
+            if not current:
+                self.version = None
+
+    def _changed(self):
+        """
+        Move the shared version for a write this process applies itself. Returns
+        whether the index was current before it: only then does the local change
+        make it current again, otherwise the next lookup reloads.
+        """
+        version = response_cache.bump(VERSION_NAMESPACE)[0]
+        if self.version is not None and self.version == version - 1:
+            self.version = version
+            return True
+        return False
+
+    def _discard(self, equipment_id):
+        doc = self.docs.pop(equipment_id, None)
+        if doc is None:
+            return
+        for gram in self._doc_grams(doc):
+            ids = self.postings.get(gram)
+            if ids is not None:
+                ids.discard(equipment_id)
+                if not ids:
+                    del self.postings[gram]
+
+    @staticmethod
+    def _document(name, category):
+        return (name or '').lower(), (category or '').lower()
+
+    @staticmethod
+    def _doc_grams(doc):
+        return _grams(f" {doc[0]} ") | _grams(f" {doc[1]} ")
+
+    def _candidates(self, grams):
+        postings = sorted((self.postings.get(gram, set()) for gram in grams), key=len)
+        if not postings:
+            return set()
+        candidates = set(postings[0])
+        for ids in postings[1:]:
+            candidates &= ids
+            if not candidates:
+                break
+        return candidates
+
+    def substring_ids(self, term):
+        """Ids whose name contains ``term``, case-insensitively (the LIKE '%term%' semantics)."""
+        self.ensure_loaded()
+        term = term.strip().lower()
+        with self.lock:
+            if len(term) < GRAM:
+                return {equipment_id for equipment_id, doc in self.docs.items() if term in doc[0]}
+            return {equipment_id for equipment_id in self._candidates(_grams(term))
+                    if term in self.docs[equipment_id][0]}
+
+    def search(self, term, limit=20, fuzzy=True, min_similarity=0.3):
+        """Best matches for ``term`` as (equipment_id, score), highest score first."""
+        self.ensure_loaded()
+        term = term.strip().lower()
+        if not term:
+            return []
+        term_grams = _grams(f" {term} ")
+        with self.lock:
+            if fuzzy:
+                counts = defaultdict(int)
+                for gram in term_grams:
+                    for equipment_id in self.postings.get(gram, ()):
+                        counts[equipment_id] += 1
+                candidates = counts.keys()
+            else:
+                counts = None
+                candidates = self._candidates(_grams(term)) if len(term) >= GRAM else self.docs.keys()
+
+            scored = []
+            for equipment_id in candidates:
+                name, category = self.docs[equipment_id]
+                if name == term:
+                    bonus = 3.0
+                elif name.startswith(term):
+                    bonus = 2.0
+                elif term in name:
+                    bonus = 1.0
+                elif term in category:
+                    bonus = 0.5
+                else:
+                    bonus = 0.0
+                if counts is None:
+                    if not bonus:
+                        continue
+                    similarity = 0.0
+                else:
+                    similarity = counts[equipment_id] / len(term_grams)
+                    if not bonus and similarity < min_similarity:
+                        continue
+                scored.append((equipment_id, round(bonus + similarity, 4)))
+        scored.sort(key=lambda item: (-item[1], item[0]))
+        return scored[:limit]
+
+    def stats(self):
+        with self.lock:
+            return {'documents': len(self.docs), 'grams': len(self.postings)}
+
+
+equipment_search = EquipmentSearchIndex()
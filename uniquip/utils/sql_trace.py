@@ -0,0 +1,175 @@
+import contextvars
+import json
+import logging
+import re
+import threading
+import time
+from functools import lru_cache
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from opentelemetry import trace
+from opentelemetry.trace import SpanKind
+
+tracer = trace.get_tracer(__name__)
+slow_query_logger = logging.getLogger('uniquip.slow_queries')
+
+_WHITESPACE = re.compile(r'\s+')
+_STRING = re.compile(r"'(?:[^'\\]|\\.)*'")
+_NUMBER = re.compile(r'(?<![\w.])-?\d+(?:\.\d+)?\b')
+_PLACEHOLDER_LIST = re.compile(r'\(\s*(?:%s|\?)(?:\s*,\s*(?:%s|\?))+\s*\)')
+_VALUES_LIST = re.compile(r'(VALUES\s*\([^)]*\))(?:\s*,\s*\([^)]*\))+', re.IGNORECASE)
+
+
+class QueryStats:
+    """Queries run on behalf of one request, on whichever threads ran them."""
+
+    __slots__ = ('count', 'db_ms', 'slow')
+
+    def __init__(self):
+        self.count = 0
+        self.db_ms = 0.0
+        self.slow = 0
+
+
+_request_stats = contextvars.ContextVar('sql_trace_request_stats', default=None)
+
+
+def begin_request():
+    """Start collecting for the current request; pass the token to ``end_request``."""
+    stats = QueryStats()
+    return stats, _request_stats.set(stats)
+
+
+def end_request(token):
+    _request_stats.reset(token)
+
+
+@lru_cache(maxsize=2048)
+def normalize(sql):
+    """
+    Collapse a statement to its shape: literals become ``?``, whitespace is
+    squeezed and placeholder or VALUES lists of any length look the same, so
+    ``IN (%s, %s, %s)`` and ``IN (%s)`` group together. Cached, since the raw
+    SQL in this app is a small fixed set.
+    """
+    sql = _WHITESPACE.sub(' ', sql).strip()
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = sql.replace('%s', '?')
+    sql = _VALUES_LIST.sub(r'\1, ...', sql)
+    return _PLACEHOLDER_LIST.sub('(...)', sql)
+
+
+class QueryTracer:
+    """
+    Database execute wrapper (``connection.execute_wrappers``).
+
+    Every query adds to the current request's QueryStats and, when a
+    recording span is active, becomes a CLIENT child span named after its
+    operation with the normalized statement, row count and vendor. Queries
+    slower than SQL_SLOW_QUERY_MS are written to the ``uniquip.slow_queries``
+    logger with their EXPLAIN plan; each statement shape is explained at
+    most once per SQL_SLOW_QUERY_EXPLAIN_SECONDS.
+    """
+
+    def __init__(self, slow_ms=None, explain_interval=None, spans=None):
+        self.slow_ms = slow_ms if slow_ms is not None else getattr(settings, 'SQL_SLOW_QUERY_MS', 200)
+        self.explain_interval = (explain_interval if explain_interval is not None
+                                 else getattr(settings, 'SQL_SLOW_QUERY_EXPLAIN_SECONDS', 60))
+        self.spans = spans if spans is not None else getattr(settings, 'SQL_TRACE_SPANS', True)
+        self._explained = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        if self.spans and trace.get_current_span().is_recording():
+            with tracer.start_as_current_span(sql.lstrip().split(None, 1)[0].upper(), kind=SpanKind.CLIENT) as span:
+                return self._execute(execute, sql, params, many, context, span)
+        return self._execute(execute, sql, params, many, context, None)
+
+    def _execute(self, execute, sql, params, many, context, span):
+        started = time.perf_counter()
+        succeeded = False
+        try:
+            result = execute(sql, params, many, context)
+            succeeded = True
+            return result
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            stats = _request_stats.get()
+            if stats is not None:
+                stats.count += 1
+                stats.db_ms += elapsed_ms
+            if span is not None:
+                span.set_attribute('db.system', context['connection'].vendor)
+                span.set_attribute('db.statement', normalize(sql))
+                span.set_attribute('db.rows', context['cursor'].rowcount)
+                if many:
+                    span.set_attribute('db.batch_size', len(params))
+            if succeeded and elapsed_ms >= self.slow_ms:
+                if stats is not None:
+                    stats.slow += 1
+                self._log_slow(elapsed_ms, sql, params, many, context)
+
+    def _log_slow(self, elapsed_ms, sql, params, many, context):
+        statement = normalize(sql)
+        entry = {
+            'duration_ms': round(elapsed_ms, 3),
+            'statement': statement,
+            'rows': context['cursor'].rowcount,
+            'vendor': context['connection'].vendor,
+        }
+        if not many and self._should_explain(statement):
+            entry['plan'] = self.explain(context['connection'], sql, params)
+        span_context = trace.get_current_span().get_span_context()
+        if span_context.is_valid:
+            entry['trace_id'] = format(span_context.trace_id, '032x')
+        slow_query_logger.warning(json.dumps(entry, default=str))
+
+    def _should_explain(self, statement):
+        if statement[:6].upper() not in ('SELECT', 'UPDATE', 'DELETE'):
+            return False
+        now = time.monotonic()
+        with self._lock:
+            if now - self._explained.get(statement, float('-inf')) < self.explain_interval:
+                return False
+            self._explained[statement] = now
+            if len(self._explained) > 4096:
+                self._explained.clear()
+            return True
+
+    @staticmethod
+    def explain(connection, sql, params):
+        """The plan of ``sql`` as a list of row dicts, from a separate raw cursor so the wrapper is not re-entered."""
+        prefix = 'EXPLAIN QUERY PLAN ' if connection.vendor == 'sqlite' else 'EXPLAIN '
+        if connection.vendor == 'sqlite':
+            sql = sql.replace('%s', '?')
+        try:
+            cursor = connection.connection.cursor()
+            try:
+                cursor.execute(prefix + sql, params or ())
+                columns = [col[0] for col in cursor.description]
+                return [dict(zip(columns, row)) for row in cursor.fetchall()]
+            finally:
+                cursor.close()
+        except Exception as e:
+            return {'error': str(e)}
+
+
+query_tracer = QueryTracer()
+
+
+def instrument(connection):
+    if query_tracer not in connection.execute_wrappers:
+        connection.execute_wrappers.append(query_tracer)
+
+
+def install():
+    """Wrap every database connection, including the ones opened later on other threads."""
+    if not getattr(settings, 'SQL_TRACE_ENABLED', True):
+        return
+    connection_created.connect(_on_connection_created, dispatch_uid='uniquip.sql_trace')
+
+
+def _on_connection_created(sender, connection, **kwargs):
+    instrument(connection)
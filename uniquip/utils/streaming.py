@@ -0,0 +1,84 @@
+from django.conf import settings
+from django.db import connection
+from django.http import StreamingHttpResponse
+from rest_framework.utils.encoders import JSONEncoder
+
+# Same output as DRF's JSONRenderer with its default (compact, unicode) settings.
+_encoder = JSONEncoder(ensure_ascii=False, separators=(',', ':'), allow_nan=False)
+
+
+def wants_stream(request):
+    return request.query_params.get('stream') in ('1', 'true', 'yes')
+
+
+def stream_rows(sql, params, batch_size=None):
+    """
+    Run ``sql`` now and return a generator of its rows as dicts that never
+    holds the whole result set.
+
+    On MySQL this uses an unbuffered server-side cursor (SSCursor), so rows
+    are pulled from the server ``batch_size`` at a time instead of being
+    copied into the client first. The connection must not run other queries
+    until the generator is exhausted or closed, and the generator must be
+    consumed on the thread that called this. Memory only stays flat under
+    WSGI, where the server pulls the body chunk by chunk on the request's
+    thread; Django's ASGI handler reads a sync iterator into memory before
+    sending it, which is why the /api/async/ routes ignore ``stream``.
+    """
+    batch_size = batch_size or getattr(settings, 'STREAM_FETCH_SIZE', 1000)
+    if connection.vendor == 'mysql':
+        from MySQLdb.cursors import SSCursor
+        connection.ensure_connection()
+        cursor = connection.connection.cursor(SSCursor)
+    else:
+        cursor = connection.cursor()
+    try:
+        with connection.wrap_database_errors:
+            cursor.execute(sql, params)
+    except Exception:
+        cursor.close()
+        raise
+    return _iter_rows(cursor, [col[0] for col in cursor.description], batch_size)
+
+
+def _iter_rows(cursor, columns, batch_size):
+    try:
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            for row in rows:
+                yield dict(zip(columns, row))
+    finally:
+        cursor.close()
+
+
+def json_array(items, chunk_items=500):
+    """Encode an iterable as a JSON array, yielding a bytes chunk every ``chunk_items`` items."""
+    yield b'['
+    buffer = []
+    first = True
+    for item in items:
+        buffer.append(('' if first else ',') + _encoder.encode(item))
+        first = False
+        if len(buffer) >= chunk_items:
+            yield ''.join(buffer).encode('utf-8')
+            buffer = []
+    if buffer:
+        yield ''.join(buffer).encode('utf-8')
+    yield b']'
+
+
+def json_object(key, items, trailer):
+    """Encode ``{key: [items...], **trailer()}``; ``trailer`` runs once the items are exhausted."""
+    yield ('{' + _encoder.encode(key) + ':').encode('utf-8')
+    yield from json_array(items)
+    for trailer_key, value in trailer().items():
+        yield (',' + _encoder.encode(trailer_key) + ':' + _encoder.encode(value)).encode('utf-8')
+    yield b'}'
+
+
+def streaming_json_response(chunks):
+    response = StreamingHttpResponse(chunks, content_type='application/json')
+    response['X-Accel-Buffering'] = 'no'
+    return response
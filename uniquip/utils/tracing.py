@@ -0,0 +1,266 @@
+import gzip
+import json
+import os
+import threading
+import time
+import urllib.request
+from collections import OrderedDict
+
+from django.conf import settings
+from opentelemetry import trace
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import SpanProcessor, TracerProvider
+from opentelemetry.sdk.trace.export import (
+    BatchSpanProcessor, ConsoleSpanExporter, SpanExporter, SpanExportResult
+)
+from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+from opentelemetry.trace import StatusCode
+
+_TRACE_ID_LIMIT = 1 << 64
+
+
+def encode_span(span):
+    """One span as a compact dict: ids in hex, times in ns since the epoch, attributes as-is."""
+    context = span.get_span_context()
+    record = {
+        'trace_id': format(context.trace_id, '032x'),
+        'span_id': format(context.span_id, '016x'),
+        'name': span.name,
+        'kind': span.kind.name,
+        'start_ns': span.start_time,
+        'end_ns': span.end_time,
+    }
+    if span.parent is not None:
+        record['parent_id'] = format(span.parent.span_id, '016x')
+    if span.status.status_code is not StatusCode.UNSET:
+        record['status'] = span.status.status_code.name
+        if span.status.description:
+            record['status_message'] = span.status.description
+    if span.attributes:
+        record['attributes'] = dict(span.attributes)
+    if span.events:
+        record['events'] = [{'name': event.name, 'ns': event.timestamp, 'attributes': dict(event.attributes or {})}
+                            for event in span.events]
+    return record
+
+
+def _ndjson(spans, resource):
+    lines = []
+    for span in spans:
+        record = encode_span(span)
+        record['service'] = resource
+        lines.append(json.dumps(record, separators=(',', ':'), default=str))
+    return ('\n'.join(lines) + '\n').encode('utf-8')
+
+
+class NdjsonFileSpanExporter(SpanExporter):
+    """
+    Appends each exported batch as NDJSON lines to a per-process file in
+    ``directory``, optionally gzip-compressed (one gzip member per batch,
+    which ``zcat`` reads as a single stream). Files roll over after
+    ``max_bytes``:
+
+        <directory>/spans-<pid>-<started>-<n>.ndjson[.gz]
+    """
+
+    def __init__(self, directory, max_bytes=64 * 1024 * 1024, compress=True, service_name=None):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.compress = compress
+        self.service_name = service_name
+        self._lock = threading.Lock()
+        self._file = None
+        self._written = 0
+        self._sequence = 0
+        self._pid = None
+
+    def export(self, spans):
+        payload = _ndjson(spans, self.service_name)
+        if self.compress:
+            payload = gzip.compress(payload, compresslevel=1)
+        try:
+            with self._lock:
+                target = self._target()
+                target.write(payload)
+                target.flush()
+                self._written += len(payload)
+        except OSError:
+            return SpanExportResult.FAILURE
+        return SpanExportResult.SUCCESS
+
+    def _target(self):
+        if self._file is not None and self._pid == os.getpid() and self._written < self.max_bytes:
+            return self._file
+        if self._file is not None:
+            self._file.close()
+        os.makedirs(self.directory, exist_ok=True)
+        self._pid = os.getpid()
+        self._sequence += 1
+        name = f"spans-{self._pid}-{int(time.time())}-{self._sequence}.ndjson" + ('.gz' if self.compress else '')
+        self._file = open(os.path.join(self.directory, name), 'ab')
+        self._written = 0
+        return self._file
+
+    def shutdown(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class NdjsonHttpSpanExporter(SpanExporter):
+    """POSTs each batch as gzip-compressed NDJSON to ``endpoint`` (a local collector or a stand-in for one)."""
+
+    def __init__(self, endpoint, timeout=5, service_name=None):
+        self.endpoint = endpoint
+        self.timeout = timeout
+        self.service_name = service_name
+
+    def export(self, spans):
+        request = urllib.request.Request(
+            self.endpoint, data=gzip.compress(_ndjson(spans, self.service_name), compresslevel=1), method='POST',
+            headers={'Content-Type': 'application/x-ndjson', 'Content-Encoding': 'gzip'})
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                response.read()
+        except OSError:
+            return SpanExportResult.FAILURE
+        return SpanExportResult.SUCCESS
+
+
+class TailSamplingProcessor(SpanProcessor):
+    """
+    Holds every finished span of a trace until its local root span ends,
+    then forwards the whole trace to ``downstream`` or drops it.
+
+    A trace is kept when the root span or any span in it has an ERROR
+    status or an HTTP status of 500 or more, when the root took at least
+    ``slow_ms``, or when its trace id falls within ``keep_ratio`` (the same
+    hash TraceIdRatioBased uses, so all processes agree). At most
+    ``max_traces`` unfinished traces are buffered; the oldest is dropped
+    beyond that. Spans that end after their root (work left running by a
+    streaming response) follow the decision already made for the trace.
+    """
+
+    def __init__(self, downstream, keep_ratio=0.1, slow_ms=500, max_traces=10000):
+        self.downstream = downstream
+        self.keep_bound = int(keep_ratio * _TRACE_ID_LIMIT)
+        self.slow_ns = int(slow_ms * 1e6)
+        self.max_traces = max_traces
+        self._traces = OrderedDict()
+        self._decided = OrderedDict()
+        self._lock = threading.Lock()
+        self.kept = 0
+        self.dropped = 0
+
+    def on_start(self, span, parent_context=None):
+        pass
+
+    def on_end(self, span):
+        trace_id = span.get_span_context().trace_id
+        is_root = span.parent is None or span.parent.is_remote
+        with self._lock:
+            late = self._decided.get(trace_id)
+            if late is None:
+                spans = self._traces.get(trace_id)
+                if spans is None:
+                    spans = self._traces[trace_id] = []
+                    if len(self._traces) > self.max_traces:
+                        self._traces.popitem(last=False)
+                        self.dropped += 1
+                spans.append(span)
+                if not is_root:
+                    return
+                del self._traces[trace_id]
+        if late is not None:
+            if late:
+                self.downstream.on_end(span)
+            return
+        keep = self._keep(trace_id, span, spans)
+        with self._lock:
+            self._decided[trace_id] = keep
+            if len(self._decided) > self.max_traces:
+                self._decided.popitem(last=False)
+        if keep:
+            self.kept += 1
+            for finished in spans:
+                self.downstream.on_end(finished)
+        else:
+            self.dropped += 1
+
+    def _keep(self, trace_id, root, spans):
+        if trace_id & (_TRACE_ID_LIMIT - 1) < self.keep_bound:
+            return True
+        if root.end_time - root.start_time >= self.slow_ns:
+            return True
+        for span in spans:
+            if span.status.status_code is StatusCode.ERROR:
+                return True
+            status_code = (span.attributes or {}).get('http.status_code') or (
+                span.attributes or {}).get('http.response.status_code')
+            if status_code and int(status_code) >= 500:
+                return True
+        return False
+
+    def shutdown(self):
+        self.downstream.shutdown()
+
+    def force_flush(self, timeout_millis=30000):
+        return self.downstream.force_flush(timeout_millis)
+
+
+def build_exporter(name=None):
+    name = name or getattr(settings, 'TRACING_EXPORTER', 'file')
+    service_name = getattr(settings, 'TRACING_SERVICE_NAME', 'uniquip')
+    if name == 'file':
+        return NdjsonFileSpanExporter(getattr(settings, 'TRACING_DIRECTORY', 'traces'),
+                                      max_bytes=getattr(settings, 'TRACING_FILE_MAX_BYTES', 64 * 1024 * 1024),
+                                      compress=getattr(settings, 'TRACING_GZIP', True), service_name=service_name)
+    if name == 'http':
+        return NdjsonHttpSpanExporter(settings.TRACING_ENDPOINT, service_name=service_name)
+    if name == 'console':
+        return ConsoleSpanExporter()
+    if name == 'none':
+        return None
+    raise ValueError(f"Unknown TRACING_EXPORTER '{name}', use file, http, console or none")
+
+
+def build_provider(exporter=None, head_ratio=None, keep_ratio=None, slow_ms=None):
+    """
+    A TracerProvider with head sampling (``head_ratio`` of new traces are
+    recorded at all; children follow their parent) and tail sampling of the
+    recorded ones through TailSamplingProcessor into a BatchSpanProcessor,
+    whose worker thread does the encoding and writing.
+    """
+    head_ratio = head_ratio if head_ratio is not None else getattr(settings, 'TRACING_HEAD_SAMPLE_RATIO', 1.0)
+    keep_ratio = keep_ratio if keep_ratio is not None else getattr(settings, 'TRACING_KEEP_RATIO', 0.1)
+    slow_ms = slow_ms if slow_ms is not None else getattr(settings, 'TRACING_SLOW_MS', 500)
+    provider = TracerProvider(
+        sampler=ParentBased(TraceIdRatioBased(head_ratio)),
+        resource=Resource.create({'service.name': getattr(settings, 'TRACING_SERVICE_NAME', 'uniquip')}),
+    )
+    if exporter is not None:
+        batch = BatchSpanProcessor(exporter,
+                                   max_queue_size=getattr(settings, 'TRACING_MAX_QUEUE_SIZE', 4096),
+                                   schedule_delay_millis=getattr(settings, 'TRACING_SCHEDULE_DELAY_MS', 2000),
+                                   max_export_batch_size=getattr(settings, 'TRACING_MAX_EXPORT_BATCH_SIZE', 512))
+        provider.add_span_processor(TailSamplingProcessor(batch, keep_ratio=keep_ratio, slow_ms=slow_ms)
+                                    if keep_ratio < 1 else batch)
+    return provider
+
+
+_configured = False
+
+
+def configure():
+    """Install the process-wide tracer provider from settings and instrument Django, once."""
+    global _configured
+    if _configured:
+        return
+    _configured = True
+    if not getattr(settings, 'TRACING_ENABLED', True):
+        return
+    trace.set_tracer_provider(build_provider(build_exporter()))
+    if getattr(settings, 'TRACING_INSTRUMENT_DJANGO', True):
+        from opentelemetry.instrumentation.django import DjangoInstrumentor
+        DjangoInstrumentor().instrument()
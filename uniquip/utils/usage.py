@@ -0,0 +1,202 @@
+from collections import defaultdict
+from contextlib import nullcontext
+from datetime import datetime, timedelta
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from uniquip.utils.occupancy import INACTIVE_STATUSES
+
+HOUR = timedelta(hours=1)
+
+
+def touched_days(start_time, end_time):
+    days = [start_time.date()]
+    while datetime.combine(days[-1] + timedelta(days=1), datetime.min.time()) < end_time:
+        days.append(days[-1] + timedelta(days=1))
+    return days
+
+
+def keys_for(reservations):
+    """(equipment_id, day) rollup keys touched by (equipment_id, start, end) tuples."""
+    return {(equipment_id, day) for equipment_id, start_time, end_time in reservations
+            for day in touched_days(_naive(start_time), _naive(end_time))}
+
+
+def _naive(value):
+    # ORM instances carry aware datetimes; the rollups are keyed like the raw rows, in UTC.
+    return timezone.make_naive(value, timezone.utc) if timezone.is_aware(value) else value
+
+
+def refresh(keys, cursor=None):
+    """
+    Recompute the hourly and daily usage rollups for the given
+    (equipment_id, day) keys from Reservations. Idempotent, so it serves
+    both the write paths and the catch-up job.
+    """
+    keys = set(keys)
+    if not keys:
+        return 0
+    equipment_ids = sorted({equipment_id for equipment_id, _ in keys})
+    first_day = min(day for _, day in keys)
+    last_day = max(day for _, day in keys)
+    window_start = datetime.combine(first_day, datetime.min.time())
+    window_end = datetime.combine(last_day + timedelta(days=1), datetime.min.time())
+
+    with _cursor(cursor) as cursor:
+        cursor.execute(f"""
+            SELECT R.EquipmentId, E.LabId, R.StartTime, R.EndTime, R.Status
+            FROM uniquip.Reservations R
+            JOIN uniquip.Equipments E ON E.EquipmentId = R.EquipmentId
+            WHERE R.EquipmentId IN ({", ".join(["%s"] * len(equipment_ids))})
+                AND R.StartTime < %s
+                AND R.EndTime > %s
+        """, [*equipment_ids, window_end, window_start])
+        hourly, daily = aggregate(cursor.fetchall(), keys)
+
+        with transaction.atomic():
+            for table in ('EquipmentUsageHourly', 'EquipmentUsageDaily'):
+                for equipment_id in equipment_ids:
+                    days = sorted(day for key_equipment_id, day in keys if key_equipment_id == equipment_id)
+                    cursor.execute(f"""
+                        DELETE FROM uniquip.{table}
+                        WHERE EquipmentId = %s AND Day IN ({", ".join(["%s"] * len(days))})
+                    """, [equipment_id, *days])
+            if hourly:
+                cursor.executemany("""
+                    INSERT INTO uniquip.EquipmentUsageHourly
+                        (EquipmentId, LabId, Day, Hour, Status, Reservations, BookedMinutes)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s)
+                """, [[*key, reservations, minutes] for key, (reservations, minutes) in hourly.items()])
+            if daily:
+                cursor.executemany("""
+                    INSERT INTO uniquip.EquipmentUsageDaily
+                        (EquipmentId, LabId, Day, Status, Reservations, BookedMinutes)
+                    VALUES (%s, %s, %s, %s, %s, %s)
+                """, [[*key, reservations, minutes] for key, (reservations, minutes) in daily.items()])
+    return len(keys)
+
+
+def aggregate(rows, keys):
+    """
+    Split (equipment, lab, start, end, status) reservations into per-hour
+    booked minutes. A reservation is counted once, in the hour it starts.
+    """
+    hourly = defaultdict(lambda: [0, 0])
+    daily = defaultdict(lambda: [0, 0])
+    for equipment_id, lab_id, start_time, end_time, reservation_status in rows:
+        hour_start = start_time.replace(minute=0, second=0, microsecond=0)
+        first = True
+        while hour_start < end_time or first:
+            day = hour_start.date()
+            overlap = min(end_time, hour_start + HOUR) - max(start_time, hour_start)
+            minutes = max(0, int(overlap.total_seconds() // 60))
+            if (equipment_id, day) in keys:
+                for bucket, key in ((hourly, (equipment_id, lab_id, day, hour_start.hour, reservation_status)),
+                                    (daily, (equipment_id, lab_id, day, reservation_status))):
+                    bucket[key][0] += 1 if first else 0
+                    bucket[key][1] += minutes
+            first = False
+            hour_start += HOUR
+    return hourly, daily
+
+
+def refresh_range(first_day, last_day, chunk_days=7):
+    """Catch-up: rebuild the rollups for every equipment between first_day and last_day."""
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT EquipmentId FROM uniquip.Equipments")
+        equipment_ids = [row[0] for row in cursor.fetchall()]
+    refreshed = 0
+    day = first_day
+    while day <= last_day:
+        chunk = [day + timedelta(days=offset) for offset in range(chunk_days) if day + timedelta(days=offset) <= last_day]
+        refreshed += refresh({(equipment_id, chunk_day) for equipment_id in equipment_ids for chunk_day in chunk})
+        day += timedelta(days=chunk_days)
+    return refreshed
+
+
+REPORT_QUERY = """
+    SELECT U.EquipmentId, E.EquipmentName, U.LabId, L.LabName, U.Status,
+        SUM(U.Reservations) AS Reservations, SUM(U.BookedMinutes) AS BookedMinutes
+    FROM uniquip.EquipmentUsageDaily U
+    JOIN uniquip.Equipments E ON E.EquipmentId = U.EquipmentId
+    JOIN uniquip.Labs L ON L.LabId = U.LabId
+    WHERE U.Day >= %s AND U.Day <= %s
+    GROUP BY U.EquipmentId, E.EquipmentName, U.LabId, L.LabName, U.Status
+    ORDER BY U.EquipmentId, U.Status
+"""
+
+# The same report from the hourly rollup, with each equipment's booked hours split by hour of day.
+HOURLY_REPORT_QUERY = """
+    SELECT U.EquipmentId, E.EquipmentName, U.LabId, L.LabName, U.Status, U.Hour,
+        SUM(U.Reservations) AS Reservations, SUM(U.BookedMinutes) AS BookedMinutes
+    FROM uniquip.EquipmentUsageHourly U
+    JOIN uniquip.Equipments E ON E.EquipmentId = U.EquipmentId
+    JOIN uniquip.Labs L ON L.LabId = U.LabId
+    WHERE U.Day >= %s AND U.Day <= %s
+    GROUP BY U.EquipmentId, E.EquipmentName, U.LabId, L.LabName, U.Status, U.Hour
+    ORDER BY U.EquipmentId, U.Status, U.Hour
+"""
+
+
+def report_query(by_hour=False):
+    return HOURLY_REPORT_QUERY if by_hour else REPORT_QUERY
+
+
+def usage_report(first_day, last_day, by_hour=False):
+    """
+    Per-equipment usage between first_day and last_day inclusive, summed
+    from the daily rollup (the hourly one when ``by_hour``), busiest
+    equipment first.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(report_query(by_hour), [first_day, last_day])
+        columns = [col[0] for col in cursor.description]
+        rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+    return sorted(report_entries(rows), key=lambda entry: (-entry['TotalHoursBooked'], entry['EquipmentId']))
+
+
+def report_entries(rows):
+    """
+    Fold REPORT_QUERY or HOURLY_REPORT_QUERY rows, which arrive grouped by
+    equipment, into one entry per equipment. Totals leave out cancelled and
+    rejected reservations; HoursByStatus lists every status. Hourly rows
+    also fill HoursByHour, the counted hours keyed by hour of day.
+    """
+    entry = None
+    for row in rows:
+        if entry is None or entry['EquipmentId'] != row['EquipmentId']:
+            if entry is not None:
+                yield _finish(entry)
+            entry = {
+                'EquipmentId': row['EquipmentId'],
+                'EquipmentName': row['EquipmentName'],
+                'LabId': row['LabId'],
+                'LabName': row['LabName'],
+                'TotalReservations': 0,
+                'TotalHoursBooked': 0.0,
+                'HoursByStatus': {},
+            }
+            if 'Hour' in row:
+                entry['HoursByHour'] = {}
+        minutes = int(row['BookedMinutes'])
+        if row['Status'] not in INACTIVE_STATUSES:
+            entry['TotalReservations'] += int(row['Reservations'])
+            entry['TotalHoursBooked'] += minutes / 60
+            if 'Hour' in row:
+                entry['HoursByHour'][row['Hour']] = entry['HoursByHour'].get(row['Hour'], 0) + minutes / 60
+        entry['HoursByStatus'][row['Status']] = entry['HoursByStatus'].get(row['Status'], 0) + minutes / 60
+    if entry is not None:
+        yield _finish(entry)
+
+
+def _finish(entry):
+    entry['TotalHoursBooked'] = round(entry['TotalHoursBooked'], 2)
+    entry['HoursByStatus'] = {key: round(hours, 2) for key, hours in entry['HoursByStatus'].items()}
+    if 'HoursByHour' in entry:
+        entry['HoursByHour'] = {hour: round(hours, 2) for hour, hours in sorted(entry['HoursByHour'].items())}
+    return entry
+
+
+def _cursor(cursor):
+    return nullcontext(cursor) if cursor is not None else connection.cursor()
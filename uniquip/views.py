@@ -1,5 +1,6 @@
-from datetime import timedelta, datetime
-from sqlite3 import IntegrityError
+import hashlib
+import json
+from datetime import date, timedelta, datetime
 
 from django.db.models import Max
 from django.utils.dateparse import parse_datetime
@@ -9,17 +10,35 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.pagination import PageNumberPagination
 from rest_framework import status
-from django.db import connection
-from .models import Student, Faculty, Course, Enrollment, Lab, CourseLab, Equipment, Reservation
+from django.core.cache import cache
+from django.db import connection, transaction, IntegrityError
+from .models import Faculty, Course, Enrollment, Lab, CourseLab, Equipment, Reservation, RecurringReservation
 from .serializers import (
     StudentSerializer, FacultySerializer, CourseSerializer, EnrollmentSerializer,
     LabSerializer, CourseLabSerializer, EquipmentSerializer, ReservationSerializer,
-    EquipmentSerializerCustom
+    EquipmentSerializerCustom, CompiledReadSerializer
 )
 from .filters import ReservationFilter
+from .pagination import InvalidCursor, decode_cursor, encode_cursor
 from django_filters.rest_framework import DjangoFilterBackend
 from django.utils.timezone import now
+from django.http import HttpResponse
+from django.views import View
+from uniquip.db.backends.mysql_pooled.pool import pool_stats
 from uniquip.utils.s3_logger import S3Logger, LogLevel
+from uniquip.utils.availability import AvailabilityIndex, parse_day
+from uniquip.utils.occupancy import occupancy, load_availability
+from uniquip.utils import approvals, course_load, export, id_allocator, metrics, usage
+from uniquip.utils.streaming import json_array, json_object, stream_rows, streaming_json_response, wants_stream
+from uniquip.utils.search import equipment_search
+from uniquip.utils.db_executor import database_executor
+from uniquip.utils.eligibility import student_eligibility
+from uniquip.utils.response_cache import (
+    EQUIPMENT, RESERVATIONS, CachedResponseMixin, InvalidatesResponseCacheMixin, response_cache
+)
+from uniquip.utils.reservations import (
+    ReservationContention, ReservationRequestError, StudentNotFound, create_reservations, expand_recurrence,
+)
 
 # class StudentViewSet(viewsets.ModelViewSet):
 #     queryset = Student.objects.all()
@@ -46,13 +65,30 @@ from uniquip.utils.s3_logger import S3Logger, LogLevel
 #     serializer_class = CourseLabSerializer
 logger = S3Logger()
 
+class CompiledReadMixin:
+    """
+    list/retrieve rendered by a CompiledReadSerializer of ``serializer_class``;
+    writes still go through the regular serializer.
+    """
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(self.compiled_serializer.many(page))
+        return Response(self.compiled_serializer.many(queryset))
+
+    def retrieve(self, request, *args, **kwargs):
+        return Response(self.compiled_serializer.to_representation(self.get_object()))
+
 class EquipmentPagination(PageNumberPagination):
     page_size = 5
     page_size_query_param = 'page_size'
     max_page_size = 100
-class EquipmentViewSet(viewsets.ModelViewSet):
-    queryset = Equipment.objects.all()
+class EquipmentViewSet(CompiledReadMixin, viewsets.ModelViewSet):
+    queryset = Equipment.objects.all().select_related('Lab')
     serializer_class = EquipmentSerializer
+    compiled_serializer = CompiledReadSerializer(EquipmentSerializer)
     pagination_class = EquipmentPagination
 
     @action(detail=True, methods=['get'])
@@ -66,335 +102,539 @@ class ReservationPagination(PageNumberPagination):
     page_size_query_param = 'page_size'
     max_page_size = 100
 
-class ReservationViewSet(viewsets.ModelViewSet):
-    queryset = Reservation.objects.all().select_related('Equipment').order_by('-ReservationId')
+class ReservationViewSet(CompiledReadMixin, viewsets.ModelViewSet):
+    queryset = Reservation.objects.all().select_related('Equipment__Lab').order_by('-ReservationId')
     serializer_class = ReservationSerializer
+    compiled_serializer = CompiledReadSerializer(ReservationSerializer)
     pagination_class = ReservationPagination
     filter_backends = [DjangoFilterBackend]
     filterset_class = ReservationFilter
 
+    def perform_create(self, serializer):
+        # Ids come from the allocator like every other booking path; a client-chosen id could fall
+        # inside a block another process has leased and break its next INSERT.
+        serializer.save(ReservationId=id_allocator.reservation_ids.allocate()[0])
+
+
+class EquipmentAvailability(CachedResponseMixin, APIView):
+    cache_namespaces = (EQUIPMENT, RESERVATIONS)
+    max_days = 31
 
-class EquipmentAvailability(APIView):
     def get(self, request):
         equipment_id = request.query_params.get('equipment_id')
         start_time = request.query_params.get('start_time')
-        # end_time = request.query_params.get('end_time')
-        if 'T' not in start_time:
-            start_time = start_time + "T00:00:00"
-        date_object = datetime.fromisoformat(start_time)
-        start_time = date_object + timedelta(days=-1)
-        new_date_object = date_object + timedelta(days=0)
-        start_time = start_time.isoformat()
-        end_time = new_date_object.isoformat()
-        print(start_time, end_time)
-
-        if not all([equipment_id, start_time, end_time]):
+        end_time = request.query_params.get('end_time')
+
+        if not all([equipment_id, start_time]):
             return Response({"error": "Missing parameters"}, status=status.HTTP_400_BAD_REQUEST)
 
         try:
-            with connection.cursor() as cursor:
-                query = """
-                WITH RECURSIVE DateIntervals AS (
-                    SELECT %s AS IntervalStart
-                    UNION ALL
-                    SELECT INTERVALStart + INTERVAL 1 DAY
-                    FROM DateIntervals
-                    WHERE IntervalStart + INTERVAL 1 DAY < %s
-                ),
-                HourIntervals AS (
-                    SELECT 0 AS IntervalStart
-                    UNION ALL
-                    SELECT IntervalStart + 1
-                    FROM HourIntervals
-                    WHERE IntervalStart + 1 < 24
-                )
-                SELECT 
-                    L.LabID,
-                    L.LabName,
-                    L.OpenHours,
-                    L.CloseHours,
-                    DATE(DI.IntervalStart) AS Day,
-                    ADDTIME(DI.IntervalStart, SEC_TO_TIME(HI.IntervalStart * 3600)) AS TimeSlot,
-                    SEC_TO_TIME(HI.IntervalStart * 3600) AS StartTimeSlot,
-                    SEC_TO_TIME((HI.IntervalStart + 1) * 3600) AS EndTimeSlot,
-                    E.EquipmentId
-                FROM 
-                    uniquip.Labs L
-                    INNER JOIN uniquip.Equipments E ON L.LabID = E.LabID
-                    CROSS JOIN DateIntervals DI
-                    CROSS JOIN HourIntervals HI
-                LEFT JOIN uniquip.Reservations R ON E.EquipmentID = R.EquipmentID
-                    AND ADDTIME(DI.IntervalStart, SEC_TO_TIME(HI.IntervalStart * 3600)) >= R.StartTime AND ADDTIME(DI.IntervalStart, SEC_TO_TIME(HI.IntervalStart * 3600)) < R.EndTime
-                WHERE 
-                    R.ReservationID IS NULL
-                    AND CAST(ADDTIME(DI.IntervalStart, SEC_TO_TIME(HI.IntervalStart * 3600)) AS TIME) >= L.OpenHours 
-                    AND CAST(ADDTIME(DI.IntervalStart, SEC_TO_TIME(HI.IntervalStart * 3600)) AS TIME) < L.CloseHours
-                    AND ADDTIME(DI.IntervalStart, SEC_TO_TIME(HI.IntervalStart * 3600)) >= %s 
-                    AND ADDTIME(DI.IntervalStart, SEC_TO_TIME(HI.IntervalStart * 3600)) < %s
-                    AND E.EquipmentID = %s
-                GROUP BY 
-                    L.LabID, 
-                    L.LabName,
-                    L.LabLocation, 
-                    Day,
-                    TimeSlot,
-                    StartTimeSlot,
-                    EndTimeSlot,
-                    E.EquipmentId 
-                ORDER BY 
-                    L.LabID, 
-                    Day,
-                    TimeSlot;
-                """
-                cursor.execute(query, [start_time, end_time, start_time, end_time, equipment_id])
-                columns = [col[0] for col in cursor.description]
-                results = [
-                    dict(zip(columns, row))
-                    for row in cursor.fetchall()
-                ]
-                return Response(results)
+            date_object = parse_day(start_time)
+            if end_time:
+                start_time = date_object
+                end_time = parse_day(end_time)
+            else:
+                # Without an explicit end the window is the day before start_time.
+                start_time = date_object + timedelta(days=-1)
+                end_time = date_object
+            if end_time <= start_time or end_time - start_time > timedelta(days=self.max_days):
+                return Response({'error': f'end_time must be after start_time and at most {self.max_days} days later'},
+                                status=status.HTTP_400_BAD_REQUEST)
+
+            index = load_availability([equipment_id], start_time, end_time)
+            return Response(index.free_slots(int(equipment_id)))
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-def merge_time_slots(day, time_slots):
-    if not time_slots:
-        return []
+class BatchEquipmentAvailability(APIView):
+    max_days = 31
+    max_equipment = 500
+
+    def get(self, request):
+        equipment_ids = request.query_params.getlist('equipment_id')
+        if len(equipment_ids) == 1 and ',' in equipment_ids[0]:
+            equipment_ids = equipment_ids[0].split(',')
+        lab_id = request.query_params.get('LabId')
+        category = request.query_params.get('Category')
+        start_date = request.query_params.get('start_date')
+        end_date = request.query_params.get('end_date')
+
+        if not start_date or not end_date or not (equipment_ids or lab_id or category):
+            return Response({'error': 'start_date, end_date and one of equipment_id, LabId or Category are required'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            start_time = parse_day(start_date)
+            end_time = parse_day(end_date)
+            if end_time <= start_time or end_time - start_time > timedelta(days=self.max_days):
+                return Response({'error': f'end_date must be after start_date and at most {self.max_days} days later'},
+                                status=status.HTTP_400_BAD_REQUEST)
+
+            if equipment_ids:
+                equipment_ids = [int(equipment_id) for equipment_id in equipment_ids]
+            else:
+                equipment_ids = AvailabilityIndex.equipment_ids_for(lab_id, category)
+            if len(equipment_ids) > self.max_equipment:
+                return Response({'error': f'At most {self.max_equipment} equipment items per request'},
+                                status=status.HTTP_400_BAD_REQUEST)
+
+            index = load_availability(equipment_ids, start_time, end_time)
+            results = []
+            for equipment_id in equipment_ids:
+                if equipment_id not in index.equipment:
+                    continue
+                lab_id, lab_name, open_hours, close_hours = index.equipment[equipment_id]
+                results.append({
+                    'EquipmentId': equipment_id,
+                    'LabId': lab_id,
+                    'LabName': lab_name,
+                    'OpenHours': open_hours,
+                    'CloseHours': close_hours,
+                    'FreeSlots': index.free_grid(equipment_id),
+                })
+            return Response({'start_date': start_time, 'end_date': end_time, 'results': results})
+        except Exception as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-    slots = [datetime.strptime(f"{day}T{slot}", "%Y-%m-%dT%H:%M:%S") for slot in sorted(time_slots)]
-    merged_slots = []
+class LabHeatmapView(APIView):
+    max_days = 31
 
-    start = slots[0]
-    end = start + timedelta(hours=1)
+    def get(self, request, lab_id):
+        start_date = request.query_params.get('start_date')
+        end_date = request.query_params.get('end_date', start_date)
 
-    for current in slots[1:]:
-        if current == end:
-            end = current + timedelta(hours=1)
-        else:
-            merged_slots.append((start, end))
-            start = current
-            end = start + timedelta(hours=1)
-    merged_slots.append((start, end))
+        if not start_date:
+            return Response({'error': 'start_date is required'}, status=status.HTTP_400_BAD_REQUEST)
 
-    return merged_slots
+        try:
+            first_day = parse_day(start_date).date()
+            last_day = parse_day(end_date).date()
+            if last_day < first_day or (last_day - first_day).days >= self.max_days:
+                return Response({'error': f'end_date must not be before start_date or span more than {self.max_days} days'},
+                                status=status.HTTP_400_BAD_REQUEST)
+
+            equipment_ids = AvailabilityIndex.equipment_ids_for(lab_id=lab_id)
+            return Response({
+                'LabId': lab_id,
+                'SlotMinutes': occupancy.slot_minutes,
+                'EquipmentCount': len(equipment_ids),
+                'Occupied': occupancy.heatmap(equipment_ids, first_day, last_day),
+            })
+        except Exception as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
+class CreateReservations(InvalidatesResponseCacheMixin, APIView):
+    invalidates_namespaces = (RESERVATIONS,)
 
-class CreateReservations(APIView):
     def post(self, request, *args, **kwargs):
-        print(request.data)
         day = request.data.get('Day')
         time_slots = request.data.get('TimeSlots')
         equipment_id = request.data.get('EquipmentId')
         net_id = request.data.get('NetId')
 
         try:
-            equipment = Equipment.objects.get(pk=equipment_id)
-            student = Student.objects.get(pk=net_id)
-        except Equipment.DoesNotExist:
-            return Response({'error': 'Equipment not found'}, status=status.HTTP_404_NOT_FOUND)
-        except Student.DoesNotExist:
-            return Response({'error': 'Student not found'}, status=status.HTTP_404_NOT_FOUND)
-
-        merged_time_slots = merge_time_slots(day, time_slots)
-        print(time_slots)
-        print(merged_time_slots)
-
-        reservations = []
-        try:
-            with connection.cursor() as cursor:
-                cursor.execute("SELECT MAX(ReservationId) FROM reservations")
-                last_id = cursor.fetchone()[0]
-                new_id = (last_id or 0) + 1
-
-                for start_time, end_time in merged_time_slots:
-                    reservationStatus = 'Reserved' if not equipment.ApprovalRequired else 'Approval Required'
-
-                    sql = """
-                                INSERT INTO reservations (ReservationId, EquipmentId, NetId, StartTime, EndTime, Status)
-                                VALUES (%s, %s, %s, %s, %s, %s)
-                            """
-                    cursor.execute(sql, [new_id, equipment_id, net_id, start_time, end_time, reservationStatus])
-                    reservations.append({
-                        'ReservationId': new_id,
-                        'EquipmentId': equipment_id,
-                        'NetId': net_id,
-                        'StartTime': start_time.isoformat(),
-                        'EndTime': end_time.isoformat(),
-                        'Status': reservationStatus
-                    })
-                    new_id += 1
-                connection.commit()
-
+            reservations, conflicts = create_reservations(
+                net_id, [{'EquipmentId': equipment_id, 'Day': day, 'TimeSlots': time_slots}], all_or_nothing=True)
+        except StudentNotFound as e:
+            return Response({'error': str(e)}, status=status.HTTP_404_NOT_FOUND)
+        except ReservationRequestError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         except IntegrityError as e:
-            connection.rollback()
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except ReservationContention as e:
+            return Response({'error': str(e)}, status=status.HTTP_409_CONFLICT)
+
+        if conflicts:
+            if conflicts[0].get('reason') == 'Equipment not found':
+                return Response({'error': 'Equipment not found'}, status=status.HTTP_404_NOT_FOUND)
+            return Response({'error': 'Some time slots are no longer available', 'conflicts': conflicts},
+                            status=status.HTTP_409_CONFLICT)
 
         return Response(reservations, status=status.HTTP_201_CREATED)
 
+class BulkCreateReservations(InvalidatesResponseCacheMixin, APIView):
+    invalidates_namespaces = (RESERVATIONS,)
+    max_reservations = 1000
+
+    def post(self, request, *args, **kwargs):
+        net_id = request.data.get('NetId')
+        requested = request.data.get('Reservations') or []
+        all_or_nothing = bool(request.data.get('AllOrNothing', False))
+
+        if not net_id or not requested:
+            return Response({'error': 'NetId and Reservations are required'}, status=status.HTTP_400_BAD_REQUEST)
+        if not isinstance(requested, list) or not all(isinstance(item, dict) for item in requested):
+            return Response({'error': 'Reservations must be a list of objects'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(requested) > self.max_reservations:
+            return Response({'error': f'At most {self.max_reservations} reservations per request'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            created, conflicts = create_reservations(net_id, requested, all_or_nothing=all_or_nothing)
+        except StudentNotFound as e:
+            return Response({'error': str(e)}, status=status.HTTP_404_NOT_FOUND)
+        except ReservationRequestError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except IntegrityError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except ReservationContention as e:
+            return Response({'error': str(e)}, status=status.HTTP_409_CONFLICT)
+
+        response_status = status.HTTP_201_CREATED if created or not conflicts else status.HTTP_409_CONFLICT
+        return Response({'created': created, 'conflicts': conflicts}, status=response_status)
+
+class RecurringReservationView(InvalidatesResponseCacheMixin, APIView):
+    invalidates_namespaces = (RESERVATIONS,)
+
+    def post(self, request, *args, **kwargs):
+        net_id = request.data.get('NetId')
+        frequency = request.data.get('Frequency')
+        time_slots = request.data.get('TimeSlots')
+        all_or_nothing = bool(request.data.get('AllOrNothing', False))
+
+        try:
+            crn = int(request.data.get('CRN'))
+            equipment_id = int(request.data.get('EquipmentId'))
+            start_date = date.fromisoformat(request.data.get('StartDate'))
+            until_date = date.fromisoformat(request.data.get('UntilDate'))
+            weekdays = [int(day) for day in request.data.get('Weekdays') or []]
+            excluded_dates = [date.fromisoformat(day) for day in request.data.get('ExcludedDates') or []]
+        except (TypeError, ValueError):
+            return Response({'error': 'CRN, EquipmentId, NetId, Frequency, StartDate, UntilDate and TimeSlots are required'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if not net_id or not time_slots:
+            return Response({'error': 'CRN, EquipmentId, NetId, Frequency, StartDate, UntilDate and TimeSlots are required'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        with connection.cursor() as cursor:
+            cursor.execute("""
+                SELECT 1
+                FROM uniquip.CourseLab AS CL
+                JOIN uniquip.Equipments AS E ON E.LabId = CL.LabId
+                WHERE CL.CRN = %s AND E.EquipmentId = %s
+            """, [crn, equipment_id])
+            if cursor.fetchone() is None:
+                return Response({'error': 'Equipment is not in a lab linked to this course'},
+                                status=status.HTTP_400_BAD_REQUEST)
+
+        rule = {}
+
+        def save_rule(rows):
+            rule['RuleId'] = RecurringReservation.objects.create(
+                CRN_id=crn, Equipment_id=equipment_id, NetId_id=net_id, Frequency=frequency, Weekdays=weekdays,
+                StartDate=start_date, UntilDate=until_date, TimeSlots=time_slots,
+                ExcludedDates=[day.isoformat() for day in excluded_dates],
+            ).RuleId
+
+        try:
+            days = expand_recurrence(frequency, start_date, until_date, weekdays, excluded_dates)
+            created, conflicts = create_reservations(
+                net_id,
+                [{'EquipmentId': equipment_id, 'Day': day.isoformat(), 'TimeSlots': time_slots} for day in days],
+                all_or_nothing=all_or_nothing,
+                in_transaction=save_rule,
+            )
+        except StudentNotFound as e:
+            return Response({'error': str(e)}, status=status.HTTP_404_NOT_FOUND)
+        except ReservationRequestError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except IntegrityError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except ReservationContention as e:
+            return Response({'error': str(e)}, status=status.HTTP_409_CONFLICT)
+
+        response_status = status.HTTP_201_CREATED if created else status.HTTP_409_CONFLICT
+        return Response({'RuleId': rule.get('RuleId'), 'Occurrences': len(days), 'created': created,
+                         'conflicts': conflicts}, status=response_status)
+
+def equipment_name_filter(equipment_name, max_candidates=5000):
+    """
+    SQL fragment and params restricting Equipments E to names containing
+    ``equipment_name``. Candidates come from the in-process search index,
+    which reloads whenever another process writes Equipment; returns
+    (None, None) when nothing can match, and falls back to LIKE when
+    the term is too broad for an IN list.
+    """
+    if equipment_name is None:
+        return "", []
+    candidate_ids = equipment_search.substring_ids(equipment_name)
+    if not candidate_ids:
+        return None, None
+    if len(candidate_ids) > max_candidates:
+        return "AND E.EquipmentName LIKE %s", ["%" + equipment_name.strip() + "%"]
+    return f"AND E.EquipmentId IN ({', '.join(['%s'] * len(candidate_ids))})", sorted(candidate_ids)
+
+
+class EquipmentSearchView(APIView):
+    def get(self, request):
+        term = request.query_params.get('q', '')
+        fuzzy = request.query_params.get('fuzzy', '1') != '0'
+        try:
+            limit = min(int(request.query_params.get('limit', 20)), 100)
+        except ValueError:
+            return Response({'error': 'limit must be a number'}, status=status.HTTP_400_BAD_REQUEST)
+        if not term.strip():
+            return Response([], status=status.HTTP_200_OK)
+
+        ranked = equipment_search.search(term, limit=limit, fuzzy=fuzzy)
+        if not ranked:
+            return Response([], status=status.HTTP_200_OK)
+        scores = dict(ranked)
+        with connection.cursor() as cursor:
+            cursor.execute(f"""
+                SELECT E.EquipmentId, E.LabId, E.EquipmentName, E.Category, E.IsReservable, E.ApprovalRequired, L.LabName
+                FROM uniquip.Equipments AS E
+                LEFT JOIN uniquip.Labs AS L ON L.LabId = E.LabId
+                WHERE E.EquipmentId IN ({', '.join(['%s'] * len(scores))})
+            """, list(scores))
+            columns = [col[0] for col in cursor.description]
+            results = [
+                dict(zip(columns, row), Score=scores[row[0]])
+                for row in cursor.fetchall()
+            ]
+        results.sort(key=lambda row: (-row['Score'], row['EquipmentId']))
+        return Response(results, status=status.HTTP_200_OK)
+
 class CustomPagination(PageNumberPagination):
     page_size = 10
     page_size_query_param = 'page_size'
     max_page_size = 100
 
-class EquipmentListView(APIView):
+class EquipmentListView(CachedResponseMixin, APIView):
+    cache_namespaces = (EQUIPMENT,)
     pagination_class = CustomPagination()
+    count_cache_seconds = 60
 
     def get(self, request):
         logger.log("Getting Equipment List", LogLevel.INFO)
         page_number = request.query_params.get('page', 1)
         page_size = request.query_params.get('page_size', 10)
+        cursor_token = request.query_params.get('cursor')
+        include_count = request.query_params.get('count', 'exact') != 'none'
         net_id = request.query_params.get('net_id')
         course_code = request.query_params.get('course_code', None)
         equipment_name = request.query_params.get('equipment_name', None)
         if equipment_name is not None and equipment_name.strip() == "":
             equipment_name = None
-        if equipment_name is not None:
-            equipment_name = "%" + equipment_name.strip() + "%"
         if course_code == "All":
             course_code = None
+        name_filter, name_params = equipment_name_filter(equipment_name)
+        if name_filter is None:
+            return Response({'count': 0, 'next_cursor': None, 'results': []})
 
+        try:
+            page_size = min(int(page_size), self.pagination_class.max_page_size)
+            after_id = 0
+            offset = 0
+            if cursor_token:
+                after_id = int(decode_cursor(cursor_token)['after'])
+            else:
+                offset = (int(page_number) - 1) * page_size
+            if page_size < 1 or offset < 0:
+                raise ValueError
+        except (InvalidCursor, KeyError, TypeError, ValueError):
+            return Response({'error': 'Invalid page, page_size or cursor'}, status=status.HTTP_400_BAD_REQUEST)
+
+        # The student's course labs come from the eligibility cache, so only Equipments is
+        # scanned, in primary-key order from the cursor: a page costs the same at any depth.
+        # page/OFFSET is still accepted for older clients.
+        lab_ids = student_eligibility.get(net_id).lab_ids(course_code) if net_id else []
+        lab_filter = f"OR E.LabId IN ({', '.join(['%s'] * len(lab_ids))})" if lab_ids else ""
         with connection.cursor() as cursor:
-            cursor.execute("""
-                SELECT E.EquipmentId, E.LabId, E.EquipmentName, E.Category, E.IsReservable, E.ApprovalRequired, L.LabName
-                FROM uniquip.Equipments AS E
-                JOIN uniquip.CourseLab AS CL ON E.LabId = CL.LabId 
-                JOIN uniquip.Enrollments AS C ON C.CRN = CL.CRN
-                LEFT JOIN uniquip.Courses Co ON C.CRN = Co.CRN 
-                LEFT JOIN uniquip.Labs AS L ON L.LabId = E.LabId
-                WHERE ApprovalRequired = 1
-                    AND NetId = %s
-                    AND IsReservable = 1
-                    AND (%s IS NULL OR Co.CourseCode = %s)
-                    AND (%s IS NULL OR E.EquipmentName like %s)
-                UNION 
+            cursor.execute(f"""
                 SELECT E.EquipmentId, E.LabId, E.EquipmentName, E.Category, E.IsReservable, E.ApprovalRequired, L.LabName
                 FROM uniquip.Equipments AS E
                 LEFT JOIN uniquip.Labs AS L ON L.LabId = E.LabId
-                WHERE ApprovalRequired = 0
-                    AND IsReservable = 1
-                    AND (%s IS NULL OR E.EquipmentName like %s)
+                WHERE IsReservable = 1
+                    AND (ApprovalRequired = 0 {lab_filter})
+                    {name_filter}
+                    AND E.EquipmentId > %s
+                ORDER BY E.EquipmentId
                 LIMIT %s OFFSET %s
-            """, [net_id, course_code, course_code, equipment_name, equipment_name, equipment_name, equipment_name, int(page_size), (int(page_number) - 1) * int(page_size)])
+            """, [*lab_ids, *name_params, after_id, page_size + 1, offset])
             columns = [col[0] for col in cursor.description]
             results = [
                 dict(zip(columns, row))
                 for row in cursor.fetchall()
             ]
-            cursor.execute("""
-                SELECT COUNT(*) FROM (
-                    SELECT E.EquipmentId
-                    FROM uniquip.Equipments AS E
-                    JOIN uniquip.CourseLab AS CL ON E.LabId = CL.LabId 
-                    JOIN uniquip.Enrollments AS C ON C.CRN = CL.CRN
-                    LEFT JOIN uniquip.Courses Co ON C.CRN = Co.CRN 
-                    LEFT JOIN uniquip.Labs AS L ON L.LabId = E.LabId
-                    WHERE ApprovalRequired = 1
-                        AND NetId = %s
-                        AND IsReservable = 1
-                        AND (%s IS NULL OR Co.CourseCode = %s)
-                        AND (%s IS NULL OR E.EquipmentName like %s)
-                    UNION 
-                    SELECT E.EquipmentId
-                    FROM uniquip.Equipments AS E
-                    LEFT JOIN uniquip.Labs AS L ON L.LabId = E.LabId
-                    WHERE ApprovalRequired = 0
-                        AND IsReservable = 1
-                        AND (%s IS NULL OR E.EquipmentName like %s)
-                ) AS combined
-            """, [net_id, course_code, course_code, equipment_name, equipment_name, equipment_name, equipment_name])
-            count = cursor.fetchone()[0]
-
-            finalResult = {}
-            finalResult['count'] = count
-            finalResult['results'] = results
+
+            count = None
+            if include_count:
+                # Keyed on the EQUIPMENT version too, so any Equipment write retires every cached count.
+                count_key = 'equipment-list-count:' + hashlib.sha256(json.dumps(
+                    [response_cache.versions([EQUIPMENT]), lab_ids, equipment_name]).encode('utf-8')).hexdigest()
+                count = cache.get(count_key)
+                if count is None:
+                    cursor.execute(f"""
+                        SELECT COUNT(*)
+                        FROM uniquip.Equipments AS E
+                        WHERE IsReservable = 1
+                            AND (ApprovalRequired = 0 {lab_filter})
+                            {name_filter}
+                    """, [*lab_ids, *name_params])
+                    count = cursor.fetchone()[0]
+                    cache.set(count_key, count, self.count_cache_seconds)
+
+        next_cursor = None
+        if len(results) > page_size:
+            results = results[:page_size]
+            next_cursor = encode_cursor(after=results[-1]['EquipmentId'])
+
+        finalResult = {}
+        finalResult['count'] = count
+        finalResult['next_cursor'] = next_cursor
+        finalResult['results'] = results
 
         return Response(finalResult)
-        # return self.pagination_class.get_paginated_response(serializer.data)
 
-class CourseListView(APIView):
+class CourseListView(CachedResponseMixin, APIView):
+    cache_namespaces = (EQUIPMENT,)
+
     def get(self, request, *args, **kwargs):
         net_id = request.query_params.get('net_id', '')
 
-        with connection.cursor() as cursor:
-            cursor.execute("""
-                SELECT Distinct C.CourseCode
-                FROM uniquip.Enrollments E
-                LEFT JOIN uniquip.Courses C ON E.CRN = C.CRN
-                INNER JOIN uniquip.CourseLab CL ON CL.CRN = C.CRN
-                WHERE E.NetId = %s;
-            """, [net_id])
-            rows = cursor.fetchall()
-
-        results = [row[0] for row in rows]
+        results = student_eligibility.get(net_id).course_codes
 
         return Response(results, status=status.HTTP_200_OK)
 
-class DeleteReservationView(APIView):
+class DeleteReservationView(InvalidatesResponseCacheMixin, APIView):
+    invalidates_namespaces = (RESERVATIONS,)
+
     def delete(self, request, reservation_id):
         try:
-            with connection.cursor() as cursor:
-                cursor.execute("DELETE FROM reservations WHERE ReservationId = %s", [reservation_id])
-                if cursor.rowcount == 0:
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute("""
+                    SELECT EquipmentId, StartTime, EndTime, Status, NetId
+                    FROM reservations
+                    WHERE ReservationId = %s
+                    FOR UPDATE
+                """, [reservation_id])
+                reservation = cursor.fetchone()
+                if reservation is None:
                     return Response({'error': 'Reservation not found'}, status=status.HTTP_404_NOT_FOUND)
-                connection.commit()
+                cursor.execute("DELETE FROM reservations WHERE ReservationId = %s", [reservation_id])
+                approvals.dequeue([reservation_id], cursor)
+                usage.refresh(usage.keys_for([reservation[:3]]), cursor)
+                course_load.remove(reservation[4], [reservation[1:3]], cursor)
+            occupancy.remove(*reservation[:4])
             return Response({'success': 'Reservation deleted'}, status=status.HTTP_204_NO_CONTENT)
         except Exception as e:
-            connection.rollback()
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
 
 class FacultyReservationListView(APIView):
     def get(self, request, faculty_id):
+        since = request.query_params.get('since')
+        after = request.query_params.get('after')
+        limit = request.query_params.get('limit')
         try:
-            with connection.cursor() as cursor:
-                cursor.execute("""
-                    SELECT distinct ReservationId, E.EquipmentName, S.Name, R.NetId, R.StartTime, R.EndTime, R.Status
-                    FROM (
-                        SELECT FacultyId
-                        FROM uniquip.Faculty
-                        WHERE FacultyId = %s
-                    ) AS F
-                    JOIN Courses Co ON Co.FacultyId = F.FacultyId
-                    JOIN CourseLab CL ON CL.CRN = Co.CRN
-                    JOIN Enrollments En ON En.CRN = Co.CRN
-                    JOIN Students S ON S.NetId = En.NetId
-                    JOIN Labs L ON L.LabId = CL.LabId
-                    JOIN Equipments E ON E.LabId = L.LabId
-                    JOIN Reservations R ON R.EquipmentId = E.EquipmentId
-                    WHERE R.Status = 'Approval Required' AND R.NetId = S.NetId
-                """, [faculty_id])
-                columns = [col[0] for col in cursor.description]
-                reservations = [
-                    dict(zip(columns, row))
-                    for row in cursor.fetchall()
-                ]
+            since = parse_day(since) if since else None
+            after = int(after) if after else None
+            limit = min(int(limit), 500) if limit else None
+        except ValueError:
+            return Response({'error': 'Invalid since, after or limit'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            if wants_stream(request):
+                return self.stream(faculty_id, since, after, limit)
+            reservations = approvals.pending_for_faculty(faculty_id, since=since, after=after, limit=limit)
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-        return Response(reservations, status=status.HTTP_200_OK)
+        if limit is None:
+            return Response(reservations, status=status.HTTP_200_OK)
+        next_after = reservations[-1]['ReservationId'] if len(reservations) == limit else None
+        return Response({'results': reservations, 'next_after': next_after}, status=status.HTTP_200_OK)
 
+    def stream(self, faculty_id, since, after, limit):
+        rows = stream_rows(*approvals.pending_for_faculty_query(faculty_id, since, after, limit))
+        if limit is None:
+            return streaming_json_response(json_array(rows))
 
-class ApproveReservationView(APIView):
-    def patch(self, request, reservation_id):
+        seen = {'count': 0, 'last': None}
+
+        def counted():
+            for row in rows:
+                seen['count'] += 1
+                seen['last'] = row['ReservationId']
+                yield row
+
+        return streaming_json_response(json_object(
+            'results', counted(), lambda: {'next_after': seen['last'] if seen['count'] == limit else None}))
+
+
+class ReservationExportView(APIView):
+    """
+    Every reservation matching the /api/reservations/ filters, streamed as
+    NDJSON or CSV (``export_format``), gzip-compressed with ``gzip=1``.
+    """
+
+    def get(self, request):
+        export_format = request.query_params.get('export_format', export.NDJSON)
+        compress = request.query_params.get('gzip') in ('1', 'true', 'yes')
         try:
-            with connection.cursor() as cursor:
-                cursor.execute("""
-                    UPDATE uniquip.Reservations
-                    SET Status = 'Reserved'
-                    WHERE ReservationId = %s AND Status = 'Approval Required'
-                """, [reservation_id])
+            chunks = export.export(request.query_params, export_format, compress)
+        except export.ExportError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return export.export_response(chunks, export_format, compress)
 
-                if cursor.rowcount == 0:
-                    return Response({'error': 'No reservation found requiring approval or already approved'},
-                                    status=status.HTTP_404_NOT_FOUND)
 
-                connection.commit()
-            return Response({'success': 'Reservation approved'}, status=status.HTTP_200_OK)
+class ApproveReservationView(InvalidatesResponseCacheMixin, APIView):
+    invalidates_namespaces = (RESERVATIONS,)
+
+    def patch(self, request, reservation_id):
+        try:
+            outcome = approvals.decide(approvals.APPROVE, reservation_ids=[reservation_id])[reservation_id]
         except Exception as e:
-            connection.rollback()
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
+        if outcome == 'conflict':
+            return Response({'error': 'Reservation overlaps an approved booking'}, status=status.HTTP_409_CONFLICT)
+        if outcome != 'approved':
+            return Response({'error': 'No reservation found requiring approval or already approved'},
+                            status=status.HTTP_404_NOT_FOUND)
+        return Response({'success': 'Reservation approved'}, status=status.HTTP_200_OK)
+
+
+class BulkApproveReservationsView(InvalidatesResponseCacheMixin, APIView):
+    invalidates_namespaces = (RESERVATIONS,)
+    max_reservations = 5000
+
+    def patch(self, request):
+        action = request.data.get('Action', approvals.APPROVE)
+        reservation_ids = request.data.get('ReservationIds')
+        faculty_id = request.data.get('FacultyId')
+        equipment_id = request.data.get('EquipmentId')
+
+        if action not in (approvals.APPROVE, approvals.REJECT):
+            return Response({'error': "Action must be 'approve' or 'reject'"}, status=status.HTTP_400_BAD_REQUEST)
+        if reservation_ids is None and faculty_id is None:
+            return Response({'error': 'ReservationIds or FacultyId is required'}, status=status.HTTP_400_BAD_REQUEST)
+        if reservation_ids is not None and (
+                not isinstance(reservation_ids, list)
+                or not all(isinstance(i, int) and not isinstance(i, bool) for i in reservation_ids)):
+            return Response({'error': 'ReservationIds must be a list of integers'}, status=status.HTTP_400_BAD_REQUEST)
+        if reservation_ids is not None and len(reservation_ids) > self.max_reservations:
+            return Response({'error': f'At most {self.max_reservations} reservations per request'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            outcomes = approvals.decide(action, reservation_ids=reservation_ids, faculty_id=faculty_id,
+                                        equipment_id=equipment_id)
+        except (TypeError, ValueError) as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        summary = {}
+        for outcome in outcomes.values():
+            summary[outcome] = summary.get(outcome, 0) + 1
+        return Response({'summary': summary, 'results': outcomes}, status=status.HTTP_200_OK)
+
+
+class EquipmentUpdateView(InvalidatesResponseCacheMixin, APIView):
+    invalidates_namespaces = (EQUIPMENT,)
 
-class EquipmentUpdateView(APIView):
     def patch(self, request, pk):
         approval_required = request.data.get('ApprovalRequired', None)
 
@@ -402,7 +642,7 @@ class EquipmentUpdateView(APIView):
             return Response({'error': 'ApprovalRequired field is required'}, status=status.HTTP_400_BAD_REQUEST)
 
         try:
-            with connection.cursor() as cursor:
+            with transaction.atomic(), connection.cursor() as cursor:
                 sql = "UPDATE uniquip.Equipments SET ApprovalRequired = %s WHERE EquipmentId = %s"
 
                 cursor.execute(sql, [approval_required, pk])
@@ -411,33 +651,30 @@ class EquipmentUpdateView(APIView):
                     return Response({'error': 'Equipment not found or no update needed'},
                                     status=status.HTTP_404_NOT_FOUND)
 
-                connection.commit()
                 return Response({'success': 'Equipment updated'}, status=status.HTTP_200_OK)
 
         except IntegrityError as e:
-            connection.rollback()
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
-            connection.rollback()
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
-class FacultyEquipmentListView(APIView):
+class FacultyEquipmentListView(CachedResponseMixin, APIView):
+    cache_namespaces = (EQUIPMENT,)
+
     def get(self, request, faculty_id):
+        equipment_name = request.query_params.get('equipment_name', None)
+        if equipment_name is not None and equipment_name.strip() == "":
+            equipment_name = None
+        name_filter, name_params = equipment_name_filter(equipment_name)
+        if name_filter is None:
+            return Response([], status=status.HTTP_200_OK)
+
         try:
+            if wants_stream(request):
+                return streaming_json_response(json_array(stream_rows(*self.query(faculty_id, name_filter, name_params))))
             with connection.cursor() as cursor:
-                cursor.execute("""
-                    SELECT DISTINCT E.LabId, E.EquipmentId, E.EquipmentName, E.ApprovalRequired, E.IsReservable
-                    FROM (
-                        SELECT FacultyId
-                        FROM uniquip.Faculty
-                        WHERE FacultyId = %s
-                    ) AS F
-                    JOIN Courses Co ON Co.FacultyId = F.FacultyId
-                    JOIN CourseLab CL ON CL.CRN = Co.CRN
-                    JOIN Labs L ON L.LabId = CL.LabId
-                    JOIN Equipments E ON E.LabId = L.LabId
-                """, [faculty_id])
+                cursor.execute(*self.query(faculty_id, name_filter, name_params))
                 columns = [col[0] for col in cursor.description]
                 equipments = [
                     dict(zip(columns, row))
@@ -448,6 +685,22 @@ class FacultyEquipmentListView(APIView):
 
         return Response(equipments, status=status.HTTP_200_OK)
 
+    @staticmethod
+    def query(faculty_id, name_filter, name_params):
+        return f"""
+            SELECT DISTINCT E.LabId, E.EquipmentId, E.EquipmentName, E.ApprovalRequired, E.IsReservable
+            FROM (
+                SELECT FacultyId
+                FROM uniquip.Faculty
+                WHERE FacultyId = %s
+            ) AS F
+            JOIN Courses Co ON Co.FacultyId = F.FacultyId
+            JOIN CourseLab CL ON CL.CRN = Co.CRN
+            JOIN Labs L ON L.LabId = CL.LabId
+            JOIN Equipments E ON E.LabId = L.LabId
+                {name_filter}
+        """, [faculty_id, *name_params]
+
 class EquipmentUsageReportView(APIView):
     def get(self, request):
         start_date = request.query_params.get('start_date')
@@ -457,25 +710,34 @@ class EquipmentUsageReportView(APIView):
             return Response({'error': 'start_date and end_date are required'}, status=status.HTTP_400_BAD_REQUEST)
 
         try:
-            with connection.cursor() as cursor:
-                cursor.callproc('GetEquipmentUsageReport', [start_date, end_date])
-                columns = [col[0] for col in cursor.description]
-                results = [
-                    dict(zip(columns, row))
-                    for row in cursor.fetchall()
-                ]
-                return Response(results, status=status.HTTP_200_OK)
+            first_day = parse_day(start_date).date()
+            last_day = parse_day(end_date).date()
+        except ValueError:
+            return Response({'error': 'Invalid date format. Use YYYY-MM-DD'}, status=status.HTTP_400_BAD_REQUEST)
+        if last_day < first_day:
+            return Response({'error': 'end_date must not be before start_date'}, status=status.HTTP_400_BAD_REQUEST)
+        granularity = request.query_params.get('granularity', 'day')
+        if granularity not in ('day', 'hour'):
+            return Response({'error': "granularity must be 'day' or 'hour'"}, status=status.HTTP_400_BAD_REQUEST)
+        by_hour = granularity == 'hour'
+
+        try:
+            if wants_stream(request):
+                # Streamed entries come in EquipmentId order; sorting by hours would need the whole report.
+                rows = stream_rows(usage.report_query(by_hour), [first_day, last_day])
+                return streaming_json_response(json_array(usage.report_entries(rows)))
+            return Response(usage.usage_report(first_day, last_day, by_hour=by_hour), status=status.HTTP_200_OK)
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
-class ToggleEquipmentReservability(APIView):
+class ToggleEquipmentReservability(InvalidatesResponseCacheMixin, APIView):
+    invalidates_namespaces = (EQUIPMENT, RESERVATIONS)
+
     def patch(self, request, equipment_id):
         current_time = now()
         try:
-            with connection.cursor() as cursor:
-                cursor.execute("BEGIN;")
-
+            with transaction.atomic(), connection.cursor() as cursor:
                 cursor.execute("""
                     UPDATE uniquip.Equipments
                     SET IsReservable = %s
@@ -483,21 +745,28 @@ class ToggleEquipmentReservability(APIView):
                 """, [False, equipment_id])
 
                 if cursor.rowcount == 0:
-                    cursor.execute("ROLLBACK;")
                     return Response({'error': 'Equipment not found or no update needed'}, status=status.HTTP_404_NOT_FOUND)
 
+                cursor.execute("""
+                    SELECT ReservationId, StartTime, EndTime, Status
+                    FROM uniquip.Reservations
+                    WHERE EquipmentId = %s AND StartTime > %s
+                """, [equipment_id, current_time])
+                cancelled = cursor.fetchall()
+
                 cursor.execute("""
                     UPDATE uniquip.Reservations
                     SET Status = 'Cancelled'
                     WHERE EquipmentId = %s AND StartTime > %s
                 """, [equipment_id, current_time])
+                approvals.dequeue([row[0] for row in cancelled], cursor)
+                usage.refresh(usage.keys_for((equipment_id, row[1], row[2]) for row in cancelled), cursor)
 
-                cursor.execute("COMMIT;")
-                return Response({'success': 'Equipment reservability toggled and future reservations cancelled'}, status=status.HTTP_200_OK)
+            for _, start_time, end_time, reservation_status in cancelled:
+                occupancy.remove(equipment_id, start_time, end_time, reservation_status)
+            return Response({'success': 'Equipment reservability toggled and future reservations cancelled'}, status=status.HTTP_200_OK)
 
         except Exception as e:
-            with connection.cursor() as cursor:
-                cursor.execute("ROLLBACK;")
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
@@ -507,26 +776,81 @@ class CourseLoadView(APIView):
         end_threshold = request.query_params.get('end_threshold', '2024-05-10')
 
         try:
-            with connection.cursor() as cursor:
-                cursor.execute("""
-                    SELECT e.CRN, c.CourseName, 
-                        SUM(TIMESTAMPDIFF(HOUR, StartTime, EndTime)) AS TotalHoursBooked 
-                    FROM Enrollments e
-                    LEFT JOIN Courses c ON c.CRN = e.CRN
-                    INNER JOIN CourseLab cl ON cl.CRN = c.CRN
-                    LEFT JOIN Reservations r ON r.NetId = e.NetId
-                    WHERE StartTime >= %s AND EndTime <= %s
-                    GROUP BY e.CRN, c.CourseName 
-                    ORDER BY TotalHoursBooked DESC
-                """, [start_threshold, end_threshold])
+            start = parse_day(start_threshold)
+            end = parse_day(end_threshold)
+        except ValueError:
+            return Response({'error': 'Invalid date format. Use YYYY-MM-DD'}, status=status.HTTP_400_BAD_REQUEST)
 
+        try:
+            # The daily aggregate only answers midnight thresholds.
+            if start.time() == datetime.min.time() and end.time() == datetime.min.time():
+                query, params = course_load.AGGREGATE_QUERY, [start.date(), end.date()]
+            else:
+                query, params = course_load.LIVE_QUERY, [start, end]
+            if wants_stream(request):
+                return streaming_json_response(json_array(stream_rows(query, params)))
+            with connection.cursor() as cursor:
+                cursor.execute(query, params)
                 columns = [col[0] for col in cursor.description]
                 results = [
                     dict(zip(columns, row))
                     for row in cursor.fetchall()
                 ]
-
             return Response(results, status=status.HTTP_200_OK)
 
         except Exception as e:
-            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
\ No newline at end of file
+            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class ResponseCacheStatsView(APIView):
+    def get(self, request):
+        return Response(response_cache.stats(), status=status.HTTP_200_OK)
+
+
+class DatabasePoolStatsView(APIView):
+    def get(self, request):
+        return Response(pool_stats(), status=status.HTTP_200_OK)
+
+
+class MetricsView(View):
+    """Every worker process's metrics (uniquip.utils.metrics), summed, in the Prometheus text format."""
+
+    http_method_names = ['get']
+
+    def get(self, request):
+        return HttpResponse(metrics.render(metrics.collect()), content_type=metrics.CONTENT_TYPE)
+
+
+class AsyncReadView(View):
+    """
+    Async entry point for a sync read view, for deployments under ASGI.
+
+    The wrapped DRF view, including its response cache and rendering, runs
+    on the bounded ``database_executor`` pool rather than on a new thread per
+    request, and the event loop never waits on MySQL. Output is
+    byte-for-byte what the sync route returns.
+
+    ``?stream=1`` is ignored here and the response is built in full: a
+    streamed body would be read from the executor thread's connection on
+    another thread after that connection went back to the pool, and the
+    ASGI handler buffers sync iterators anyway. Use the sync route to stream.
+    """
+
+    view_class = None
+    http_method_names = ['get', 'head']
+    _sync_views = {}
+
+    async def get(self, request, *args, **kwargs):
+        if 'stream' in request.GET:
+            request.GET = request.GET.copy()
+            del request.GET['stream']
+        return await database_executor.run(self.render_sync, request, *args, **kwargs)
+
+    def render_sync(self, request, *args, **kwargs):
+        view = self._sync_views.get(self.view_class)
+        if view is None:
+            view = self._sync_views[self.view_class] = self.view_class.as_view()
+        response = view(request, *args, **kwargs)
+        if hasattr(response, 'render'):
+            response.render()
+        return response